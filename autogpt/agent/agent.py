@@ -1,25 +1,86 @@
+import copy
 from datetime import datetime
 
 from colorama import Fore, Style
 
 from autogpt.app import execute_command, get_command
 from autogpt.config import Config
+from autogpt.json_utils.incremental import IncrementalJsonParser
 from autogpt.json_utils.json_fix_llm import fix_json_using_multiple_techniques
 from autogpt.json_utils.utilities import LLM_DEFAULT_RESPONSE_FORMAT, validate_json
-from autogpt.llm import chat_with_ai, create_chat_completion, create_chat_message
+from autogpt.llm import (
+    ContextWindow,
+    chat_with_ai,
+    create_chat_completion,
+    create_chat_message,
+)
+from autogpt.llm.retry import retry_deadline
+from autogpt.llm.router import ModelRouter
 from autogpt.llm.token_counter import count_string_tokens
 from autogpt.log_cycle.log_cycle import (
     FULL_MESSAGE_HISTORY_FILE_NAME,
     NEXT_ACTION_FILE_NAME,
     LogCycleHandler,
 )
-from autogpt.logs import logger, print_assistant_thoughts
+from autogpt.logs import logger, print_assistant_thought, print_assistant_thoughts
+from autogpt.memory_management.summary_memory import RunningSummaryUpdater
 from autogpt.speech import say_text
 from autogpt.spinner import Spinner
 from autogpt.utils import clean_input
 from autogpt.workspace import Workspace
 
 
+class StreamedReply:
+    """Handles an assistant reply while it is being streamed.
+
+    Each thought is printed as soon as it is complete, and the command is resolved
+    as soon as the "command" object is complete, before the rest of the reply has
+    arrived.
+
+    Attributes:
+        thoughts: The thoughts object, once it is complete.
+        command: The command object, once it is complete.
+        resolved_command: The command name and resolved arguments of the command.
+    """
+
+    def __init__(self, agent: "Agent", speak_mode: bool, on_first_output=None):
+        self.agent = agent
+        self.speak_mode = speak_mode
+        self.on_first_output = on_first_output
+        self._printed_output = False
+        self.reset()
+
+    def reset(self) -> None:
+        """Discards what was streamed so far, before the reply is streamed again."""
+        self.thoughts = None
+        self.command = None
+        self.resolved_command = None
+        self._parser = IncrementalJsonParser()
+
+    def feed(self, delta: str) -> None:
+        for path, value in self._parser.feed(delta):
+            if len(path) == 2 and path[0] == "thoughts":
+                if not self._printed_output and self.on_first_output is not None:
+                    self.on_first_output()
+                self._printed_output = True
+                print_assistant_thought(
+                    self.agent.ai_name, path[1], value, self.speak_mode
+                )
+            elif path == ("thoughts",):
+                self.thoughts = value
+            elif path == ("command",):
+                self.command = value
+                try:
+                    command_name, arguments = get_command(
+                        {"command": copy.deepcopy(value)}
+                    )
+                    if not command_name.lower().startswith("error"):
+                        arguments = self.agent._resolve_pathlike_command_args(arguments)
+                    self.resolved_command = command_name, arguments
+                except Exception as e:
+                    logger.debug(f"Could not resolve the streamed command: {e}")
+
+
 class Agent:
     """Agent class for interacting with Auto-GPT.
 
@@ -27,6 +88,8 @@ class Agent:
         ai_name: The name of the agent.
         memory: The memory object to use.
         full_message_history: The full message history.
+        context_window: The most recent messages of the full message history that
+          fit in the context sent to the AI.
         next_action_count: The number of actions to execute.
         system_prompt: The system prompt is the initial prompt that defines everything
           the AI needs to know to achieve its task successfully.
@@ -67,8 +130,9 @@ class Agent:
         self.summary_memory = (
             "I was created."  # Initial memory necessary to avoid hilucination
         )
-        self.last_memory_index = 0
+        self.summary_updater = RunningSummaryUpdater(self)
         self.full_message_history = full_message_history
+        self.context_window = ContextWindow(cfg.fast_llm_model)
         self.next_action_count = next_action_count
         self.command_registry = command_registry
         self.config = config
@@ -108,15 +172,21 @@ class Agent:
                 )
                 break
             # Send message to AI, get response
-            with Spinner("Thinking... "):
-                assistant_reply = chat_with_ai(
-                    self,
-                    self.system_prompt,
-                    self.triggering_prompt,
-                    self.full_message_history,
-                    self.memory,
-                    cfg.fast_token_limit,
-                )  # TODO: This hardcodes the model to use GPT3.5. Make this an argument
+            streamed_reply = None
+            with Spinner("Thinking... ") as spinner:
+                if cfg.stream_chat_completions:
+                    streamed_reply = StreamedReply(self, cfg.speak_mode, spinner.stop)
+                with retry_deadline(cfg.llm_cycle_deadline):
+                    assistant_reply = chat_with_ai(
+                        self,
+                        self.system_prompt,
+                        self.triggering_prompt,
+                        self.full_message_history,
+                        self.memory,
+                        cfg.fast_token_limit,
+                        on_delta=streamed_reply.feed if streamed_reply else None,
+                        on_retry=streamed_reply.reset if streamed_reply else None,
+                    )  # TODO: This hardcodes the model to use GPT3.5. Make this an argument
 
             assistant_reply_json = fix_json_using_multiple_techniques(assistant_reply)
             for plugin in cfg.plugins:
@@ -129,15 +199,27 @@ class Agent:
                 validate_json(assistant_reply_json, LLM_DEFAULT_RESPONSE_FORMAT)
                 # Get command name and arguments
                 try:
-                    print_assistant_thoughts(
-                        self.ai_name, assistant_reply_json, cfg.speak_mode
-                    )
-                    command_name, arguments = get_command(assistant_reply_json)
+                    # Thoughts and command that were already handled while the
+                    # reply was streamed are only redone if a plugin changed them
+                    if not streamed_reply or streamed_reply.thoughts != (
+                        assistant_reply_json.get("thoughts")
+                    ):
+                        print_assistant_thoughts(
+                            self.ai_name, assistant_reply_json, cfg.speak_mode
+                        )
+                    if (
+                        streamed_reply
+                        and streamed_reply.resolved_command
+                        and streamed_reply.command
+                        == assistant_reply_json.get("command")
+                    ):
+                        command_name, arguments = streamed_reply.resolved_command
+                    else:
+                        command_name, arguments = get_command(assistant_reply_json)
+                        arguments = self._resolve_pathlike_command_args(arguments)
                     if cfg.speak_mode:
                         say_text(f"I want to execute {command_name}")
 
-                    arguments = self._resolve_pathlike_command_args(arguments)
-
                 except Exception as e:
                     logger.error("Error: \n", str(e))
             self.log_cycle_handler.log_cycle(
@@ -182,9 +264,7 @@ class Agent:
                             "",
                         )
                         thoughts = assistant_reply_json.get("thoughts", {})
-                        self_feedback_resp = self.get_self_feedback(
-                            thoughts, cfg.fast_llm_model
-                        )
+                        self_feedback_resp = self.get_self_feedback(thoughts)
                         logger.typewriter_log(
                             f"SELF FEEDBACK: {self_feedback_resp}",
                             Fore.YELLOW,
@@ -300,7 +380,7 @@ class Agent:
                     )
         return command_args
 
-    def get_self_feedback(self, thoughts: dict, llm_model: str) -> str:
+    def get_self_feedback(self, thoughts: dict, llm_model: str | None = None) -> str:
         """Generates a feedback response based on the provided thoughts dictionary.
         This method takes in a dictionary of thoughts containing keys such as 'reasoning',
         'plan', 'thoughts', and 'criticism'. It combines these elements into a single
@@ -309,6 +389,8 @@ class Agent:
         Args:
             thoughts (dict): A dictionary containing thought elements like reasoning,
             plan, thoughts, and criticism.
+            llm_model (str, optional): The model to use. Defaults to the one the
+            ModelRouter picks for feedback.
         Returns:
             str: A feedback response generated using the provided thoughts dictionary.
         """
@@ -320,7 +402,7 @@ class Agent:
         thought = thoughts.get("thoughts", "")
         criticism = thoughts.get("criticism", "")
         feedback_thoughts = thought + reasoning + plan + criticism
-        return create_chat_completion(
-            [{"role": "user", "content": feedback_prompt + feedback_thoughts}],
-            llm_model,
-        )
+        messages = [{"role": "user", "content": feedback_prompt + feedback_thoughts}]
+        if llm_model is None:
+            llm_model = ModelRouter().route("feedback", messages)
+        return create_chat_completion(messages, llm_model)
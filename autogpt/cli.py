@@ -60,6 +60,16 @@ import click
     is_flag=True,
     help="Installs external dependencies for 3rd party plugins.",
 )
+@click.option(
+    "--no-response-cache",
+    is_flag=True,
+    help="Bypasses the cache of deterministic LLM responses for this run.",
+)
+@click.option(
+    "--clear-response-cache",
+    is_flag=True,
+    help="Removes all cached LLM responses before starting.",
+)
 @click.pass_context
 def main(
     ctx: click.Context,
@@ -77,6 +87,8 @@ def main(
     skip_news: bool,
     workspace_directory: str,
     install_plugin_deps: bool,
+    no_response_cache: bool,
+    clear_response_cache: bool,
 ) -> None:
     """
     Welcome to AutoGPT an experimental open-source application showcasing the capabilities of the GPT-4 pushing the boundaries of AI.
@@ -102,6 +114,8 @@ def main(
             skip_news,
             workspace_directory,
             install_plugin_deps,
+            no_response_cache,
+            clear_response_cache,
         )
 
 
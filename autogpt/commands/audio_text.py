@@ -1,10 +1,9 @@
 """Commands for converting audio to text."""
 import json
 
-import requests
-
 from autogpt.commands.command import command
 from autogpt.config import Config
+from autogpt.http_client import HttpClient
 
 CFG = Config()
 
@@ -51,7 +50,7 @@ def read_audio(audio: bytes) -> str:
             "You need to set your Hugging Face API token in the config file."
         )
 
-    response = requests.post(
+    response = HttpClient().post(
         api_url,
         headers=headers,
         data=audio,
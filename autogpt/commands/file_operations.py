@@ -9,10 +9,10 @@ from typing import Dict, Generator, Literal, Tuple
 import charset_normalizer
 import requests
 from colorama import Back, Fore
-from requests.adapters import HTTPAdapter, Retry
 
 from autogpt.commands.command import command
 from autogpt.config import Config
+from autogpt.http_client import HttpClient
 from autogpt.logs import logger
 from autogpt.spinner import Spinner
 from autogpt.utils import readable_file_size
@@ -170,7 +170,7 @@ def ingest_file(
     maximum length and overlap, and adding the chunks to the memory storage.
 
     :param filename: The name of the file to ingest
-    :param memory: An object with an add() method to store the chunks in memory
+    :param memory: An object with an add_many() method to store the chunks in memory
     :param max_length: The maximum length of each chunk, default is 4000
     :param overlap: The number of overlapping characters between chunks, default is 200
     """
@@ -183,13 +183,13 @@ def ingest_file(
         chunks = list(split_file(content, max_length=max_length, overlap=overlap))
 
         num_chunks = len(chunks)
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Ingesting chunk {i + 1} / {num_chunks} into memory")
-            memory_to_add = (
+        logger.info(f"Ingesting {num_chunks} chunks into memory")
+        memory.add_many(
+            [
                 f"Filename: {filename}\n" f"Content part#{i + 1}/{num_chunks}: {chunk}"
-            )
-
-            memory.add(memory_to_add)
+                for i, chunk in enumerate(chunks)
+            ]
+        )
 
         logger.info(f"Done ingesting {num_chunks} chunks from {filename}.")
     except Exception as err:
@@ -313,16 +313,10 @@ def download_file(url, filename):
         os.makedirs(directory, exist_ok=True)
         message = f"{Fore.YELLOW}Downloading file from {Back.LIGHTBLUE_EX}{url}{Back.RESET}{Fore.RESET}"
         with Spinner(message) as spinner:
-            session = requests.Session()
-            retry = Retry(total=3, backoff_factor=1, status_forcelist=[502, 503, 504])
-            adapter = HTTPAdapter(max_retries=retry)
-            session.mount("http://", adapter)
-            session.mount("https://", adapter)
-
             total_size = 0
             downloaded_size = 0
 
-            with session.get(url, allow_redirects=True, stream=True) as r:
+            with HttpClient().get(url, allow_redirects=True, stream=True) as r:
                 r.raise_for_status()
                 total_size = int(r.headers.get("Content-Length", 0))
                 downloaded_size = 0
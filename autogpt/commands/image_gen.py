@@ -4,11 +4,12 @@ import uuid
 from base64 import b64decode
 
 import openai
-import requests
 from PIL import Image
 
 from autogpt.commands.command import command
 from autogpt.config import Config
+from autogpt.http_client import HttpClient
+from autogpt.llm.llm_utils import retry_openai_api
 from autogpt.logs import logger
 
 CFG = Config()
@@ -61,9 +62,10 @@ def generate_image_with_hf(prompt: str, filename: str) -> str:
         "X-Use-Cache": "false",
     }
 
-    response = requests.post(
+    response = HttpClient().post(
         API_URL,
         headers=headers,
+        timeout=None,
         json={
             "inputs": prompt,
         },
@@ -77,6 +79,11 @@ def generate_image_with_hf(prompt: str, filename: str) -> str:
     return f"Saved to disk:{filename}"
 
 
+@retry_openai_api(endpoint="image", rate_limited=False)
+def _create_dalle_image(**kwargs) -> openai.Image:
+    return openai.Image.create(api_key=CFG.openai_api_key, **kwargs)
+
+
 def generate_image_with_dalle(prompt: str, filename: str, size: int) -> str:
     """Generate an image with DALL-E.
 
@@ -97,12 +104,11 @@ def generate_image_with_dalle(prompt: str, filename: str, size: int) -> str:
         )
         size = closest
 
-    response = openai.Image.create(
+    response = _create_dalle_image(
         prompt=prompt,
         n=1,
         size=f"{size}x{size}",
         response_format="b64_json",
-        api_key=CFG.openai_api_key,
     )
 
     logger.info(f"Image Generated for prompt:{prompt}")
@@ -132,15 +138,17 @@ def generate_image_with_sd_webui(
     Returns:
         str: The filename of the image
     """
-    # Create a session and set the basic auth if needed
-    s = requests.Session()
+    # Set the basic auth if needed
+    auth = None
     if CFG.sd_webui_auth:
         username, password = CFG.sd_webui_auth.split(":")
-        s.auth = (username, password or "")
+        auth = (username, password or "")
 
-    # Generate the images
-    response = requests.post(
+    # Generate the images; this may take longer than the usual request timeout
+    response = HttpClient().post(
         f"{CFG.sd_webui_url}/sdapi/v1/txt2img",
+        auth=auth,
+        timeout=None,
         json={
             "prompt": prompt,
             "negative_prompt": negative_prompt,
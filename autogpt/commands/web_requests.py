@@ -6,13 +6,13 @@ from bs4 import BeautifulSoup
 from requests import Response
 
 from autogpt.config import Config
+from autogpt.http_client import HttpClient
 from autogpt.processing.html import extract_hyperlinks, format_hyperlinks
 from autogpt.url_utils.validators import validate_url
 
 CFG = Config()
 
-session = requests.Session()
-session.headers.update({"User-Agent": CFG.user_agent})
+session = HttpClient().session
 
 
 @validate_url
@@ -1,6 +1,6 @@
 """Configuration class to store the state of bools for different scripts access."""
 import os
-from typing import List
+from typing import Dict, List, Tuple
 
 import openai
 import yaml
@@ -9,6 +9,8 @@ from colorama import Fore
 
 from autogpt.singleton import Singleton
 
+EMBEDDING_CACHE_DTYPES = ("float32", "float16")
+
 
 class Config(metaclass=Singleton):
     """
@@ -35,13 +37,62 @@ class Config(metaclass=Singleton):
         self.smart_llm_model = os.getenv("SMART_LLM_MODEL", "gpt-4")
         self.fast_token_limit = int(os.getenv("FAST_TOKEN_LIMIT", 4000))
         self.smart_token_limit = int(os.getenv("SMART_TOKEN_LIMIT", 8000))
+        self.stream_chat_completions = (
+            os.getenv("STREAM_CHAT_COMPLETIONS", "False") == "True"
+        )
+        self.use_response_cache = os.getenv("USE_RESPONSE_CACHE", "False") == "True"
+        self.response_cache_path = os.getenv(
+            "RESPONSE_CACHE_PATH", "data/response_cache"
+        )
+        self.response_cache_memory_entries = int(
+            os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", 256)
+        )
+        self.llm_retry_max_backoff = float(os.getenv("LLM_RETRY_MAX_BACKOFF", 60))
+        self.llm_call_deadline = float(os.getenv("LLM_CALL_DEADLINE", 300))
+        self.llm_cycle_deadline = float(os.getenv("LLM_CYCLE_DEADLINE", 600))
+        self.llm_circuit_breaker_threshold = int(
+            os.getenv("LLM_CIRCUIT_BREAKER_THRESHOLD", 5)
+        )
+        self.llm_circuit_breaker_reset = float(
+            os.getenv("LLM_CIRCUIT_BREAKER_RESET", 30)
+        )
+        # The models auxiliary calls are routed to, e.g.
+        # "json-fix=fastest:gpt-3.5-turbo,gpt-4;analyze=cheapest:gpt-4"
+        self.llm_routes = parse_llm_routes(os.getenv("LLM_ROUTES", ""))
         self.embedding_model = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
         self.embedding_tokenizer = os.getenv("EMBEDDING_TOKENIZER", "cl100k_base")
         self.embedding_token_limit = int(os.getenv("EMBEDDING_TOKEN_LIMIT", 8191))
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", 2048))
+        self.embedding_batch_token_limit = int(
+            os.getenv("EMBEDDING_BATCH_TOKEN_LIMIT", 250000)
+        )
+        self.use_embedding_cache = os.getenv("USE_EMBEDDING_CACHE", "False") == "True"
+        self.embedding_cache_path = os.getenv(
+            "EMBEDDING_CACHE_PATH", "data/embedding_cache"
+        )
+        self.embedding_cache_dtype = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+        if self.embedding_cache_dtype not in EMBEDDING_CACHE_DTYPES:
+            raise ValueError(
+                f"Invalid EMBEDDING_CACHE_DTYPE {self.embedding_cache_dtype}, "
+                f"use one of {', '.join(EMBEDDING_CACHE_DTYPES)}"
+            )
+        self.embedding_cache_max_entries = int(
+            os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 100000)
+        )
+        self.embedding_cache_memory_entries = int(
+            os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", 1024)
+        )
         self.browse_chunk_max_length = int(os.getenv("BROWSE_CHUNK_MAX_LENGTH", 3000))
         self.browse_spacy_language_model = os.getenv(
             "BROWSE_SPACY_LANGUAGE_MODEL", "en_core_web_sm"
         )
+        self.browse_spacy_sentencizer_only = (
+            os.getenv("BROWSE_SPACY_SENTENCIZER_ONLY", "False") == "True"
+        )
+        self.browse_summary_concurrency = int(
+            os.getenv("BROWSE_SUMMARY_CONCURRENCY", 1)
+        )
+        self.browse_summary_fan_out = int(os.getenv("BROWSE_SUMMARY_FAN_OUT", 8))
 
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.temperature = float(os.getenv("TEMPERATURE", "0"))
@@ -79,6 +130,8 @@ class Config(metaclass=Singleton):
 
         self.pinecone_api_key = os.getenv("PINECONE_API_KEY")
         self.pinecone_region = os.getenv("PINECONE_ENV")
+        self.pinecone_batch_size = int(os.getenv("PINECONE_BATCH_SIZE", 100))
+        self.pinecone_pool_threads = int(os.getenv("PINECONE_POOL_THREADS", 4))
 
         self.weaviate_host = os.getenv("WEAVIATE_HOST")
         self.weaviate_port = os.getenv("WEAVIATE_PORT")
@@ -91,6 +144,9 @@ class Config(metaclass=Singleton):
         self.use_weaviate_embedded = (
             os.getenv("USE_WEAVIATE_EMBEDDED", "False") == "True"
         )
+        self.weaviate_batch_size = int(os.getenv("WEAVIATE_BATCH_SIZE", 100))
+        self.weaviate_batch_workers = int(os.getenv("WEAVIATE_BATCH_WORKERS", 2))
+        self.weaviate_timeout = float(os.getenv("WEAVIATE_TIMEOUT", 60))
 
         # milvus or zilliz cloud configuration.
         self.milvus_addr = os.getenv("MILVUS_ADDR", "localhost:19530")
@@ -123,15 +179,31 @@ class Config(metaclass=Singleton):
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_4) AppleWebKit/537.36"
             " (KHTML, like Gecko) Chrome/83.0.4103.97 Safari/537.36",
         )
+        self.http_pool_connections = int(os.getenv("HTTP_POOL_CONNECTIONS", 10))
+        self.http_pool_maxsize = int(os.getenv("HTTP_POOL_MAXSIZE", 10))
+        self.http_timeout = float(os.getenv("HTTP_TIMEOUT", 30))
+        self.http_max_retries = int(os.getenv("HTTP_MAX_RETRIES", 3))
+        self.http_keep_alive = os.getenv("HTTP_KEEP_ALIVE", "True") == "True"
 
         self.redis_host = os.getenv("REDIS_HOST", "localhost")
         self.redis_port = os.getenv("REDIS_PORT", "6379")
         self.redis_password = os.getenv("REDIS_PASSWORD", "")
         self.wipe_redis_on_start = os.getenv("WIPE_REDIS_ON_START", "True") == "True"
+        self.redis_max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", 10))
+        self.redis_pipeline_size = int(os.getenv("REDIS_PIPELINE_SIZE", 500))
         self.memory_index = os.getenv("MEMORY_INDEX", "auto-gpt")
         # Note that indexes must be created on db 0 in redis, this is not configurable.
 
         self.memory_backend = os.getenv("MEMORY_BACKEND", "local")
+        self.local_cache_dtype = os.getenv("LOCAL_CACHE_DTYPE", "float32")
+        self.local_cache_index = os.getenv("LOCAL_CACHE_INDEX", "flat")
+        self.local_cache_ivf_lists = int(os.getenv("LOCAL_CACHE_IVF_LISTS", 0))
+        self.local_cache_ivf_probes = int(os.getenv("LOCAL_CACHE_IVF_PROBES", 8))
+        self.local_cache_ivf_min_rows = int(
+            os.getenv("LOCAL_CACHE_IVF_MIN_ROWS", 10000)
+        )
+        self.summary_batch_tokens = int(os.getenv("SUMMARY_BATCH_TOKENS", 500))
+        self.summary_batch_max_cycles = int(os.getenv("SUMMARY_BATCH_MAX_CYCLES", 3))
 
         self.plugins_dir = os.getenv("PLUGINS_DIR", "plugins")
         self.plugins: List[AutoGPTPluginTemplate] = []
@@ -219,6 +291,14 @@ class Config(metaclass=Singleton):
         """Set the smart token limit value."""
         self.smart_token_limit = value
 
+    def set_stream_chat_completions(self, value: bool) -> None:
+        """Set whether the agent streams its replies."""
+        self.stream_chat_completions = value
+
+    def set_use_response_cache(self, value: bool) -> None:
+        """Set whether temperature 0 chat completions are cached."""
+        self.use_response_cache = value
+
     def set_embedding_model(self, value: str) -> None:
         """Set the model to use for creating embeddings."""
         self.embedding_model = value
@@ -231,10 +311,26 @@ class Config(metaclass=Singleton):
         """Set the token limit for creating embeddings."""
         self.embedding_token_limit = value
 
+    def set_embedding_batch_size(self, value: int) -> None:
+        """Set the maximum number of inputs per embedding request."""
+        self.embedding_batch_size = value
+
+    def set_embedding_batch_token_limit(self, value: int) -> None:
+        """Set the maximum number of tokens per embedding request."""
+        self.embedding_batch_token_limit = value
+
     def set_browse_chunk_max_length(self, value: int) -> None:
         """Set the browse_website command chunk max length value."""
         self.browse_chunk_max_length = value
 
+    def set_browse_summary_concurrency(self, value: int) -> None:
+        """Set the number of browse_website chunks to summarize concurrently."""
+        self.browse_summary_concurrency = value
+
+    def set_browse_summary_fan_out(self, value: int) -> None:
+        """Set the number of chunk summaries combined by one summarization call."""
+        self.browse_summary_fan_out = value
+
     def set_openai_api_key(self, value: str) -> None:
         """Set the OpenAI API key value."""
         self.openai_api_key = value
@@ -283,6 +379,25 @@ class Config(metaclass=Singleton):
         """Set the memory backend name."""
         self.memory_backend = name
 
+    def set_llm_route(self, task: str, objective: str, models: List[str]) -> None:
+        """Set the route of a task class of auxiliary LLM calls."""
+        self.llm_routes[task] = (objective, models)
+
+
+def parse_llm_routes(value: str) -> Dict[str, Tuple[str, List[str]]]:
+    """Parse a routing table of the form "task=objective:model,model;task=..."."""
+    routes = {}
+    for entry in filter(None, (entry.strip() for entry in value.split(";"))):
+        task, _, route = entry.partition("=")
+        objective, _, models = route.partition(":")
+        if objective not in ("cheapest", "fastest") or not models:
+            raise ValueError(f"Invalid LLM route: {entry}")
+        routes[task.strip()] = (
+            objective,
+            [model.strip() for model in models.split(",")],
+        )
+    return routes
+
 
 def check_openai_api_key() -> None:
     """Check if the OpenAI API key is set in config.py or as an environment variable."""
@@ -23,6 +23,8 @@ def create_config(
     browser_name: str,
     allow_downloads: bool,
     skip_news: bool,
+    no_response_cache: bool = False,
+    clear_response_cache: bool = False,
 ) -> None:
     """Updates the config object with the given arguments.
 
@@ -39,6 +41,8 @@ def create_config(
         browser_name (str): The name of the browser to use when using selenium to scrape the web
         allow_downloads (bool): Whether to allow Auto-GPT to download files natively
         skips_news (bool): Whether to suppress the output of latest news on startup
+        no_response_cache (bool): Whether to bypass the LLM response cache
+        clear_response_cache (bool): Whether to remove all cached LLM responses
     """
     CFG.set_debug_mode(False)
     CFG.set_continuous_mode(False)
@@ -132,3 +136,13 @@ def create_config(
 
     if skip_news:
         CFG.skip_news = True
+
+    if no_response_cache:
+        logger.typewriter_log("LLM Response Cache: ", Fore.YELLOW, "DISABLED")
+        CFG.set_use_response_cache(False)
+
+    if clear_response_cache:
+        from autogpt.llm.response_cache import ResponseCache
+
+        logger.typewriter_log("LLM Response Cache: ", Fore.GREEN, "CLEARED")
+        ResponseCache().clear()
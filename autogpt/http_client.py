@@ -0,0 +1,170 @@
+"""A pooled, keep-alive HTTP transport shared by all outgoing requests."""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict
+from urllib.parse import urlparse
+
+import openai
+import requests
+from openai import api_requestor
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util import Retry
+
+from autogpt.config import Config
+from autogpt.singleton import Singleton
+
+
+@dataclass
+class HostStats:
+    """Connection reuse statistics of one host"""
+
+    requests: int = 0
+    new_connections: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """The fraction of requests that were sent over an existing connection"""
+        if not self.requests:
+            return 0.0
+        return max(0, self.requests - self.new_connections) / self.requests
+
+
+# The number of connections each thread has opened, including reconnects of pooled
+# connections that the server closed
+_connects = threading.local()
+
+
+def _count_connect() -> None:
+    _connects.count = getattr(_connects, "count", 0) + 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        super().connect()
+        _count_connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        super().connect()
+        _count_connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter that counts, per host, how many requests needed a new
+    connection (and so a new TCP and TLS handshake)."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.host_stats: Dict[str, HostStats] = {}
+        self._stats_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        connects_before = getattr(_connects, "count", 0)
+        response = super().send(request, **kwargs)
+        new_connections = getattr(_connects, "count", 0) - connects_before
+
+        host = urlparse(request.url).netloc
+        with self._stats_lock:
+            stats = self.host_stats.setdefault(host, HostStats())
+            stats.requests += 1
+            stats.new_connections += new_connections
+        return response
+
+
+class HttpClient(metaclass=Singleton):
+    """
+    Sends HTTP requests over one pool of keep-alive connections per host.
+
+    The pool sizes, timeout, retries and keep-alive behaviour are configured with
+    the HTTP_* settings. Sessions made with new_session share the same pools, so
+    components that need their own session state (e.g. auth or headers) still
+    reuse connections.
+    """
+
+    def __init__(self) -> None:
+        cfg = Config()
+        self.timeout = cfg.http_timeout
+        self.keep_alive = cfg.http_keep_alive
+        self.adapter = PooledHTTPAdapter(
+            pool_connections=cfg.http_pool_connections,
+            pool_maxsize=cfg.http_pool_maxsize,
+            max_retries=Retry(
+                total=cfg.http_max_retries,
+                backoff_factor=0.5,
+                # Like urllib3 does by default, server errors are only retried for
+                # idempotent methods, so POSTs to the OpenAI API are not resent
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        self.session = self.new_session()
+        self.session.headers.update({"User-Agent": cfg.user_agent})
+
+    def new_session(self) -> requests.Session:
+        """Creates a session that sends its requests through the shared pools."""
+        session = requests.Session()
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Sends a request with the shared session and the configured timeout."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get_host_stats(self) -> Dict[str, HostStats]:
+        """
+        Get the connection reuse statistics of every host requests were sent to.
+
+        Returns:
+            dict: The statistics of each host, keyed by "host[:port]".
+        """
+        with self.adapter._stats_lock:
+            return {
+                host: HostStats(stats.requests, stats.new_connections)
+                for host, stats in self.adapter.host_stats.items()
+            }
+
+
+def install_openai_transport() -> None:
+    """Make the openai library send its requests through the shared pools.
+
+    openai 0.27 creates a session per thread with its private _make_session; each
+    of those sessions now mounts the shared adapter instead of its own."""
+
+    def _make_session() -> requests.Session:
+        session = HttpClient().new_session()
+        proxies = api_requestor._requests_proxies_arg(openai.proxy)
+        if proxies:
+            session.proxies = proxies
+        return session
+
+    api_requestor._make_session = _make_session
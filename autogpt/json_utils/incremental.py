@@ -0,0 +1,122 @@
+"""Incremental parsing of a JSON reply that arrives in pieces."""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+JsonPath = Tuple[str, ...]
+
+
+@dataclass
+class _Container:
+    is_object: bool
+    start: int
+    path: JsonPath
+    key: Optional[str] = None
+    expect_key: bool = True
+
+
+class IncrementalJsonParser:
+    """
+    Scans a JSON object as it is being received, and reports each value as soon as
+    it is complete.
+
+    Values are reported as (path, value) pairs, where the path holds the keys that
+    lead to the value, e.g. ("thoughts", "text") or ("command",); elements of an
+    array have the path of the array followed by "[]". Only string, object and
+    array values up to max_depth keys deep are reported, and the top level object
+    itself is reported with the path (). Text before the first "{", such as an
+    LLM's preamble, is skipped.
+
+    Values that are not valid JSON on their own are not reported; the complete
+    reply can still be repaired afterwards with fix_json_using_multiple_techniques.
+    """
+
+    def __init__(self, max_depth: int = 2) -> None:
+        self.max_depth = max_depth
+        self.buffer = ""
+        self.done = False
+        self._position = 0
+        self._stack: List[_Container] = []
+        self._string_start: Optional[int] = None
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Tuple[JsonPath, Any]]:
+        """
+        Add the next piece of the reply.
+
+        Args:
+            text (str): The text received since the previous call.
+
+        Returns:
+            list: The (path, value) pairs completed by this piece, in order.
+        """
+        self.buffer += text
+        completed = []
+        while self._position < len(self.buffer) and not self.done:
+            value = self._scan(self.buffer[self._position])
+            if value is not None:
+                completed.append(value)
+            self._position += 1
+        return completed
+
+    def _scan(self, char: str) -> Optional[Tuple[JsonPath, Any]]:
+        position = self._position
+        if self._string_start is not None:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                start, self._string_start = self._string_start, None
+                return self._on_string(start, position)
+            return None
+
+        if not self._stack:
+            if char == "{":
+                self._stack.append(_Container(True, position, ()))
+            return None
+
+        container = self._stack[-1]
+        if char == '"':
+            self._string_start = position
+        elif char in "{[":
+            self._stack.append(
+                _Container(char == "{", position, self._value_path(container))
+            )
+        elif char in "}]":
+            self._stack.pop()
+            if not self._stack:
+                self.done = True
+            return self._complete(container.path, container.start, position)
+        elif char == ":":
+            container.expect_key = False
+        elif char == ",":
+            container.expect_key = container.is_object
+        return None
+
+    def _value_path(self, container: _Container) -> JsonPath:
+        if container.is_object:
+            return container.path + (container.key or "",)
+        return container.path + ("[]",)
+
+    def _on_string(self, start: int, end: int) -> Optional[Tuple[JsonPath, Any]]:
+        container = self._stack[-1]
+        if container.is_object and container.expect_key:
+            try:
+                container.key = json.loads(self.buffer[start : end + 1])
+            except json.JSONDecodeError:
+                container.key = self.buffer[start + 1 : end]
+            return None
+        return self._complete(self._value_path(container), start, end)
+
+    def _complete(
+        self, path: JsonPath, start: int, end: int
+    ) -> Optional[Tuple[JsonPath, Any]]:
+        if len(path) > self.max_depth:
+            return None
+        try:
+            return path, json.loads(self.buffer[start : end + 1])
+        except json.JSONDecodeError:
+            return None
@@ -9,11 +9,15 @@ from autogpt.llm.base import (
     ModelInfo,
 )
 from autogpt.llm.chat import chat_with_ai, create_chat_message, generate_context
+from autogpt.llm.context_window import ContextWindow
 from autogpt.llm.llm_utils import (
+    acreate_chat_completion,
+    aget_ada_embedding,
     call_ai_function,
     chunked_tokens,
     create_chat_completion,
     get_ada_embedding,
+    get_ada_embeddings,
 )
 from autogpt.llm.modelsinfo import COSTS
 from autogpt.llm.token_counter import count_message_tokens, count_string_tokens
@@ -27,12 +31,16 @@ __all__ = [
     "LLMResponse",
     "ChatModelResponse",
     "EmbeddingModelResponse",
+    "ContextWindow",
     "create_chat_message",
     "generate_context",
     "chat_with_ai",
     "call_ai_function",
     "create_chat_completion",
+    "acreate_chat_completion",
     "get_ada_embedding",
+    "aget_ada_embedding",
+    "get_ada_embeddings",
     "chunked_tokens",
     "COSTS",
     "count_message_tokens",
@@ -1,25 +1,111 @@
 from __future__ import annotations
 
+import threading
+import time
+from typing import Iterator
+
 import openai
+import requests
+from openai.error import RateLimitError, ServiceUnavailableError
+from openai.util import convert_to_openai_object
 
 from autogpt.config import Config
 from autogpt.llm.modelsinfo import COSTS
+from autogpt.llm.rate_limiter import RateLimiter, estimate_chat_tokens
+from autogpt.llm.router import ModelRouter
+from autogpt.llm.token_counter import count_message_tokens, count_string_tokens
 from autogpt.logs import logger
 from autogpt.singleton import Singleton
 
 
+def _deployment_kwargs(deployment_id) -> dict:
+    """Azure deployments are addressed by id; other calls must not pass one."""
+    return {} if deployment_id is None else {"deployment_id": deployment_id}
+
+
+class ChatCompletionStream:
+    """
+    Iterates over the content deltas of a streamed chat completion.
+
+    Streamed responses carry no usage, so once the stream is exhausted the tokens
+    are counted locally, the cost is updated, and the whole reply is made available
+    as a regular chat completion response.
+
+    Attributes:
+        response: The complete response, or None until the stream is exhausted.
+    """
+
+    def __init__(self, chunks, messages: list, model: str, start: float) -> None:
+        self._chunks = chunks
+        self.messages = messages
+        self.model = model
+        self.start = start
+        self.response = None
+
+    def __iter__(self) -> Iterator[str]:
+        deltas = []
+        try:
+            for chunk in self._chunks:
+                delta = chunk.choices[0].delta.get("content")
+                if delta:
+                    deltas.append(delta)
+                    yield delta
+        except requests.exceptions.RequestException as e:
+            # The transport can't retry a connection that dropped mid-stream
+            raise ServiceUnavailableError(f"The stream was interrupted: {e}") from e
+        ModelRouter().record_latency(self.model, time.monotonic() - self.start)
+        content = "".join(deltas)
+        prompt_tokens = count_message_tokens(self.messages, self.model)
+        completion_tokens = count_string_tokens(content, self.model)
+        ApiManager().update_cost(prompt_tokens, completion_tokens, self.model)
+        self.response = convert_to_openai_object(
+            {
+                "model": self.model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        )
+
+
 class ApiManager(metaclass=Singleton):
     def __init__(self):
+        # Guards the counters, which may be updated from several threads at once
+        self._lock = threading.Lock()
         self.total_prompt_tokens = 0
         self.total_completion_tokens = 0
         self.total_cost = 0
         self.total_budget = 0
+        self.embedding_cache_hits = 0
+        self.embedding_cache_misses = 0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+        self.saved_cost = 0
+        self.skipped_summary_updates = 0
+        self.skipped_memory_adds = 0
 
     def reset(self):
-        self.total_prompt_tokens = 0
-        self.total_completion_tokens = 0
-        self.total_cost = 0
-        self.total_budget = 0.0
+        with self._lock:
+            self.total_prompt_tokens = 0
+            self.total_completion_tokens = 0
+            self.total_cost = 0
+            self.total_budget = 0.0
+            self.embedding_cache_hits = 0
+            self.embedding_cache_misses = 0
+            self.saved_prompt_tokens = 0
+            self.saved_completion_tokens = 0
+            self.saved_cost = 0
+            self.skipped_summary_updates = 0
+            self.skipped_memory_adds = 0
 
     def create_chat_completion(
         self,
@@ -28,37 +114,92 @@ class ApiManager(metaclass=Singleton):
         temperature: float = None,
         max_tokens: int | None = None,
         deployment_id=None,
+        stream: bool = False,
     ) -> str:
         """
         Create a chat completion and update the cost.
+        Waits for the rate limiter before sending the request, and tells it about
+        rate limit errors. The time the request takes is recorded as the latency of
+        the model in the ModelRouter.
         Args:
         messages (list): The list of messages to send to the API.
         model (str): The model to use for the API call.
         temperature (float): The temperature to use for the API call.
         max_tokens (int): The maximum number of tokens for the API call.
+        stream (bool): Whether to stream the reply. The cost of a streamed reply is
+        updated once the stream is exhausted.
         Returns:
-        str: The AI's response.
+        str: The AI's response, or a ChatCompletionStream of its deltas.
         """
         cfg = Config()
         if temperature is None:
             temperature = cfg.temperature
-        if deployment_id is not None:
+        rate_limiter = RateLimiter()
+        rate_limiter.acquire(model, estimate_chat_tokens(messages, max_tokens))
+        # Only the request is timed, not the wait for the rate limiter
+        start = time.monotonic()
+        try:
             response = openai.ChatCompletion.create(
-                deployment_id=deployment_id,
+                **_deployment_kwargs(deployment_id),
                 model=model,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
                 api_key=cfg.openai_api_key,
+                **({"stream": True} if stream else {}),
             )
-        else:
-            response = openai.ChatCompletion.create(
+        except RateLimitError as e:
+            rate_limiter.on_rate_limit(model, e)
+            raise
+        if stream:
+            return ChatCompletionStream(response, messages, model, start)
+        ModelRouter().record_latency(model, time.monotonic() - start)
+        logger.debug(f"Response: {response}")
+        prompt_tokens = response.usage.prompt_tokens
+        completion_tokens = response.usage.completion_tokens
+        self.update_cost(prompt_tokens, completion_tokens, model)
+        return response
+
+    async def acreate_chat_completion(
+        self,
+        messages: list,  # type: ignore
+        model: str | None = None,
+        temperature: float = None,
+        max_tokens: int | None = None,
+        deployment_id=None,
+    ) -> str:
+        """
+        Create a chat completion without blocking the event loop and update the cost.
+        Waits for the rate limiter before sending the request, and tells it about
+        rate limit errors. The time the request takes is recorded as the latency of
+        the model in the ModelRouter.
+        Args:
+        messages (list): The list of messages to send to the API.
+        model (str): The model to use for the API call.
+        temperature (float): The temperature to use for the API call.
+        max_tokens (int): The maximum number of tokens for the API call.
+        Returns:
+        str: The AI's response.
+        """
+        cfg = Config()
+        if temperature is None:
+            temperature = cfg.temperature
+        rate_limiter = RateLimiter()
+        await rate_limiter.aacquire(model, estimate_chat_tokens(messages, max_tokens))
+        start = time.monotonic()
+        try:
+            response = await openai.ChatCompletion.acreate(
+                **_deployment_kwargs(deployment_id),
                 model=model,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
                 api_key=cfg.openai_api_key,
             )
+        except RateLimitError as e:
+            rate_limiter.on_rate_limit(model, e)
+            raise
+        ModelRouter().record_latency(model, time.monotonic() - start)
         logger.debug(f"Response: {response}")
         prompt_tokens = response.usage.prompt_tokens
         completion_tokens = response.usage.completion_tokens
@@ -74,13 +215,15 @@ class ApiManager(metaclass=Singleton):
         completion_tokens (int): The number of tokens used in the completion.
         model (str): The model used for the API call.
         """
-        self.total_prompt_tokens += prompt_tokens
-        self.total_completion_tokens += completion_tokens
-        self.total_cost += (
-            prompt_tokens * COSTS[model]["prompt"]
-            + completion_tokens * COSTS[model]["completion"]
-        ) / 1000
-        logger.debug(f"Total running cost: ${self.total_cost:.3f}")
+        with self._lock:
+            self.total_prompt_tokens += prompt_tokens
+            self.total_completion_tokens += completion_tokens
+            self.total_cost += (
+                prompt_tokens * COSTS[model]["prompt"]
+                + completion_tokens * COSTS[model]["completion"]
+            ) / 1000
+            total_cost = self.total_cost
+        logger.debug(f"Total running cost: ${total_cost:.3f}")
 
     def set_total_budget(self, total_budget):
         """
@@ -89,7 +232,8 @@ class ApiManager(metaclass=Singleton):
         Args:
         total_budget (float): The total budget for API calls.
         """
-        self.total_budget = total_budget
+        with self._lock:
+            self.total_budget = total_budget
 
     def get_total_prompt_tokens(self):
         """
@@ -126,3 +270,124 @@ class ApiManager(metaclass=Singleton):
         float: The total budget for API calls.
         """
         return self.total_budget
+
+    def update_embedding_cache_stats(self, hits: int, misses: int):
+        """
+        Update the number of embedding cache hits and misses.
+
+        Args:
+        hits (int): The number of embeddings found in the cache.
+        misses (int): The number of embeddings that had to be requested.
+        """
+        with self._lock:
+            self.embedding_cache_hits += hits
+            self.embedding_cache_misses += misses
+
+    def get_embedding_cache_hits(self):
+        """
+        Get the number of embeddings served from the embedding cache.
+
+        Returns:
+        int: The number of embedding cache hits.
+        """
+        return self.embedding_cache_hits
+
+    def get_embedding_cache_misses(self):
+        """
+        Get the number of embeddings that were not in the embedding cache.
+
+        Returns:
+        int: The number of embedding cache misses.
+        """
+        return self.embedding_cache_misses
+
+    def update_saved_cost(self, prompt_tokens, completion_tokens, model):
+        """
+        Record the tokens and cost of a chat completion that was not sent to the
+        API, because it was served from the response cache or skipped.
+
+        Args:
+        prompt_tokens (int): The number of prompt tokens the call would have used.
+        completion_tokens (int): The number of completion tokens the call would
+        have used.
+        model (str): The model of the call.
+        """
+        with self._lock:
+            self.saved_prompt_tokens += prompt_tokens
+            self.saved_completion_tokens += completion_tokens
+            self.saved_cost += (
+                prompt_tokens * COSTS[model]["prompt"]
+                + completion_tokens * COSTS[model]["completion"]
+            ) / 1000
+            saved_cost = self.saved_cost
+        logger.debug(f"Total saved: ${saved_cost:.3f}")
+
+    def get_saved_prompt_tokens(self):
+        """
+        Get the number of prompt tokens of the calls that were not sent to the API.
+
+        Returns:
+        int: The number of saved prompt tokens.
+        """
+        return self.saved_prompt_tokens
+
+    def get_saved_completion_tokens(self):
+        """
+        Get the number of completion tokens of the calls that were not sent to the API.
+
+        Returns:
+        int: The number of saved completion tokens.
+        """
+        return self.saved_completion_tokens
+
+    def get_saved_cost(self):
+        """
+        Get the cost of the calls that were not sent to the API.
+
+        Returns:
+        float: The saved cost.
+        """
+        return self.saved_cost
+
+    def update_skipped_summary_updates(self, prompt_tokens, completion_tokens, model):
+        """
+        Record a running summary update that was skipped, because there was nothing
+        new to summarize or its messages were batched with those of later cycles.
+
+        Args:
+        prompt_tokens (int): The estimated prompt tokens of the skipped update.
+        completion_tokens (int): The estimated completion tokens of the skipped update.
+        model (str): The model the update would have used.
+        """
+        with self._lock:
+            self.skipped_summary_updates += 1
+        self.update_saved_cost(prompt_tokens, completion_tokens, model)
+
+    def get_skipped_summary_updates(self):
+        """
+        Get the number of running summary updates that were skipped.
+
+        Returns:
+        int: The number of skipped summary updates.
+        """
+        return self.skipped_summary_updates
+
+    def update_skipped_memory_adds(self, count: int):
+        """
+        Record texts that were not added to memory, because they were stored
+        already, so that they were neither embedded nor stored again.
+
+        Args:
+        count (int): The number of skipped texts.
+        """
+        with self._lock:
+            self.skipped_memory_adds += count
+
+    def get_skipped_memory_adds(self):
+        """
+        Get the number of texts that were not added to memory again.
+
+        Returns:
+        int: The number of skipped memory adds.
+        """
+        return self.skipped_memory_adds
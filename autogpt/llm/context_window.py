@@ -0,0 +1,102 @@
+"""The rolling window of recent messages that is sent to the LLM each cycle."""
+from __future__ import annotations
+
+from typing import List
+
+from autogpt.llm.base import Message
+from autogpt.llm.token_counter import count_message_tokens
+
+
+class ContextWindow:
+    """
+    Keeps the most recent messages of a message history together with their token
+    counts, so that building the context for a cycle does not re-walk or re-count
+    the whole history.
+
+    Messages are counted once when they enter the window. Trimming drops messages
+    from the oldest end, and returns those that were not dropped before, so they
+    can be summarized. Dropped messages are kept, and come back into the window
+    when a later budget has room for them again.
+
+    Attributes:
+        model: The model the token counts are computed for.
+        total_tokens: The sum of the token counts of all messages in the window.
+    """
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self.total_tokens = 0
+        self._messages: List[Message] = []
+        self._token_counts: List[int] = []
+        # The window holds the messages from _start on. Those before _returned
+        # were returned by trim already.
+        self._start = 0
+        self._returned = 0
+
+    def append(self, message: Message) -> None:
+        """
+        Add a message to the newest end of the window.
+
+        Args:
+            message (Message): The message to add.
+        """
+        tokens = count_message_tokens([message], self.model)
+        self._messages.append(message)
+        self._token_counts.append(tokens)
+        self.total_tokens += tokens
+
+    def sync(self, full_message_history: List[Message]) -> None:
+        """
+        Append the messages that were added to the message history since the last
+        sync.
+
+        Args:
+            full_message_history (list): The full message history, which is only
+                ever appended to.
+        """
+        if len(full_message_history) < len(self._messages):
+            # The history was replaced; start over from its current contents
+            self.clear()
+        for message in full_message_history[len(self._messages) :]:
+            self.append(message)
+
+    def trim(self, token_budget: int) -> List[Message]:
+        """
+        Fit the window in the given token budget: bring dropped messages back,
+        newest first, while they fit, then drop the oldest messages until the
+        window fits.
+
+        Args:
+            token_budget (int): The maximum number of tokens the window may use.
+
+        Returns:
+            list: The messages that were dropped for the first time, oldest first.
+        """
+        while (
+            self._start > 0
+            and self.total_tokens + self._token_counts[self._start - 1] <= token_budget
+        ):
+            self._start -= 1
+            self.total_tokens += self._token_counts[self._start]
+        while self._start < len(self._messages) and self.total_tokens > token_budget:
+            self.total_tokens -= self._token_counts[self._start]
+            self._start += 1
+        trimmed = self._messages[self._returned : self._start]
+        self._returned = max(self._returned, self._start)
+        return trimmed
+
+    def clear(self) -> None:
+        """Empty the window."""
+        self._messages.clear()
+        self._token_counts.clear()
+        self.total_tokens = 0
+        self._start = 0
+        self._returned = 0
+
+    @property
+    def messages(self) -> List[Message]:
+        """The messages in the window, oldest first."""
+        return self._messages[self._start :]
+
+    def __len__(self) -> int:
+        return len(self._messages) - self._start
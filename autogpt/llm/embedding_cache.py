@@ -0,0 +1,201 @@
+"""A persistent, content-addressed cache of embeddings."""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from autogpt.config import Config
+from autogpt.logs import logger
+from autogpt.singleton import Singleton
+
+VECTORS_FILE_NAME = "vectors.bin"
+INDEX_FILE_NAME = "index.bin"
+META_FILE_NAME = "meta.json"
+DIGEST_SIZE = 16
+
+
+def normalize_text(text: str) -> str:
+    """Strips a text and collapses its whitespace, which doesn't change what it says"""
+    return " ".join(text.split())
+
+
+def embedding_cache_key(model: str, text: str) -> bytes:
+    """Returns the key of the embedding of a text, made with the given model."""
+    return hashlib.blake2b(
+        f"{model}\0{normalize_text(text)}".encode("utf-8"), digest_size=DIGEST_SIZE
+    ).digest()
+
+
+class EmbeddingCache(metaclass=Singleton):
+    """
+    Caches embeddings on disk, keyed by a hash of the embedding model and the text.
+
+    The disk layout is a directory with three files:
+        meta.json: The dtype and dimension of the stored vectors.
+        vectors.bin: The vectors, one fixed-size row per entry.
+        index.bin: The key of each row, one DIGEST_SIZE-byte digest per entry.
+
+    New entries are appended to both files. When the cache grows beyond
+    cfg.embedding_cache_max_entries, it is rewritten keeping only the most recently
+    used entries. Recently used vectors are also kept in an in-memory LRU.
+    """
+
+    def __init__(self) -> None:
+        cfg = Config()
+        self.path = Path(cfg.embedding_cache_path)
+        self.dtype = np.dtype(cfg.embedding_cache_dtype)
+        self.max_entries = cfg.embedding_cache_max_entries
+        self.memory_entries = cfg.embedding_cache_memory_entries
+        self.dimension: Optional[int] = None
+
+        self._lock = threading.Lock()
+        # Key -> row in vectors.bin, in least to most recently used order
+        self._rows: OrderedDict[bytes, int] = OrderedDict()
+        self._memory: OrderedDict[bytes, List[float]] = OrderedDict()
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @property
+    def _row_size(self) -> int:
+        return self.dimension * self.dtype.itemsize
+
+    def _load(self) -> None:
+        meta_file = self.path / META_FILE_NAME
+        if not meta_file.exists():
+            self._reset()
+            return
+
+        meta = json.loads(meta_file.read_text())
+        if meta.get("dtype") != self.dtype.name:
+            logger.debug("Embedding cache dtype changed, clearing the cache")
+            self._reset()
+            return
+        self.dimension = meta.get("dimension")
+
+        index = (self.path / INDEX_FILE_NAME).read_bytes()
+        num_rows = len(index) // DIGEST_SIZE
+        if self.dimension:
+            vectors_size = (self.path / VECTORS_FILE_NAME).stat().st_size
+            num_rows = min(num_rows, vectors_size // self._row_size)
+        # Drop entries that a crash left partially written to either file, so that
+        # the next entry is appended at the row it is recorded at
+        self._truncate(INDEX_FILE_NAME, num_rows * DIGEST_SIZE)
+        if self.dimension:
+            self._truncate(VECTORS_FILE_NAME, num_rows * self._row_size)
+        for row in range(num_rows):
+            self._rows[index[row * DIGEST_SIZE : (row + 1) * DIGEST_SIZE]] = row
+
+    def _truncate(self, file_name: str, size: int) -> None:
+        path = self.path / file_name
+        if path.stat().st_size > size:
+            logger.debug(f"Truncating {path} to {size} bytes")
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    def _reset(self) -> None:
+        self.dimension = None
+        self._rows.clear()
+        self._memory.clear()
+        (self.path / VECTORS_FILE_NAME).write_bytes(b"")
+        (self.path / INDEX_FILE_NAME).write_bytes(b"")
+        self._write_meta()
+
+    def _write_meta(self) -> None:
+        (self.path / META_FILE_NAME).write_text(
+            json.dumps({"dtype": self.dtype.name, "dimension": self.dimension})
+        )
+
+    def _remember(self, key: bytes, embedding: List[float]) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Returns the cached embedding of a text, or None if it is not cached.
+
+        Args:
+            model (str): The embedding model.
+            text (str): The text. Texts that only differ in whitespace share a key.
+        """
+        key = embedding_cache_key(model, text)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._rows.move_to_end(key)
+                return self._memory[key]
+
+            row = self._rows.get(key)
+            if row is None:
+                return None
+            with open(self.path / VECTORS_FILE_NAME, "rb") as f:
+                f.seek(row * self._row_size)
+                vector = np.frombuffer(f.read(self._row_size), dtype=self.dtype)
+            embedding = vector.astype(np.float32).tolist()
+            self._rows.move_to_end(key)
+            self._remember(key, embedding)
+            return embedding
+
+    def put(self, model: str, text: str, embedding: List[float]) -> None:
+        """
+        Adds the embedding of a text to the cache.
+
+        Args:
+            model (str): The embedding model.
+            text (str): The text, exactly as it is sent to the embedding model.
+            embedding (List[float]): The embedding of the text.
+        """
+        key = embedding_cache_key(model, text)
+        with self._lock:
+            if key in self._rows:
+                return
+            if self.dimension is None:
+                self.dimension = len(embedding)
+                self._write_meta()
+            elif len(embedding) != self.dimension:
+                logger.debug("Embedding dimension changed, clearing the cache")
+                self._reset()
+                self.dimension = len(embedding)
+                self._write_meta()
+
+            vector = np.asarray(embedding, dtype=self.dtype)
+            with open(self.path / VECTORS_FILE_NAME, "ab") as f:
+                f.write(vector.tobytes())
+            with open(self.path / INDEX_FILE_NAME, "ab") as f:
+                f.write(key)
+            self._rows[key] = len(self._rows)
+            self._remember(key, embedding)
+
+            if len(self._rows) > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Rewrite the cache, keeping the most recently used 3/4 of max_entries."""
+        keep = list(self._rows.items())[-max(1, self.max_entries * 3 // 4) :]
+        vectors = []
+        with open(self.path / VECTORS_FILE_NAME, "rb") as f:
+            for _, row in keep:
+                f.seek(row * self._row_size)
+                vectors.append(f.read(self._row_size))
+        (self.path / VECTORS_FILE_NAME).write_bytes(b"".join(vectors))
+        (self.path / INDEX_FILE_NAME).write_bytes(b"".join(key for key, _ in keep))
+        self._rows = OrderedDict((key, row) for row, (key, _) in enumerate(keep))
+        for key in list(self._memory):
+            if key not in self._rows:
+                del self._memory[key]
+
+    def clear(self) -> None:
+        """Removes all entries from the cache."""
+        with self._lock:
+            self._reset()
+
+    def __len__(self) -> int:
+        return len(self._rows)
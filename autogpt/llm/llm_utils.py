@@ -1,19 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import functools
-import time
+import inspect
 from itertools import islice
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 import numpy as np
 import openai
 import tiktoken
-from colorama import Fore, Style
-from openai.error import APIError, RateLimitError, Timeout
+from colorama import Fore
+from openai.error import RateLimitError
 
 from autogpt.config import Config
 from autogpt.llm.api_manager import ApiManager
 from autogpt.llm.base import Message
+from autogpt.llm.embedding_cache import EmbeddingCache
+from autogpt.llm.rate_limiter import RateLimiter
+from autogpt.llm.response_cache import ResponseCache
+from autogpt.llm.retry import CircuitOpenError, RetryEngine, RetryPolicy, is_retryable
+from autogpt.llm.router import ModelRouter
 from autogpt.logs import logger
 
 
@@ -21,49 +27,45 @@ def retry_openai_api(
     num_retries: int = 10,
     backoff_base: float = 2.0,
     warn_user: bool = True,
+    endpoint: str = "default",
+    rate_limited: bool = True,
 ):
     """Retry an OpenAI API call.
 
+    The calls are run by the RetryEngine, which backs off with jitter, gives up at
+    the configured deadlines and stops calling an endpoint that keeps failing.
+
     Args:
         num_retries int: Number of retries. Defaults to 10.
         backoff_base float: Base for exponential backoff. Defaults to 2.
         warn_user bool: Whether to warn the user. Defaults to True.
+        endpoint str: The endpoint the call is counted under by the RetryEngine.
+        rate_limited bool: Whether the call waits for the RateLimiter, so that
+            rate limit errors are retried without backing off. Defaults to True.
     """
-    retry_limit_msg = f"{Fore.RED}Error: " f"Reached rate limit, passing...{Fore.RESET}"
-    api_key_error_msg = (
-        f"Please double check that you have setup a "
-        f"{Fore.CYAN + Style.BRIGHT}PAID{Style.RESET_ALL} OpenAI API Account. You can "
-        f"read more here: {Fore.CYAN}https://docs.agpt.co/setup/#getting-an-api-key{Fore.RESET}"
-    )
-    backoff_msg = (
-        f"{Fore.RED}Error: API Bad gateway. Waiting {{backoff}} seconds...{Fore.RESET}"
-    )
 
     def _wrapper(func):
-        @functools.wraps(func)
-        def _wrapped(*args, **kwargs):
-            user_warned = not warn_user
-            num_attempts = num_retries + 1  # +1 for the first attempt
-            for attempt in range(1, num_attempts + 1):
-                try:
-                    return func(*args, **kwargs)
+        def _policy() -> RetryPolicy:
+            return RetryPolicy.from_config(
+                num_retries=num_retries,
+                backoff_base=backoff_base,
+                warn_user=warn_user,
+                rate_limited=rate_limited,
+            )
 
-                except RateLimitError:
-                    if attempt == num_attempts:
-                        raise
+        if inspect.iscoroutinefunction(func):
 
-                    logger.debug(retry_limit_msg)
-                    if not user_warned:
-                        logger.double_check(api_key_error_msg)
-                        user_warned = True
+            @functools.wraps(func)
+            async def _async_wrapped(*args, **kwargs):
+                return await RetryEngine().acall(
+                    endpoint, _policy(), func, *args, **kwargs
+                )
 
-                except APIError as e:
-                    if (e.http_status != 502) or (attempt == num_attempts):
-                        raise
+            return _async_wrapped
 
-                backoff = backoff_base ** (attempt + 2)
-                logger.debug(backoff_msg.format(backoff=backoff))
-                time.sleep(backoff)
+        @functools.wraps(func)
+        def _wrapped(*args, **kwargs):
+            return RetryEngine().call(endpoint, _policy(), func, *args, **kwargs)
 
         return _wrapped
 
@@ -71,7 +73,11 @@ def retry_openai_api(
 
 
 def call_ai_function(
-    function: str, args: list, description: str, model: str | None = None
+    function: str,
+    args: list,
+    description: str,
+    model: str | None = None,
+    task: str = "analyze",
 ) -> str:
     """Call an AI function
 
@@ -82,14 +88,14 @@ def call_ai_function(
         function (str): The function to call
         args (list): The arguments to pass to the function
         description (str): The description of the function
-        model (str, optional): The model to use. Defaults to None.
+        model (str, optional): The model to use. Defaults to None, which lets the
+            ModelRouter pick one for the task.
+        task (str, optional): The task class the ModelRouter routes the call by.
+            Defaults to "analyze".
 
     Returns:
         str: The response from the function
     """
-    cfg = Config()
-    if model is None:
-        model = cfg.smart_llm_model
     # For each arg, if any are None, convert to "None":
     args = [str(arg) if arg is not None else "None" for arg in args]
     # parse args to comma separated string
@@ -102,38 +108,20 @@ def call_ai_function(
         },
         {"role": "user", "content": args},
     ]
+    if model is None:
+        model = ModelRouter().route(task, messages)
 
     return create_chat_completion(model=model, messages=messages, temperature=0)
 
 
-# Overly simple abstraction until we create something better
-# simple retry mechanism when getting a rate error or a bad gateway
-def create_chat_completion(
-    messages: List[Message],  # type: ignore
-    model: Optional[str] = None,
-    temperature: float = None,
-    max_tokens: Optional[int] = None,
-) -> str:
-    """Create a chat completion using the OpenAI API
-
-    Args:
-        messages (List[Message]): The messages to send to the chat completion
-        model (str, optional): The model to use. Defaults to None.
-        temperature (float, optional): The temperature to use. Defaults to 0.9.
-        max_tokens (int, optional): The max tokens to use. Defaults to None.
-
-    Returns:
-        str: The response from the chat completion
-    """
+def _chat_completion_from_plugins(
+    messages: List[Message],
+    model: Optional[str],
+    temperature: float,
+    max_tokens: Optional[int],
+) -> Optional[str]:
+    """Let the first plugin that handles chat completions answer instead of OpenAI"""
     cfg = Config()
-    if temperature is None:
-        temperature = cfg.temperature
-
-    num_retries = 10
-    warned_user = False
-    logger.debug(
-        f"{Fore.GREEN}Creating chat completion with model {model}, temperature {temperature}, max_tokens {max_tokens}{Fore.RESET}"
-    )
     for plugin in cfg.plugins:
         if plugin.can_handle_chat_completion(
             messages=messages,
@@ -149,47 +137,74 @@ def create_chat_completion(
             )
             if message is not None:
                 return message
-    api_manager = ApiManager()
-    response = None
-    for attempt in range(num_retries):
-        backoff = 2 ** (attempt + 2)
-        try:
-            if cfg.use_azure:
-                response = api_manager.create_chat_completion(
-                    deployment_id=cfg.get_azure_deployment_id_for_model(model),
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                )
-            else:
-                response = api_manager.create_chat_completion(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                )
-            break
-        except RateLimitError:
-            logger.debug(
-                f"{Fore.RED}Error: ", f"Reached rate limit, passing...{Fore.RESET}"
-            )
-            if not warned_user:
-                logger.double_check(
-                    f"Please double check that you have setup a {Fore.CYAN + Style.BRIGHT}PAID{Style.RESET_ALL} OpenAI API Account. "
-                    + f"You can read more here: {Fore.CYAN}https://docs.agpt.co/setup/#getting-an-api-key{Fore.RESET}"
-                )
-                warned_user = True
-        except (APIError, Timeout) as e:
-            if e.http_status != 502:
-                raise
-            if attempt == num_retries - 1:
-                raise
-        logger.debug(
-            f"{Fore.RED}Error: ",
-            f"API Bad gateway. Waiting {backoff} seconds...{Fore.RESET}",
-        )
-        time.sleep(backoff)
+    return None
+
+
+def _chat_completion_kwargs(
+    messages: List[Message],
+    model: Optional[str],
+    temperature: float,
+    max_tokens: Optional[int],
+) -> dict:
+    """Build the arguments for an ApiManager chat completion call"""
+    cfg = Config()
+    kwargs = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if cfg.use_azure:
+        kwargs["deployment_id"] = cfg.get_azure_deployment_id_for_model(model)
+    return kwargs
+
+
+def _chat_completion_from_cache(
+    messages: List[Message],
+    model: Optional[str],
+    temperature: float,
+    max_tokens: Optional[int],
+) -> Optional[str]:
+    """Look up a deterministic chat completion in the response cache
+
+    The usage of a cache hit is recorded in the ApiManager as saved."""
+    cfg = Config()
+    if not cfg.use_response_cache:
+        return None
+    cached = ResponseCache().get(model, temperature, max_tokens, messages)
+    if cached is None:
+        return None
+    logger.debug(f"{Fore.GREEN}Using cached chat completion{Fore.RESET}")
+    ApiManager().update_saved_cost(
+        cached["prompt_tokens"], cached["completion_tokens"], model
+    )
+    return cached["content"]
+
+
+def _cache_chat_completion_response(
+    messages: List[Message],
+    model: Optional[str],
+    temperature: float,
+    max_tokens: Optional[int],
+    response,
+) -> None:
+    cfg = Config()
+    if cfg.use_response_cache and response is not None:
+        ResponseCache().put(model, temperature, max_tokens, messages, response)
+
+
+def _apply_on_response_plugins(resp: str) -> str:
+    cfg = Config()
+    for plugin in cfg.plugins:
+        if not plugin.can_handle_on_response():
+            continue
+        resp = plugin.on_response(resp)
+    return resp
+
+
+def _process_chat_completion_response(response, num_attempts: int) -> str:
+    """Extract the reply from a response and pass it through the plugins"""
+    cfg = Config()
     if response is None:
         logger.typewriter_log(
             "FAILED TO GET RESPONSE FROM OPENAI",
@@ -199,15 +214,153 @@ def create_chat_completion(
         )
         logger.double_check()
         if cfg.debug_mode:
-            raise RuntimeError(f"Failed to get response after {num_retries} retries")
+            raise RuntimeError(f"Failed to get response after {num_attempts} attempts")
         else:
             quit(1)
-    resp = response.choices[0].message["content"]
-    for plugin in cfg.plugins:
-        if not plugin.can_handle_on_response():
-            continue
-        resp = plugin.on_response(resp)
-    return resp
+    return _apply_on_response_plugins(response.choices[0].message["content"])
+
+
+def _chat_completion_policy(num_attempts: int) -> RetryPolicy:
+    """The first attempt is not a retry"""
+    return RetryPolicy.from_config(num_retries=num_attempts - 1, rate_limited=True)
+
+
+def _gave_up_on(error: Exception) -> bool:
+    """Returns whether a chat completion failed because it was retried in vain, in
+    which case there is no response, rather than because of the request."""
+    return is_retryable(error) or isinstance(error, CircuitOpenError)
+
+
+def _streamed_chat_completion(
+    on_delta: Callable[[str], None], on_retry: Optional[Callable[[], None]]
+) -> Callable:
+    """Returns a function that requests a streamed chat completion and passes it to
+    on_delta, so that the RetryEngine also retries streams that fail halfway."""
+    streamed = False
+
+    def _call(**kwargs):
+        nonlocal streamed
+        if streamed and on_retry is not None:
+            on_retry()
+        streamed = False
+        stream = ApiManager().create_chat_completion(**kwargs, stream=True)
+        for delta in stream:
+            streamed = True
+            on_delta(delta)
+        return stream.response
+
+    return _call
+
+
+# Overly simple abstraction until we create something better
+def create_chat_completion(
+    messages: List[Message],  # type: ignore
+    model: Optional[str] = None,
+    temperature: float = None,
+    max_tokens: Optional[int] = None,
+    on_delta: Optional[Callable[[str], None]] = None,
+    on_retry: Optional[Callable[[], None]] = None,
+) -> str:
+    """Create a chat completion using the OpenAI API
+
+    Args:
+        messages (List[Message]): The messages to send to the chat completion
+        model (str, optional): The model to use. Defaults to None.
+        temperature (float, optional): The temperature to use. Defaults to 0.9.
+        max_tokens (int, optional): The max tokens to use. Defaults to None.
+        on_delta (Callable, optional): If given, the reply is streamed and each
+            piece of it is passed to on_delta as it arrives. Replies that don't
+            come from the API are passed in one piece. Defaults to None.
+        on_retry (Callable, optional): Called when a streamed reply failed after
+            some of it was passed to on_delta, before it is requested again, so
+            that those pieces can be discarded. Defaults to None.
+
+    Returns:
+        str: The response from the chat completion
+    """
+    cfg = Config()
+    if temperature is None:
+        temperature = cfg.temperature
+
+    num_attempts = 10
+    logger.debug(
+        f"{Fore.GREEN}Creating chat completion with model {model}, temperature {temperature}, max_tokens {max_tokens}{Fore.RESET}"
+    )
+    message = _chat_completion_from_plugins(messages, model, temperature, max_tokens)
+    if message is None:
+        message = _chat_completion_from_cache(messages, model, temperature, max_tokens)
+        if message is not None:
+            message = _apply_on_response_plugins(message)
+    if message is not None:
+        if on_delta is not None:
+            on_delta(message)
+        return message
+    try:
+        response = RetryEngine().call(
+            "chat",
+            _chat_completion_policy(num_attempts),
+            ApiManager().create_chat_completion
+            if on_delta is None
+            else _streamed_chat_completion(on_delta, on_retry),
+            **_chat_completion_kwargs(messages, model, temperature, max_tokens),
+        )
+    except Exception as e:
+        if not _gave_up_on(e):
+            raise
+        logger.debug(f"{Fore.RED}Error: {e}{Fore.RESET}")
+        response = None
+    _cache_chat_completion_response(messages, model, temperature, max_tokens, response)
+    return _process_chat_completion_response(response, num_attempts)
+
+
+async def acreate_chat_completion(
+    messages: List[Message],  # type: ignore
+    model: Optional[str] = None,
+    temperature: float = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """Create a chat completion using the OpenAI API without blocking the event loop
+
+    Behaves like create_chat_completion, so independent completions can be awaited
+    concurrently, e.g. with asyncio.gather.
+
+    Args:
+        messages (List[Message]): The messages to send to the chat completion
+        model (str, optional): The model to use. Defaults to None.
+        temperature (float, optional): The temperature to use. Defaults to 0.9.
+        max_tokens (int, optional): The max tokens to use. Defaults to None.
+
+    Returns:
+        str: The response from the chat completion
+    """
+    cfg = Config()
+    if temperature is None:
+        temperature = cfg.temperature
+
+    num_attempts = 10
+    logger.debug(
+        f"{Fore.GREEN}Creating async chat completion with model {model}, temperature {temperature}, max_tokens {max_tokens}{Fore.RESET}"
+    )
+    message = _chat_completion_from_plugins(messages, model, temperature, max_tokens)
+    if message is not None:
+        return message
+    cached = _chat_completion_from_cache(messages, model, temperature, max_tokens)
+    if cached is not None:
+        return _apply_on_response_plugins(cached)
+    try:
+        response = await RetryEngine().acall(
+            "chat",
+            _chat_completion_policy(num_attempts),
+            ApiManager().acreate_chat_completion,
+            **_chat_completion_kwargs(messages, model, temperature, max_tokens),
+        )
+    except Exception as e:
+        if not _gave_up_on(e):
+            raise
+        logger.debug(f"{Fore.RED}Error: {e}{Fore.RESET}")
+        response = None
+    _cache_chat_completion_response(messages, model, temperature, max_tokens, response)
+    return _process_chat_completion_response(response, num_attempts)
 
 
 def batched(iterable, n):
@@ -227,6 +380,74 @@ def chunked_tokens(text, tokenizer_name, chunk_length):
     yield from chunks_iterator
 
 
+def _request_embedding(tokens: int, **kwargs) -> openai.Embedding:
+    """Send an embedding request once the rate limiter allows it"""
+    cfg = Config()
+    rate_limiter = RateLimiter()
+    rate_limiter.acquire(cfg.embedding_model, tokens)
+    try:
+        return openai.Embedding.create(api_key=cfg.openai_api_key, **kwargs)
+    except RateLimitError as e:
+        rate_limiter.on_rate_limit(cfg.embedding_model, e)
+        raise
+
+
+async def _arequest_embedding(tokens: int, **kwargs) -> openai.Embedding:
+    """Send an embedding request once the rate limiter allows it, without blocking
+    the event loop"""
+    cfg = Config()
+    rate_limiter = RateLimiter()
+    await rate_limiter.aacquire(cfg.embedding_model, tokens)
+    try:
+        return await openai.Embedding.acreate(api_key=cfg.openai_api_key, **kwargs)
+    except RateLimitError as e:
+        rate_limiter.on_rate_limit(cfg.embedding_model, e)
+        raise
+
+
+def _embedding_kwargs() -> dict:
+    cfg = Config()
+    model = cfg.embedding_model
+    if cfg.use_azure:
+        return {"engine": cfg.get_azure_deployment_id_for_model(model)}
+    return {"model": model}
+
+
+def _embed_with_cache(
+    texts: List[str], embed: Callable[[List[str]], List[List[float]]]
+) -> List[List[float]]:
+    """Look the texts up in the embedding cache (if enabled), and only embed the
+    ones that are not in it.
+
+    Args:
+        texts (List[str]): The texts to embed, as they are sent to the model.
+        embed (Callable): Embeds a list of texts.
+
+    Returns:
+        List[List[float]]: The embeddings, in the same order as the texts.
+    """
+    cfg = Config()
+    if not cfg.use_embedding_cache:
+        return embed(texts)
+
+    cache = EmbeddingCache()
+    model = cfg.embedding_model
+    embeddings = [cache.get(model, text) for text in texts]
+    missing = list(dict.fromkeys(t for t, e in zip(texts, embeddings) if e is None))
+    ApiManager().update_embedding_cache_stats(
+        hits=len(texts) - embeddings.count(None), misses=len(missing)
+    )
+    if missing:
+        new_embeddings = dict(zip(missing, embed(missing)))
+        for text, embedding in new_embeddings.items():
+            cache.put(model, text, embedding)
+        embeddings = [
+            new_embeddings[text] if embedding is None else embedding
+            for text, embedding in zip(texts, embeddings)
+        ]
+    return embeddings
+
+
 def get_ada_embedding(text: str) -> List[float]:
     """Get an embedding from the ada model.
 
@@ -236,20 +457,66 @@ def get_ada_embedding(text: str) -> List[float]:
     Returns:
         List[float]: The embedding.
     """
-    cfg = Config()
-    model = cfg.embedding_model
     text = text.replace("\n", " ")
+    kwargs = _embedding_kwargs()
+    return _embed_with_cache(
+        [text], lambda texts: [create_embedding(texts[0], **kwargs)]
+    )[0]
 
-    if cfg.use_azure:
-        kwargs = {"engine": cfg.get_azure_deployment_id_for_model(model)}
-    else:
-        kwargs = {"model": model}
 
-    embedding = create_embedding(text, **kwargs)
+async def aget_ada_embedding(text: str) -> List[float]:
+    """Get an embedding from the ada model without blocking the event loop.
+
+    Args:
+        text (str): The text to embed.
+
+    Returns:
+        List[float]: The embedding.
+    """
+    cfg = Config()
+    text = text.replace("\n", " ")
+    cache = EmbeddingCache() if cfg.use_embedding_cache else None
+    embedding = cache.get(cfg.embedding_model, text) if cache else None
+    if cache:
+        ApiManager().update_embedding_cache_stats(
+            hits=int(embedding is not None), misses=int(embedding is None)
+        )
+    if embedding is None:
+        embedding = await acreate_embedding(text, **_embedding_kwargs())
+        if cache:
+            cache.put(cfg.embedding_model, text, embedding)
     return embedding
 
 
-@retry_openai_api()
+def get_ada_embeddings(texts: List[str]) -> List[List[float]]:
+    """Get embeddings for many texts from the ada model, with as few requests as
+    possible.
+
+    Args:
+        texts (List[str]): The texts to embed.
+
+    Returns:
+        List[List[float]]: The embeddings, in the same order as the texts.
+    """
+    texts = [text.replace("\n", " ") for text in texts]
+    kwargs = _embedding_kwargs()
+    return _embed_with_cache(texts, lambda texts: create_embeddings(texts, **kwargs))
+
+
+def _average_chunk_embeddings(
+    chunk_embeddings: List[List[float]], chunk_lengths: List[int]
+) -> List[float]:
+    """Average the embeddings of a text's chunks, weighted by chunk length"""
+    # do weighted avg
+    chunk_embeddings = np.average(chunk_embeddings, axis=0, weights=chunk_lengths)
+    chunk_embeddings = chunk_embeddings / np.linalg.norm(
+        chunk_embeddings
+    )  # normalize the length to one
+    chunk_embeddings = chunk_embeddings.tolist()
+    return chunk_embeddings
+
+
+@retry_openai_api(endpoint="embedding")
 def create_embedding(
     text: str,
     *_,
@@ -272,11 +539,7 @@ def create_embedding(
         tokenizer_name=cfg.embedding_tokenizer,
         chunk_length=cfg.embedding_token_limit,
     ):
-        embedding = openai.Embedding.create(
-            input=[chunk],
-            api_key=cfg.openai_api_key,
-            **kwargs,
-        )
+        embedding = _request_embedding(len(chunk), input=[chunk], **kwargs)
         api_manager = ApiManager()
         api_manager.update_cost(
             prompt_tokens=embedding.usage.prompt_tokens,
@@ -286,10 +549,132 @@ def create_embedding(
         chunk_embeddings.append(embedding["data"][0]["embedding"])
         chunk_lengths.append(len(chunk))
 
-    # do weighted avg
-    chunk_embeddings = np.average(chunk_embeddings, axis=0, weights=chunk_lengths)
-    chunk_embeddings = chunk_embeddings / np.linalg.norm(
-        chunk_embeddings
-    )  # normalize the length to one
-    chunk_embeddings = chunk_embeddings.tolist()
-    return chunk_embeddings
+    return _average_chunk_embeddings(chunk_embeddings, chunk_lengths)
+
+
+@retry_openai_api(endpoint="embedding")
+async def acreate_embedding(
+    text: str,
+    *_,
+    **kwargs,
+) -> openai.Embedding:
+    """Create an embedding using the OpenAI API without blocking the event loop
+
+    The chunks of a long text are embedded concurrently.
+
+    Args:
+        text (str): The text to embed.
+        kwargs: Other arguments to pass to the OpenAI API embedding creation call.
+
+    Returns:
+        openai.Embedding: The embedding object.
+    """
+    cfg = Config()
+    chunks = list(
+        chunked_tokens(
+            text,
+            tokenizer_name=cfg.embedding_tokenizer,
+            chunk_length=cfg.embedding_token_limit,
+        )
+    )
+    embeddings = await asyncio.gather(
+        *(_arequest_embedding(len(chunk), input=[chunk], **kwargs) for chunk in chunks)
+    )
+    api_manager = ApiManager()
+    for embedding in embeddings:
+        api_manager.update_cost(
+            prompt_tokens=embedding.usage.prompt_tokens,
+            completion_tokens=0,
+            model=cfg.embedding_model,
+        )
+
+    return _average_chunk_embeddings(
+        [embedding["data"][0]["embedding"] for embedding in embeddings],
+        [len(chunk) for chunk in chunks],
+    )
+
+
+@retry_openai_api(endpoint="embedding")
+def _create_embedding_batch(
+    batch: List[tuple],
+    *_,
+    **kwargs,
+) -> List[List[float]]:
+    """Embed a batch of token chunks with a single request.
+
+    Returns:
+        List[List[float]]: The embeddings, in the same order as the batch.
+    """
+    cfg = Config()
+    response = _request_embedding(
+        sum(len(chunk) for chunk in batch),
+        input=[list(chunk) for chunk in batch],
+        **kwargs,
+    )
+    api_manager = ApiManager()
+    api_manager.update_cost(
+        prompt_tokens=response.usage.prompt_tokens,
+        completion_tokens=0,
+        model=cfg.embedding_model,
+    )
+    data = sorted(response["data"], key=lambda item: item["index"])
+    return [item["embedding"] for item in data]
+
+
+def create_embeddings(
+    texts: List[str],
+    *_,
+    **kwargs,
+) -> List[List[float]]:
+    """Create embeddings for many texts using the OpenAI API
+
+    The texts are split into token chunks like in create_embedding, and the chunks
+    are packed into requests of at most cfg.embedding_batch_size inputs and
+    cfg.embedding_batch_token_limit tokens. The embedding of a text is the
+    length-weighted average of the embeddings of its chunks.
+
+    Args:
+        texts (List[str]): The texts to embed.
+        kwargs: Other arguments to pass to the OpenAI API embedding creation call.
+
+    Returns:
+        List[List[float]]: The embeddings, in the same order as the texts.
+    """
+    cfg = Config()
+    # (index of the text, token chunk) for every chunk of every text
+    chunks = [
+        (text_index, chunk)
+        for text_index, text in enumerate(texts)
+        for chunk in chunked_tokens(
+            text,
+            tokenizer_name=cfg.embedding_tokenizer,
+            chunk_length=cfg.embedding_token_limit,
+        )
+    ]
+
+    chunk_embeddings = []
+    batch = []
+    batch_tokens = 0
+    for _, chunk in chunks:
+        if batch and (
+            len(batch) >= cfg.embedding_batch_size
+            or batch_tokens + len(chunk) > cfg.embedding_batch_token_limit
+        ):
+            chunk_embeddings.extend(_create_embedding_batch(batch, **kwargs))
+            batch = []
+            batch_tokens = 0
+        batch.append(chunk)
+        batch_tokens += len(chunk)
+    if batch:
+        chunk_embeddings.extend(_create_embedding_batch(batch, **kwargs))
+
+    embeddings_per_text = [[] for _ in texts]
+    lengths_per_text = [[] for _ in texts]
+    for (text_index, chunk), embedding in zip(chunks, chunk_embeddings):
+        embeddings_per_text[text_index].append(embedding)
+        lengths_per_text[text_index].append(len(chunk))
+
+    return [
+        _average_chunk_embeddings(embeddings, lengths)
+        for embeddings, lengths in zip(embeddings_per_text, lengths_per_text)
+    ]
@@ -8,3 +8,14 @@ COSTS = {
     "gpt-4-32k-0314": {"prompt": 0.06, "completion": 0.12},
     "text-embedding-ada-002": {"prompt": 0.0004, "completion": 0.0},
 }
+
+# Default requests and tokens per minute, until the API reports the actual limits
+RATE_LIMITS = {
+    "gpt-3.5-turbo": {"requests": 3500, "tokens": 90000},
+    "gpt-3.5-turbo-0301": {"requests": 3500, "tokens": 90000},
+    "gpt-4": {"requests": 200, "tokens": 40000},
+    "gpt-4-0314": {"requests": 200, "tokens": 40000},
+    "gpt-4-32k": {"requests": 1000, "tokens": 80000},
+    "gpt-4-32k-0314": {"requests": 1000, "tokens": 80000},
+    "text-embedding-ada-002": {"requests": 3000, "tokens": 1000000},
+}
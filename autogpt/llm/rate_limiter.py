@@ -0,0 +1,224 @@
+"""A process-wide limiter that shapes OpenAI requests to the account's rate limits."""
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from autogpt.llm.base import Message
+from autogpt.llm.modelsinfo import RATE_LIMITS
+from autogpt.logs import logger
+from autogpt.singleton import Singleton
+
+# Limits of models that are not in RATE_LIMITS, until the API reports them
+DEFAULT_RATE_LIMIT = {"requests": 3500, "tokens": 90000}
+# How long to pause a model after a rate limit error that says nothing about when
+# to retry
+DEFAULT_RETRY_AFTER = 2.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parses a rate limit reset duration such as "1s", "6m0s" or "20ms".
+
+    Returns:
+        Optional[float]: The duration in seconds, or None if it can't be parsed.
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def estimate_chat_tokens(messages: List[Message], max_tokens: Optional[int]) -> int:
+    """Estimates the tokens a chat completion counts against the rate limit.
+
+    Like the API, the estimate includes the requested max_tokens. The prompt is
+    estimated at four characters per token, which is close enough for rate limiting
+    and much cheaper than encoding it.
+    """
+    prompt_chars = sum(len(message.get("content", "")) for message in messages)
+    return prompt_chars // 4 + 4 * len(messages) + (max_tokens or 0)
+
+
+class TokenBucket:
+    """
+    A token bucket that refills to its per-minute capacity over a minute.
+
+    Reservations are taken from the bucket straight away, even if that takes its
+    level below zero. The caller then has to wait until the bucket has refilled
+    back to zero, so concurrent callers are spaced out in the order they reserved.
+    """
+
+    def __init__(self, per_minute: float, now: float) -> None:
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = now
+
+    @property
+    def rate(self) -> float:
+        """The refill rate, per second"""
+        return self.capacity / 60
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.level = min(
+                self.capacity, self.level + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Takes an amount from the bucket.
+
+        Returns:
+            float: The number of seconds to wait before the amount may be used.
+        """
+        self._refill(now)
+        # A single request larger than the bucket must still be able to go through
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def set_capacity(self, per_minute: float, now: float) -> None:
+        self._refill(now)
+        self.capacity = float(per_minute)
+        self.level = min(self.level, self.capacity)
+
+    def limit(self, level: float, now: float) -> None:
+        """Lowers the level of the bucket to at most the given level."""
+        self._refill(now)
+        self.level = min(self.level, level)
+
+    def pause(self, seconds: float, now: float) -> None:
+        """Makes the next reservation wait at least the given number of seconds."""
+        self.limit(-seconds * self.rate, now)
+
+
+class RateLimiter(metaclass=Singleton):
+    """
+    Tracks the requests and tokens per minute that can be sent to each model.
+
+    Every OpenAI request reserves capacity with acquire (or aacquire) before it is
+    sent, so concurrent callers wait for their turn instead of all hitting the rate
+    limit and sleeping. The limits start out at the defaults in RATE_LIMITS and are
+    corrected from the x-ratelimit-* and retry-after headers of the API's
+    responses.
+
+    Attributes:
+        rate_limit_errors: The number of rate limit errors reported by the API.
+        total_wait: The number of seconds callers were asked to wait in total.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._buckets: Dict[Optional[str], Tuple[TokenBucket, TokenBucket]] = {}
+        self.rate_limit_errors = 0
+        self.total_wait = 0.0
+
+    def _buckets_for(
+        self, model: Optional[str], now: float
+    ) -> Tuple[TokenBucket, TokenBucket]:
+        if model not in self._buckets:
+            limits = RATE_LIMITS.get(model, DEFAULT_RATE_LIMIT)
+            self._buckets[model] = (
+                TokenBucket(limits["requests"], now),
+                TokenBucket(limits["tokens"], now),
+            )
+        return self._buckets[model]
+
+    def reserve(self, model: Optional[str], tokens: int) -> float:
+        """
+        Reserves one request and the given number of tokens for a model.
+
+        Returns:
+            float: The number of seconds to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            requests_bucket, tokens_bucket = self._buckets_for(model, now)
+            delay = max(
+                requests_bucket.reserve(1, now), tokens_bucket.reserve(tokens, now)
+            )
+            self.total_wait += delay
+        return delay
+
+    def acquire(self, model: Optional[str], tokens: int) -> None:
+        """Waits until a request of the given number of tokens may be sent."""
+        delay = self.reserve(model, tokens)
+        if delay > 0:
+            logger.debug(f"Rate limiting {model}: waiting {delay:.2f} seconds")
+            time.sleep(delay)
+
+    async def aacquire(self, model: Optional[str], tokens: int) -> None:
+        """Waits without blocking the event loop until a request may be sent."""
+        delay = self.reserve(model, tokens)
+        if delay > 0:
+            logger.debug(f"Rate limiting {model}: waiting {delay:.2f} seconds")
+            await asyncio.sleep(delay)
+
+    def update_from_headers(
+        self, model: Optional[str], headers: Mapping[str, str]
+    ) -> Optional[float]:
+        """
+        Adapts the limits of a model to the rate limit headers of a response.
+
+        Returns:
+            Optional[float]: How many seconds the headers say to wait before
+                retrying, if they say so.
+        """
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        retry_after = None
+        with self._lock:
+            now = time.monotonic()
+            buckets = dict(zip(("requests", "tokens"), self._buckets_for(model, now)))
+            for kind, bucket in buckets.items():
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                if limit and limit.isdigit() and int(limit) > 0:
+                    bucket.set_capacity(int(limit), now)
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining and remaining.isdigit():
+                    bucket.limit(int(remaining), now)
+                if remaining == "0" and f"x-ratelimit-reset-{kind}" in headers:
+                    reset = parse_duration(headers[f"x-ratelimit-reset-{kind}"])
+                    if reset is not None:
+                        retry_after = max(retry_after or 0.0, reset)
+
+            if "retry-after" in headers:
+                retry_after = parse_duration(headers["retry-after"])
+            if retry_after is not None:
+                for bucket in buckets.values():
+                    bucket.pause(retry_after, now)
+        return retry_after
+
+    def on_rate_limit(self, model: Optional[str], error: Exception) -> None:
+        """
+        Pauses a model after the API rejected a request to it with a rate limit
+        error, for as long as the error's headers say, or DEFAULT_RETRY_AFTER.
+        """
+        retry_after = self.update_from_headers(model, getattr(error, "headers", {}))
+        with self._lock:
+            self.rate_limit_errors += 1
+            if retry_after is None:
+                now = time.monotonic()
+                for bucket in self._buckets_for(model, now):
+                    bucket.pause(DEFAULT_RETRY_AFTER, now)
+        logger.debug(
+            f"Rate limit reached for {model}, pausing it for "
+            f"{retry_after or DEFAULT_RETRY_AFTER} seconds"
+        )
+
+    def reset(self) -> None:
+        """Forgets all limits learned from the API."""
+        with self._lock:
+            self._buckets.clear()
+            self.rate_limit_errors = 0
+            self.total_wait = 0.0
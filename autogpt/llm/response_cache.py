@@ -0,0 +1,135 @@
+"""A cache of deterministic (temperature 0) chat completion responses."""
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, TypedDict
+
+from autogpt.config import Config
+from autogpt.llm.base import Message
+from autogpt.singleton import Singleton
+
+
+class CachedResponse(TypedDict):
+    """A chat completion reply, with the usage it cost when it was first made"""
+
+    content: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+def response_cache_key(
+    model: str, temperature: float, max_tokens: Optional[int], messages: List[Message]
+) -> str:
+    """Returns the key of a chat completion request.
+
+    The messages are serialized canonically, so that requests which only differ in
+    key order or whitespace between JSON tokens share a key.
+    """
+    request = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(metaclass=Singleton):
+    """
+    Caches chat completion responses in memory and on disk.
+
+    Only completions with temperature 0 are cached, as only those are expected to
+    be reproducible. Each response is stored as a JSON file named after its key in
+    cfg.response_cache_path, and the most recently used ones are also kept in an
+    in-memory LRU.
+    """
+
+    def __init__(self) -> None:
+        cfg = Config()
+        self.path = Path(cfg.response_cache_path)
+        self.memory_entries = cfg.response_cache_memory_entries
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, CachedResponse] = OrderedDict()
+
+    @staticmethod
+    def is_cacheable(temperature: float) -> bool:
+        return temperature == 0
+
+    def _remember(self, key: str, response: CachedResponse) -> None:
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(
+        self,
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        messages: List[Message],
+    ) -> Optional[CachedResponse]:
+        """
+        Returns the cached response to a chat completion request, if there is one.
+        """
+        if not self.is_cacheable(temperature):
+            return None
+        key = response_cache_key(model, temperature, max_tokens, messages)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+            response_file = self.path / f"{key}.json"
+            if not response_file.exists():
+                return None
+            try:
+                response = json.loads(response_file.read_text(encoding="utf-8"))
+            except ValueError:
+                return None
+            self._remember(key, response)
+            return response
+
+    def put(
+        self,
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        messages: List[Message],
+        response,
+    ) -> None:
+        """
+        Stores the response to a chat completion request.
+
+        Args:
+            response: The response object returned by the OpenAI API.
+        """
+        if not self.is_cacheable(temperature):
+            return
+        key = response_cache_key(model, temperature, max_tokens, messages)
+        cached: CachedResponse = {
+            "content": response.choices[0].message["content"],
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+        }
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            (self.path / f"{key}.json").write_text(
+                json.dumps(cached, ensure_ascii=False), encoding="utf-8"
+            )
+            self._remember(key, cached)
+
+    def clear(self) -> None:
+        """Removes all cached responses, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,327 @@
+"""The retry policy shared by all OpenAI calls: jittered backoff, deadlines and a
+circuit breaker per endpoint."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterator, Optional
+
+from colorama import Fore, Style
+from openai.error import (
+    APIConnectionError,
+    APIError,
+    RateLimitError,
+    ServiceUnavailableError,
+    Timeout,
+)
+
+from autogpt.config import Config
+from autogpt.logs import logger
+from autogpt.singleton import Singleton
+
+RETRYABLE_HTTP_STATUSES = (502, 503, 504)
+
+# The time by which all LLM calls of the current agent cycle have to be done
+_cycle_deadline: ContextVar[Optional[float]] = ContextVar(
+    "cycle_deadline", default=None
+)
+
+RATE_LIMIT_MSG = f"{Fore.RED}Error: Reached rate limit, passing...{Fore.RESET}"
+API_KEY_ERROR_MSG = (
+    f"Please double check that you have setup a "
+    f"{Fore.CYAN + Style.BRIGHT}PAID{Style.RESET_ALL} OpenAI API Account. You can "
+    f"read more here: {Fore.CYAN}https://docs.agpt.co/setup/#getting-an-api-key{Fore.RESET}"
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint that has been failing repeatedly."""
+
+
+@dataclass
+class RetryPolicy:
+    """How a call is retried.
+
+    Attributes:
+        num_retries: The number of times a failed call is retried.
+        backoff_base: The base of the exponential backoff between attempts.
+        max_backoff: The longest wait between two attempts, in seconds.
+        jitter: The fraction of each backoff that is randomized, so that callers
+            that failed together don't all retry at the same moment.
+        deadline: The number of seconds after which a call stops retrying.
+        rate_limited: Whether the call waits for the RateLimiter itself, in which
+            case rate limit errors are retried straight away.
+        warn_user: Whether to warn the user about rate limits.
+    """
+
+    num_retries: int = 10
+    backoff_base: float = 2.0
+    max_backoff: float = 60.0
+    jitter: float = 0.5
+    deadline: Optional[float] = None
+    rate_limited: bool = False
+    warn_user: bool = True
+
+    @classmethod
+    def from_config(cls, **overrides) -> RetryPolicy:
+        cfg = Config()
+        policy = cls(
+            max_backoff=cfg.llm_retry_max_backoff, deadline=cfg.llm_call_deadline
+        )
+        return replace(policy, **overrides)
+
+    def backoff(self, attempt: int) -> float:
+        """Returns the number of seconds to wait after the given failed attempt."""
+        backoff = min(self.max_backoff, self.backoff_base ** (attempt + 2))
+        return backoff * (1 - self.jitter * random.random())
+
+
+def is_retryable(error: Exception) -> bool:
+    """Returns whether an error is worth retrying.
+
+    Connection errors are not: the HTTP transport has already retried them."""
+    if isinstance(error, (RateLimitError, Timeout, ServiceUnavailableError)):
+        return True
+    return isinstance(error, APIError) and error.http_status in RETRYABLE_HTTP_STATUSES
+
+
+def is_outage(error: Exception) -> bool:
+    """Returns whether an error means that the endpoint itself is failing."""
+    if isinstance(error, RateLimitError):
+        return False
+    return is_retryable(error) or isinstance(error, APIConnectionError)
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, Timeout):
+        return "API request timed out"
+    if isinstance(error, APIError) and error.http_status == 502:
+        return "API Bad gateway"
+    return "API unavailable"
+
+
+@contextlib.contextmanager
+def retry_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Gives all LLM calls made within the context a shared deadline."""
+    token = _cycle_deadline.set(
+        time.monotonic() + seconds if seconds is not None else None
+    )
+    try:
+        yield
+    finally:
+        _cycle_deadline.reset(token)
+
+
+class CircuitBreaker:
+    """
+    Stops calls to an endpoint after it failed failure_threshold times in a row.
+
+    After reset_timeout seconds a single trial call is let through; the circuit
+    closes again if it succeeds, and stays open for another reset_timeout if not.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial_in_flight:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+@dataclass
+class EndpointStats:
+    """Retry and latency statistics of one endpoint"""
+
+    calls: int = 0
+    retries: int = 0
+    failures: int = 0
+    rejected: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+
+class RetryEngine(metaclass=Singleton):
+    """
+    Runs OpenAI calls under a RetryPolicy, with a circuit breaker and statistics
+    per endpoint (e.g. "chat", "embedding" or "image").
+    """
+
+    def __init__(self) -> None:
+        cfg = Config()
+        self.failure_threshold = cfg.llm_circuit_breaker_threshold
+        self.reset_timeout = cfg.llm_circuit_breaker_reset
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout
+                )
+            return self._breakers[endpoint]
+
+    def get_stats(self) -> Dict[str, EndpointStats]:
+        """
+        Get the retry and latency statistics of every endpoint.
+
+        Returns:
+            dict: A copy of the statistics of each endpoint.
+        """
+        with self._lock:
+            return {name: replace(stats) for name, stats in self._stats.items()}
+
+    def _record(
+        self, endpoint: str, attempts: int, latency: float, failed: bool, rejected=False
+    ) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, EndpointStats())
+            stats.calls += 1
+            stats.retries += max(0, attempts - 1)
+            stats.failures += int(failed)
+            stats.rejected += int(rejected)
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+
+    def _before_attempt(self, endpoint: str, start: float, attempt: int) -> None:
+        if not self.breaker(endpoint).allow():
+            self._record(
+                endpoint, attempt - 1, time.monotonic() - start, True, rejected=True
+            )
+            raise CircuitOpenError(
+                f"The {endpoint} endpoint is failing, not calling it for now"
+            )
+
+    def _after_error(
+        self,
+        endpoint: str,
+        policy: RetryPolicy,
+        error: Exception,
+        start: float,
+        attempt: int,
+        user_warned: bool,
+    ) -> tuple[float, bool]:
+        """Re-raise the error if the call must not be retried, otherwise log it.
+
+        Returns how long to wait before the next attempt, and whether the user has
+        been warned about rate limits."""
+        breaker = self.breaker(endpoint)
+        if is_outage(error):
+            breaker.record_failure()
+        else:
+            # The endpoint is up, it just didn't accept this request
+            breaker.record_success()
+        if not is_retryable(error):
+            self._record(endpoint, attempt, time.monotonic() - start, True)
+            raise error
+
+        rate_limited = isinstance(error, RateLimitError)
+
+        backoff = (
+            0.0 if rate_limited and policy.rate_limited else policy.backoff(attempt)
+        )
+        deadline = _cycle_deadline.get()
+        if policy.deadline is not None:
+            call_deadline = start + policy.deadline
+            deadline = (
+                call_deadline if deadline is None else min(deadline, call_deadline)
+            )
+        out_of_time = deadline is not None and time.monotonic() + backoff > deadline
+        if attempt > policy.num_retries or out_of_time:
+            if out_of_time:
+                logger.debug(f"Deadline reached, giving up on the {endpoint} call")
+            self._record(endpoint, attempt, time.monotonic() - start, True)
+            raise error
+
+        if rate_limited:
+            logger.debug(RATE_LIMIT_MSG)
+            if not user_warned:
+                logger.double_check(API_KEY_ERROR_MSG)
+                user_warned = True
+        else:
+            logger.debug(
+                f"{Fore.RED}Error: {_describe(error)}. "
+                f"Waiting {backoff:.2f} seconds...{Fore.RESET}"
+            )
+        return backoff, user_warned
+
+    def call(self, endpoint: str, policy: RetryPolicy, func: Callable, *args, **kwargs):
+        """Call func(*args, **kwargs), retrying it according to the policy."""
+        start = time.monotonic()
+        user_warned = not policy.warn_user
+        attempt = 1
+        while True:
+            self._before_attempt(endpoint, start, attempt)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                backoff, user_warned = self._after_error(
+                    endpoint, policy, e, start, attempt, user_warned
+                )
+                time.sleep(backoff)
+                attempt += 1
+                continue
+            self.breaker(endpoint).record_success()
+            self._record(endpoint, attempt, time.monotonic() - start, False)
+            return result
+
+    async def acall(
+        self, endpoint: str, policy: RetryPolicy, func: Callable, *args, **kwargs
+    ):
+        """Await func(*args, **kwargs), retrying it according to the policy."""
+        start = time.monotonic()
+        user_warned = not policy.warn_user
+        attempt = 1
+        while True:
+            self._before_attempt(endpoint, start, attempt)
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                backoff, user_warned = self._after_error(
+                    endpoint, policy, e, start, attempt, user_warned
+                )
+                await asyncio.sleep(backoff)
+                attempt += 1
+                continue
+            self.breaker(endpoint).record_success()
+            self._record(endpoint, attempt, time.monotonic() - start, False)
+            return result
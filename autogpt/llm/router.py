@@ -0,0 +1,171 @@
+"""Picks the model for auxiliary LLM calls from the prompt size, cost and latency."""
+from __future__ import annotations
+
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from autogpt.config import Config
+from autogpt.llm.base import ChatModelInfo, Message
+from autogpt.llm.providers.openai import OPEN_AI_CHAT_MODELS
+from autogpt.llm.token_counter import (
+    MESSAGE_TOKEN_LAYOUTS,
+    MODEL_ALIASES,
+    count_message_tokens,
+)
+from autogpt.logs import logger
+from autogpt.singleton import Singleton
+
+CHEAPEST = "cheapest"
+FASTEST = "fastest"
+
+# Weight of the newest observation in the moving average of a model's latency
+LATENCY_SMOOTHING = 0.3
+
+
+def default_routes(cfg: Config) -> Dict[str, Tuple[str, List[str]]]:
+    """The routing table used for tasks that LLM_ROUTES doesn't configure"""
+    fast_then_smart = list(dict.fromkeys([cfg.fast_llm_model, cfg.smart_llm_model]))
+    return {
+        "json-fix": (FASTEST, fast_then_smart),
+        "summarize": (CHEAPEST, fast_then_smart),
+        "feedback": (FASTEST, fast_then_smart),
+        "analyze": (CHEAPEST, [cfg.smart_llm_model]),
+    }
+
+
+def get_model_info(model: str) -> Optional[ChatModelInfo]:
+    """Look up a chat model, including dated snapshots like gpt-4-0314"""
+    if model in OPEN_AI_CHAT_MODELS:
+        return OPEN_AI_CHAT_MODELS[model]
+    # The longest name matches best, e.g. gpt-4-32k-0314 is a gpt-4-32k
+    names = [name for name in OPEN_AI_CHAT_MODELS if model.startswith(f"{name}-")]
+    return OPEN_AI_CHAT_MODELS[max(names, key=len)] if names else None
+
+
+def token_counting_model(model: str) -> str:
+    """A model whose message layout count_message_tokens knows, to count the
+    tokens of a prompt for the given model, e.g. gpt-4 for gpt-4-32k"""
+    info = get_model_info(model)
+    for name in (model, info.name if info else None):
+        if name and MODEL_ALIASES.get(name, name) in MESSAGE_TOKEN_LAYOUTS:
+            return name
+    return "gpt-3.5-turbo" if model.startswith("gpt-3.5") else "gpt-4"
+
+
+class ModelRouter(metaclass=Singleton):
+    """
+    Routes auxiliary LLM calls (e.g. JSON fixes, summaries, code analysis) to a
+    model, following the per-task routing table in cfg.llm_routes.
+
+    A route lists candidate models and whether to prefer the cheapest or the
+    fastest of them. Models whose context can't hold the prompt are skipped.
+    Latency is learned from the calls made: until a model has been observed,
+    it ranks behind the observed ones, in the order of the route.
+    """
+
+    def __init__(self) -> None:
+        self._latencies: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record_latency(self, model: str, seconds: float) -> None:
+        """
+        Record how long a chat completion with a model took.
+
+        Args:
+            model (str): The model of the completion.
+            seconds (float): The time the completion took.
+        """
+        with self._lock:
+            previous = self._latencies.get(model)
+            self._latencies[model] = (
+                seconds
+                if previous is None
+                else previous + LATENCY_SMOOTHING * (seconds - previous)
+            )
+
+    def get_latencies(self) -> Dict[str, float]:
+        """
+        Get the observed latency of every model.
+
+        Returns:
+            dict: The moving average of the completion time of each model, in
+                seconds.
+        """
+        with self._lock:
+            return dict(self._latencies)
+
+    def get_route(self, task: str) -> Tuple[str, List[str]]:
+        """
+        Get the route of a task.
+
+        Args:
+            task (str): The task class, e.g. "json-fix", "summarize" or "analyze".
+
+        Returns:
+            tuple: The objective ("cheapest" or "fastest") and the candidate models.
+        """
+        cfg = Config()
+        if task in cfg.llm_routes:
+            return cfg.llm_routes[task]
+        routes = default_routes(cfg)
+        if task not in routes:
+            raise ValueError(f"No route for task {task}")
+        return routes[task]
+
+    def route(
+        self, task: str, messages: List[Message], max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Pick the model for a call.
+
+        Args:
+            task (str): The task class of the call.
+            messages (List[Message]): The messages of the call.
+            max_tokens (int, optional): The maximum length of the completion.
+
+        Returns:
+            str: The model to use.
+        """
+        objective, models = self.get_route(task)
+        prompt_tokens = count_message_tokens(messages, token_counting_model(models[0]))
+        completion_tokens = max_tokens or 0
+        fitting = [
+            model
+            for model in models
+            if prompt_tokens + completion_tokens <= self._context_size(model)
+        ]
+        if not fitting:
+            model = max(models, key=self._context_size)
+            logger.debug(f"No model of the {task} route fits the prompt, using {model}")
+            return model
+
+        latencies = self.get_latencies()
+
+        def rank(model: str):
+            latency = latencies.get(model)
+            by_latency = (latency is None, latency or 0.0)
+            if objective == FASTEST:
+                return by_latency
+            cost = self._cost(model, prompt_tokens, completion_tokens or prompt_tokens)
+            return (cost, *by_latency)
+
+        # min() keeps the route order between models that rank the same
+        model = min(fitting, key=rank)
+        logger.debug(f"Routing {task} ({prompt_tokens} prompt tokens) to {model}")
+        return model
+
+    @staticmethod
+    def _context_size(model: str) -> float:
+        info = get_model_info(model)
+        return info.max_tokens if info else math.inf
+
+    @staticmethod
+    def _cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        info = get_model_info(model)
+        if info is None:
+            return math.inf
+        return (
+            prompt_tokens * info.prompt_token_cost
+            + completion_tokens * info.completion_token_cost
+        ) / 1000
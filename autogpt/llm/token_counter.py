@@ -1,12 +1,119 @@
 """Functions for counting the number of tokens in a message or string."""
 from __future__ import annotations
 
-from typing import List
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Optional
 
 import tiktoken
 
 from autogpt.llm.base import Message
-from autogpt.logs import logger
+
+# Models whose token layout may change over time are counted as their pinned snapshot
+MODEL_ALIASES = {
+    "gpt-3.5-turbo": "gpt-3.5-turbo-0301",
+    "gpt-4": "gpt-4-0314",
+}
+
+# (tokens_per_message, tokens_per_name) for each supported chat model snapshot
+MESSAGE_TOKEN_LAYOUTS = {
+    # every message follows <|start|>{role/name}\n{content}<|end|>\n
+    # if there's a name, the role is omitted
+    "gpt-3.5-turbo-0301": (4, -1),
+    "gpt-4-0314": (3, 1),
+}
+
+TOKEN_COUNT_CACHE_SIZE = 8192
+
+
+class TokenCountCache:
+    """A bounded, thread-safe LRU cache of token counts.
+
+    Keys hold a digest of the counted text rather than the text itself, so that the
+    cache does not keep large strings alive after they leave the message history.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_COUNT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: int) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+token_count_cache = TokenCountCache()
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding_for_model(model: str) -> tiktoken.Encoding:
+    """
+    Returns the tiktoken encoding for a model, loading it only once per process.
+
+    Args:
+        model (str): The name of the model.
+
+    Returns:
+        tiktoken.Encoding: The encoding used by the model.
+
+    Raises:
+        KeyError: If tiktoken does not know the model.
+    """
+    return tiktoken.encoding_for_model(model)
+
+
+def _text_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _count_single_message_tokens(message: Message, model: str) -> int:
+    """Returns the number of tokens a single message adds to a prompt."""
+    tokens_per_message, tokens_per_name = MESSAGE_TOKEN_LAYOUTS[model]
+    key = (
+        model,
+        message.get("role"),
+        tuple((k, _text_digest(v)) for k, v in message.items() if k != "role"),
+    )
+    num_tokens = token_count_cache.get(key)
+    if num_tokens is not None:
+        return num_tokens
+
+    encoding = get_encoding_for_model(model)
+    num_tokens = tokens_per_message
+    for key_name, value in message.items():
+        num_tokens += len(encoding.encode(value))
+        if key_name == "name":
+            num_tokens += tokens_per_name
+    token_count_cache.put(key, num_tokens)
+    return num_tokens
 
 
 def count_message_tokens(
@@ -15,6 +122,9 @@ def count_message_tokens(
     """
     Returns the number of tokens used by a list of messages.
 
+    Token counts of individual messages are memoized, so re-counting a message
+    history that only grew by a few messages only encodes the new ones.
+
     Args:
         messages (list): A list of messages, each of which is a dictionary
             containing the role and content of the message.
@@ -24,27 +134,10 @@ def count_message_tokens(
     Returns:
         int: The number of tokens used by the list of messages.
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        logger.warn("Warning: model not found. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
-    if model == "gpt-3.5-turbo":
-        # !Note: gpt-3.5-turbo may change over time.
-        # Returning num tokens assuming gpt-3.5-turbo-0301.")
-        return count_message_tokens(messages, model="gpt-3.5-turbo-0301")
-    elif model == "gpt-4":
-        # !Note: gpt-4 may change over time. Returning num tokens assuming gpt-4-0314.")
-        return count_message_tokens(messages, model="gpt-4-0314")
-    elif model == "gpt-3.5-turbo-0301":
-        tokens_per_message = (
-            4  # every message follows <|start|>{role/name}\n{content}<|end|>\n
-        )
-        tokens_per_name = -1  # if there's a name, the role is omitted
-    elif model == "gpt-4-0314":
-        tokens_per_message = 3
-        tokens_per_name = 1
-    else:
+    # !Note: gpt-3.5-turbo and gpt-4 may change over time.
+    # Returning num tokens assuming their pinned snapshot.
+    model = MODEL_ALIASES.get(model, model)
+    if model not in MESSAGE_TOKEN_LAYOUTS:
         raise NotImplementedError(
             f"num_tokens_from_messages() is not implemented for model {model}.\n"
             " See https://github.com/openai/openai-python/blob/main/chatml.md for"
@@ -52,11 +145,7 @@ def count_message_tokens(
         )
     num_tokens = 0
     for message in messages:
-        num_tokens += tokens_per_message
-        for key, value in message.items():
-            num_tokens += len(encoding.encode(value))
-            if key == "name":
-                num_tokens += tokens_per_name
+        num_tokens += _count_single_message_tokens(message, model)
     num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
     return num_tokens
 
@@ -72,5 +161,10 @@ def count_string_tokens(string: str, model_name: str) -> int:
     Returns:
         int: The number of tokens in the text string.
     """
-    encoding = tiktoken.encoding_for_model(model_name)
-    return len(encoding.encode(string))
+    encoding = get_encoding_for_model(model_name)
+    key = (model_name, None, _text_digest(string))
+    num_tokens = token_count_cache.get(key)
+    if num_tokens is None:
+        num_tokens = len(encoding.encode(string))
+        token_count_cache.put(key, num_tokens)
+    return num_tokens
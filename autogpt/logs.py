@@ -256,36 +256,33 @@ def print_assistant_thoughts(
     assistant_reply_json_valid: object,
     speak_mode: bool = False,
 ) -> None:
-    assistant_thoughts_reasoning = None
-    assistant_thoughts_plan = None
-    assistant_thoughts_speak = None
-    assistant_thoughts_criticism = None
-
     assistant_thoughts = assistant_reply_json_valid.get("thoughts", {})
-    assistant_thoughts_text = assistant_thoughts.get("text")
-    if assistant_thoughts:
-        assistant_thoughts_reasoning = assistant_thoughts.get("reasoning")
-        assistant_thoughts_plan = assistant_thoughts.get("plan")
-        assistant_thoughts_criticism = assistant_thoughts.get("criticism")
-        assistant_thoughts_speak = assistant_thoughts.get("speak")
-    logger.typewriter_log(
-        f"{ai_name.upper()} THOUGHTS:", Fore.YELLOW, f"{assistant_thoughts_text}"
-    )
-    logger.typewriter_log("REASONING:", Fore.YELLOW, f"{assistant_thoughts_reasoning}")
-    if assistant_thoughts_plan:
+    for name in ("text", "reasoning", "plan", "criticism", "speak"):
+        print_assistant_thought(ai_name, name, assistant_thoughts.get(name), speak_mode)
+
+
+def print_assistant_thought(
+    ai_name: object, name: str, value: Any, speak_mode: bool = False
+) -> None:
+    """Print one of the thoughts of an assistant reply, e.g. as soon as it has been
+    streamed."""
+    if name == "text":
+        logger.typewriter_log(f"{ai_name.upper()} THOUGHTS:", Fore.YELLOW, f"{value}")
+    elif name in ("reasoning", "criticism"):
+        logger.typewriter_log(f"{name.upper()}:", Fore.YELLOW, f"{value}")
+    elif name == "plan" and value:
         logger.typewriter_log("PLAN:", Fore.YELLOW, "")
         # If it's a list, join it into a string
-        if isinstance(assistant_thoughts_plan, list):
-            assistant_thoughts_plan = "\n".join(assistant_thoughts_plan)
-        elif isinstance(assistant_thoughts_plan, dict):
-            assistant_thoughts_plan = str(assistant_thoughts_plan)
+        if isinstance(value, list):
+            value = "\n".join(value)
+        elif isinstance(value, dict):
+            value = str(value)
 
         # Split the input_string using the newline character and dashes
-        lines = assistant_thoughts_plan.split("\n")
+        lines = value.split("\n")
         for line in lines:
             line = line.lstrip("- ")
             logger.typewriter_log("- ", Fore.GREEN, line.strip())
-    logger.typewriter_log("CRITICISM:", Fore.YELLOW, f"{assistant_thoughts_criticism}")
     # Speak the assistant's thoughts
-    if speak_mode and assistant_thoughts_speak:
-        say_text(assistant_thoughts_speak)
+    elif name == "speak" and speak_mode and value:
+        say_text(value)
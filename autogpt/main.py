@@ -9,6 +9,7 @@ from autogpt.agent.agent import Agent
 from autogpt.commands.command import CommandRegistry
 from autogpt.config import Config, check_openai_api_key
 from autogpt.configurator import create_config
+from autogpt.http_client import install_openai_transport
 from autogpt.logs import logger
 from autogpt.memory import get_memory
 from autogpt.plugins import scan_plugins
@@ -37,11 +38,16 @@ def run_auto_gpt(
     skip_news: bool,
     workspace_directory: str,
     install_plugin_deps: bool,
+    no_response_cache: bool = False,
+    clear_response_cache: bool = False,
 ):
     # Configure logging before we do anything else.
     logger.set_level(logging.DEBUG if debug else logging.INFO)
     logger.speak_mode = speak
 
+    # Send OpenAI requests over the same keep-alive connection pools as other requests
+    install_openai_transport()
+
     cfg = Config()
     # TODO: fill in llm values here
     check_openai_api_key()
@@ -58,6 +64,8 @@ def run_auto_gpt(
         browser_name,
         allow_downloads,
         skip_news,
+        no_response_cache,
+        clear_response_cache,
     )
 
     if not cfg.skip_news:
@@ -1,8 +1,21 @@
 """Base class for memory providers."""
 import abc
+import hashlib
+from typing import List, Optional, Set
 
+from autogpt.llm.api_manager import ApiManager
+from autogpt.logs import logger
 from autogpt.singleton import AbstractSingleton
 
+# What adding a single text that is stored already returns, instead of an empty
+# message that can't be told apart from a failed add
+ALREADY_STORED = "Text is already stored in memory"
+
+
+def content_hash(text: str) -> str:
+    """The SHA-256 digest of a text, which identifies it in a memory"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 
 class MemoryProviderSingleton(AbstractSingleton):
     @abc.abstractmethod
@@ -10,6 +23,10 @@ class MemoryProviderSingleton(AbstractSingleton):
         """Adds to memory"""
         pass
 
+    def add_many(self, data):
+        """Adds many items to memory"""
+        return [self.add(item) for item in data]
+
     @abc.abstractmethod
     def get(self, data):
         """Gets from memory"""
@@ -25,7 +42,62 @@ class MemoryProviderSingleton(AbstractSingleton):
         """Gets relevant memory for"""
         pass
 
+    def get_relevant_many(self, data, num_relevant=5):
+        """Gets relevant memory for many queries"""
+        return [self.get_relevant(item, num_relevant) for item in data]
+
     @abc.abstractmethod
     def get_stats(self):
         """Get stats from memory"""
         pass
+
+    @property
+    def content_hashes(self) -> Set[str]:
+        """The content hashes of the texts stored from this process"""
+        if "_content_hashes" not in self.__dict__:
+            self._content_hashes: Set[str] = set()
+        return self._content_hashes
+
+    def is_stored(self, data: List[str]) -> List[bool]:
+        """
+        Check whether texts are stored already. Providers that can look texts up
+        in their store override this, the others check the texts stored from this
+        process.
+
+        Args:
+            data: The texts to look up.
+
+        Returns: Whether each text is stored.
+        """
+        return [content_hash(item) in self.content_hashes for item in data]
+
+    def record_stored(self, data: List[str]) -> None:
+        """Remember texts as stored, for the default is_stored"""
+        self.content_hashes.update(content_hash(item) for item in data)
+
+    def skip_stored(
+        self, data: List[str], stored: Optional[List[bool]] = None
+    ) -> List[bool]:
+        """
+        Find the texts to add that are stored already, or that repeat an earlier
+        text of data, so that they are not embedded and stored again. Skipped adds
+        are counted in the ApiManager.
+
+        Args:
+            data: The texts to add.
+            stored: Whether each text is stored, if it was looked up already.
+                Defaults to is_stored(data).
+
+        Returns: Whether each text is to be skipped.
+        """
+        if stored is None:
+            stored = self.is_stored(data)
+        seen = set()
+        skipped = []
+        for item, item_stored in zip(data, stored):
+            skipped.append(item_stored or item in seen)
+            seen.add(item)
+        if any(skipped):
+            ApiManager().update_skipped_memory_adds(sum(skipped))
+            logger.debug(f"Skipped adding {sum(skipped)} texts already in memory")
+        return skipped
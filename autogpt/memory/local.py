@@ -1,36 +1,409 @@
 from __future__ import annotations
 
 import dataclasses
+import itertools
+import os
+import struct
 from pathlib import Path
-from typing import Any, List
+from typing import Any, List, Optional, Tuple
 
 import numpy as np
 import orjson
 
-from autogpt.llm import get_ada_embedding
-from autogpt.memory.base import MemoryProviderSingleton
+from autogpt.llm import get_ada_embedding, get_ada_embeddings
+from autogpt.logs import logger
+from autogpt.memory.base import ALREADY_STORED, MemoryProviderSingleton
 
 EMBED_DIM = 1536
-SAVE_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SERIALIZE_DATACLASS
-
-
-def create_default_embeddings():
-    return np.zeros((0, EMBED_DIM)).astype(np.float32)
+FORMAT_VERSION = 1
+# The .npy header is padded to a fixed size, so that it can be rewritten in place
+# with the new number of rows after each append
+NPY_HEADER_SIZE = 128
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+# Number of quantized rows converted back to float32 at a time while scoring
+SCORE_BLOCK_ROWS = 65536
+KMEANS_ITERATIONS = 10
+# Number of rows per cluster sampled to train the IVF index
+KMEANS_SAMPLE_PER_LIST = 64
+
+
+def create_default_embeddings(dtype: str = "float32"):
+    return np.zeros((0, EMBED_DIM)).astype(STORAGE_DTYPES[dtype])
+
+
+def create_default_scales():
+    return np.zeros(0, dtype=np.float32)
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert float32 rows to a storage dtype.
+
+    int8 rows are scaled so that the largest magnitude of each row maps to 127.
+
+    Returns: The converted rows, and the scale of each row (1 unless int8)
+    """
+    if dtype != "int8":
+        return vectors.astype(STORAGE_DTYPES[dtype]), np.ones(len(vectors), np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    rows = np.rint(vectors / scales[:, np.newaxis]).astype(np.int8)
+    return rows, scales.astype(np.float32)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    The indices of the k highest scores, highest first.
+
+    np.argpartition finds them in O(n), so only those k are sorted.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        indices = np.argpartition(scores, -k)[-k:]
+    else:
+        indices = np.arange(len(scores))
+    return indices[np.argsort(scores[indices])[::-1]]
+
+
+def npy_header(rows: int, dtype: str = "float32", dim: Optional[int] = EMBED_DIM):
+    """The header of a version 1.0 .npy file of `rows` rows of `dim` values"""
+    header = repr(
+        {
+            "descr": np.dtype(dtype).str,
+            "fortran_order": False,
+            "shape": (rows, dim) if dim else (rows,),
+        }
+    )
+    header = header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode()
 
 
 @dataclasses.dataclass
 class CacheContent:
+    """
+    The texts in the cache and their embeddings.
+
+    The embeddings are stored in a preallocated buffer, of which the first
+    `length` rows are in use. When the buffer is full its capacity is doubled, so
+    adding N embeddings one at a time copies O(N) floats instead of O(N²).
+
+    The buffer holds float32, float16 or int8 values, as set by `dtype`. int8 rows
+    are stored with a float32 scale each, see quantize(). Rows are converted back
+    to float32 a block at a time while they are scored.
+    """
+
     texts: List[str] = dataclasses.field(default_factory=list)
-    embeddings: np.ndarray = dataclasses.field(
-        default_factory=create_default_embeddings
-    )
+    buffer: np.ndarray = dataclasses.field(default_factory=create_default_embeddings)
+    length: int = 0
+    dtype: str = "float32"
+    scales: np.ndarray = dataclasses.field(default_factory=create_default_scales)
+
+    def __post_init__(self) -> None:
+        if self.dtype not in STORAGE_DTYPES:
+            raise ValueError(
+                f"Unknown embedding dtype {self.dtype}, "
+                f"use one of {', '.join(STORAGE_DTYPES)}"
+            )
+        if self.buffer.dtype != STORAGE_DTYPES[self.dtype] and not self.length:
+            self.buffer = create_default_embeddings(self.dtype)
+        if len(self.scales) < self.length:
+            self.scales = np.ones(self.length, dtype=np.float32)
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """
+        The embeddings in use as float32: a read-only view without copying them
+        if they are stored as float32, converted otherwise
+        """
+        embeddings = self.buffer[: self.length]
+        if self.dtype == "int8":
+            return embeddings * self.scales[: self.length, np.newaxis]
+        if self.dtype != "float32":
+            return embeddings.astype(np.float32)
+        embeddings.flags.writeable = False
+        return embeddings
+
+    @property
+    def capacity(self) -> int:
+        return self.buffer.shape[0]
+
+    def add(self, text: str, embedding) -> None:
+        """
+        Add a text and its embedding.
+
+        Args:
+            text: str
+            embedding: The embedding of the text
+
+        Returns: None
+        """
+        self.add_many([text], [embedding])
+
+    def add_many(self, texts: List[str], embeddings) -> None:
+        """
+        Add texts and their embeddings, growing the buffer at most once.
+
+        Args:
+            texts: List[str]
+            embeddings: The embeddings of the texts, one row per text
+
+        Returns: None
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(
+            len(texts), self.buffer.shape[1]
+        )
+        rows, scales = quantize(vectors, self.dtype)
+        end = self.length + len(texts)
+        self.reserve(end)
+        self.buffer[self.length : end] = rows
+        self.scales[self.length : end] = scales
+        self.texts.extend(texts)
+        self.length = end
+
+    def reserve(self, capacity: int) -> None:
+        """
+        Make room for at least `capacity` embeddings, doubling the capacity of the
+        buffer until it is large enough.
+
+        Args:
+            capacity: int
+
+        Returns: None
+        """
+        if capacity <= self.capacity and capacity <= len(self.scales):
+            return
+        new_capacity = max(self.capacity, 1)
+        while new_capacity < capacity:
+            new_capacity *= 2
+        buffer = np.empty((new_capacity, self.buffer.shape[1]), self.buffer.dtype)
+        buffer[: self.length] = self.buffer[: self.length]
+        self.buffer = buffer
+        scales = np.ones(new_capacity, dtype=np.float32)
+        scales[: self.length] = self.scales[: self.length]
+        self.scales = scales
+
+    def vectors(self, rows) -> np.ndarray:
+        """
+        The embeddings of some rows as float32.
+
+        Args:
+            rows: A slice or the indices of rows in use
+
+        Returns: One embedding per row
+        """
+        vectors = self.buffer[: self.length][rows].astype(np.float32, copy=False)
+        if self.dtype == "int8":
+            vectors = vectors * self.scales[: self.length][rows, np.newaxis]
+        return vectors
+
+    def scores(
+        self, queries: np.ndarray, rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        The dot products of queries with the embeddings in use.
+
+        Args:
+            queries: A query embedding, or one query embedding per row
+            rows: Score only the embeddings at these indices
+
+        Returns: The score of each embedding, for each query
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if rows is not None:
+            scores = queries @ self.buffer[rows].astype(np.float32, copy=False).T
+            if self.dtype == "int8":
+                scores *= self.scales[rows]
+            return scores
+        scores = np.empty(queries.shape[:-1] + (self.length,), dtype=np.float32)
+        for start in range(0, self.length, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, self.length)
+            block = self.buffer[start:end].astype(np.float32, copy=False)
+            scores[..., start:end] = queries @ block.T
+            if self.dtype == "int8":
+                scores[..., start:end] *= self.scales[start:end]
+        return scores
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, n_clusters: int, iterations: int = KMEANS_ITERATIONS
+) -> np.ndarray:
+    """
+    Cluster vectors by their dot products, like the embeddings are searched.
+
+    Returns: The unit length centroids of the clusters
+    """
+    rng = np.random.default_rng(0)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)]
+    for _ in range(iterations):
+        labels = nearest_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        # Clusters that lost all their vectors start over from a random one
+        empty = np.flatnonzero(np.bincount(labels, minlength=n_clusters) == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, np.finfo(np.float32).tiny)
+    return centroids.astype(np.float32)
+
+
+def nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """The index of the centroid with the highest dot product with each vector"""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+        block = vectors[start : start + SCORE_BLOCK_ROWS]
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+class IVFIndex:
+    """
+    An inverted file index of the embeddings of a CacheContent: the embeddings
+    are clustered with k-means, and a query only scores the embeddings in the
+    n_probe clusters whose centroids are closest to it.
+
+    The index is trained once the content has min_rows rows. With n_lists 0,
+    sqrt(rows) clusters are used, and the index is trained again each time the
+    number of rows quadruples. Rows added later are put in the nearest cluster.
+
+    The centroids are saved to {memory_index}.ivf.npy, and the cluster of each
+    row is appended to {memory_index}.ivf_lists.npy.
+    """
+
+    def __init__(
+        self,
+        centroids_filename: Path,
+        lists_filename: Path,
+        n_lists: int = 0,
+        n_probe: int = 8,
+        min_rows: int = 10000,
+    ) -> None:
+        self.centroids_filename = centroids_filename
+        self.lists_filename = lists_filename
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_rows = min_rows
+        self.centroids: Optional[np.ndarray] = None
+        self.lists = np.empty(0, dtype=np.int32)
+        self.length = 0
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def load(self, content: CacheContent) -> None:
+        """Load the saved index of content, putting rows it misses in clusters"""
+        self.centroids = None
+        self.length = 0
+        try:
+            centroids = np.load(self.centroids_filename)
+            lists = np.load(self.lists_filename)[: content.length]
+        except (FileNotFoundError, ValueError):
+            self.update(content)
+            return
+        self.centroids = centroids
+        self._append(lists)
+        self._write_lists(0, self.length)
+        self.update(content)
+
+    def update(self, content: CacheContent) -> None:
+        """Index the rows added to content, training the index when it's due"""
+        if self._training_is_due(content.length):
+            self._train(content)
+        elif self.trained and self.length < content.length:
+            start = self.length
+            vectors = content.vectors(slice(start, content.length))
+            self._append(nearest_centroids(vectors, self.centroids))
+            self._write_lists(start, self.length)
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """The rows in the clusters closest to a query"""
+        probed = top_k_indices(self.centroids @ query, self.n_probe)
+        return np.flatnonzero(np.isin(self.lists[: self.length], probed))
+
+    def clear(self) -> None:
+        self.centroids = None
+        self.length = 0
+        self.centroids_filename.unlink(missing_ok=True)
+        self.lists_filename.unlink(missing_ok=True)
+
+    def _training_is_due(self, rows: int) -> bool:
+        if rows < self.min_rows:
+            return False
+        if not self.trained:
+            return True
+        return self.n_lists == 0 and self._lists_for(rows) >= 2 * len(self.centroids)
+
+    def _lists_for(self, rows: int) -> int:
+        return self.n_lists or max(1, round(np.sqrt(rows)))
+
+    def _train(self, content: CacheContent) -> None:
+        n_lists = min(self._lists_for(content.length), content.length)
+        rng = np.random.default_rng(0)
+        sample_size = min(content.length, KMEANS_SAMPLE_PER_LIST * n_lists)
+        sample = np.sort(rng.choice(content.length, sample_size, replace=False))
+        centroids = spherical_kmeans(content.vectors(sample), n_lists)
+
+        lists = np.empty(content.length, dtype=np.int32)
+        for start in range(0, content.length, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, content.length)
+            lists[start:end] = nearest_centroids(
+                content.vectors(slice(start, end)), centroids
+            )
+        self.centroids = centroids
+        self.length = 0
+        self._append(lists)
+
+        temp_filename = self.centroids_filename.with_suffix(".tmp.npy")
+        np.save(temp_filename, centroids)
+        os.replace(temp_filename, self.centroids_filename)
+        self._write_lists(0, self.length)
+
+    def _append(self, lists: np.ndarray) -> None:
+        end = self.length + len(lists)
+        if end > len(self.lists):
+            capacity = max(len(self.lists), 1)
+            while capacity < end:
+                capacity *= 2
+            grown = np.empty(capacity, dtype=np.int32)
+            grown[: self.length] = self.lists[: self.length]
+            self.lists = grown
+        self.lists[self.length : end] = lists
+        self.length = end
+
+    def _write_lists(self, start: int, end: int) -> None:
+        """Write the clusters of rows start to end, rewriting the file if start is 0"""
+        with self.lists_filename.open("wb" if start == 0 else "r+b") as f:
+            if start:
+                f.truncate(NPY_HEADER_SIZE + start * 4)
+                f.seek(0, os.SEEK_END)
+            else:
+                f.write(npy_header(0, "int32", dim=None))
+            f.write(self.lists[start:end].tobytes())
+            f.seek(0)
+            f.write(npy_header(end, "int32", dim=None))
 
 
 class LocalCache(MemoryProviderSingleton):
-    """A class that stores the memory in a local file"""
+    """
+    A class that stores the memory in local files:
+
+    - {memory_index}.npy holds the embeddings, one row per text, in the .npy
+      format so that it can be memory-mapped instead of parsed
+    - {memory_index}.scales.npy holds the scale of each row if they are int8
+    - {memory_index}.jsonl holds the texts, one JSON string per line
+    - {memory_index}.json is a small header with the dtype of the embeddings and
+      the number of rows written
+    - {memory_index}.ivf.npy and {memory_index}.ivf_lists.npy hold the IVFIndex,
+      if LOCAL_CACHE_INDEX is ivf
+
+    New rows are appended to the files, and the header is updated last, so that
+    rows of an interrupted write are dropped when the files are loaded again.
+    """
 
     def __init__(self, cfg) -> None:
-        """Initialize a class instance
+        """Initialize a class instance, loading the memory left by a previous run
 
         Args:
             cfg: Config object
@@ -40,14 +413,33 @@ class LocalCache(MemoryProviderSingleton):
         """
         workspace_path = Path(cfg.workspace_path)
         self.filename = workspace_path / f"{cfg.memory_index}.json"
-
-        self.filename.touch(exist_ok=True)
-
-        file_content = b"{}"
-        with self.filename.open("w+b") as f:
-            f.write(file_content)
-
-        self.data = CacheContent()
+        self.vectors_filename = workspace_path / f"{cfg.memory_index}.npy"
+        self.scales_filename = workspace_path / f"{cfg.memory_index}.scales.npy"
+        self.texts_filename = workspace_path / f"{cfg.memory_index}.jsonl"
+        if cfg.local_cache_dtype not in STORAGE_DTYPES:
+            raise ValueError(
+                f"Unknown local cache dtype {cfg.local_cache_dtype}, "
+                f"use one of {', '.join(STORAGE_DTYPES)}"
+            )
+        self.dtype = cfg.local_cache_dtype
+        self.index = None
+        if cfg.local_cache_index == "ivf":
+            self.index = IVFIndex(
+                workspace_path / f"{cfg.memory_index}.ivf.npy",
+                workspace_path / f"{cfg.memory_index}.ivf_lists.npy",
+                n_lists=cfg.local_cache_ivf_lists,
+                n_probe=cfg.local_cache_ivf_probes,
+                min_rows=cfg.local_cache_ivf_min_rows,
+            )
+        elif cfg.local_cache_index != "flat":
+            raise ValueError(
+                f"Unknown local cache index {cfg.local_cache_index}, use flat or ivf"
+            )
+
+        self.data = self._load()
+        self.record_stored(self.data.texts)
+        if self.index:
+            self.index.load(self.data)
 
     def add(self, text: str):
         """
@@ -57,38 +449,160 @@ class LocalCache(MemoryProviderSingleton):
         Args:
             text: str
 
-        Returns: None
+        Returns: The text, or ALREADY_STORED if it was stored already
         """
         if "Command Error:" in text:
             return ""
-        self.data.texts.append(text)
-
+        if self.skip_stored([text])[0]:
+            return ALREADY_STORED
         embedding = get_ada_embedding(text)
+        self.data.add(text, embedding)
 
-        vector = np.array(embedding).astype(np.float32)
-        vector = vector[np.newaxis, :]
-        self.data.embeddings = np.concatenate(
-            [
-                self.data.embeddings,
-                vector,
-            ],
-            axis=0,
-        )
-
-        with open(self.filename, "wb") as f:
-            out = orjson.dumps(self.data, option=SAVE_OPTIONS)
-            f.write(out)
+        self._append([text])
+        self.record_stored([text])
+        if self.index:
+            self.index.update(self.data)
         return text
 
+    def add_many(self, texts: List[str]) -> List[str]:
+        """
+        Add many texts at once, embedding them in as few requests as possible
+
+        Args:
+            texts: List[str]
+
+        Returns: The texts that were added, or "" for skipped ones
+        """
+        candidates = [text for text in texts if "Command Error:" not in text]
+        skipped = self.skip_stored(candidates)
+        texts_to_add = [text for text, skip in zip(candidates, skipped) if not skip]
+        if texts_to_add:
+            embeddings = get_ada_embeddings(texts_to_add)
+            self.data.add_many(texts_to_add, embeddings)
+
+            self._append(texts_to_add)
+            self.record_stored(texts_to_add)
+            if self.index:
+                self.index.update(self.data)
+        added = iter(not skip for skip in skipped)
+        return [
+            text if "Command Error:" not in text and next(added) else ""
+            for text in texts
+        ]
+
     def clear(self) -> str:
         """
-        Clears the data in memory.
+        Clears the data in memory and in the memory files.
 
         Returns: A message indicating that the memory has been cleared.
         """
-        self.data = CacheContent()
+        self.data = CacheContent(dtype=self.dtype)
+        self._wipe()
+        self.content_hashes.clear()
+        if self.index:
+            self.index.clear()
         return "Obliviated"
 
+    def _load(self) -> CacheContent:
+        """Load the rows committed in the header, memory-mapping the embeddings"""
+        try:
+            header = orjson.loads(self.filename.read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            header = {}
+        if header.get("version") != FORMAT_VERSION or not header.get("count"):
+            return self._wipe()
+        dtype = header["dtype"]
+        if dtype != self.dtype:
+            logger.warn(
+                f"The local memory holds {dtype} embeddings, new ones are stored as"
+                f" {dtype} too until it is cleared, instead of as {self.dtype}"
+            )
+
+        texts = []
+        texts_end = [0]
+        try:
+            with self.texts_filename.open("rb") as f:
+                for line in itertools.islice(f, header["count"]):
+                    if not line.endswith(b"\n"):
+                        break
+                    texts.append(orjson.loads(line))
+                    texts_end.append(texts_end[-1] + len(line))
+            row_size = EMBED_DIM * np.dtype(STORAGE_DTYPES[dtype]).itemsize
+            count = min(len(texts), self._rows(self.vectors_filename, row_size))
+            if dtype == "int8":
+                count = min(count, self._rows(self.scales_filename, 4))
+        except FileNotFoundError:
+            return self._wipe()
+        if count == 0:
+            return self._wipe()
+
+        # Drop the rows of an interrupted write, and anything after them
+        os.truncate(self.texts_filename, texts_end[count])
+        with self.vectors_filename.open("r+b") as f:
+            f.truncate(NPY_HEADER_SIZE + count * row_size)
+            f.write(npy_header(count, dtype))
+        if dtype == "int8":
+            with self.scales_filename.open("r+b") as f:
+                f.truncate(NPY_HEADER_SIZE + count * 4)
+                f.write(npy_header(count, "float32", dim=None))
+        self._write_header(count, dtype)
+
+        content = CacheContent(
+            texts=texts[:count],
+            buffer=np.load(self.vectors_filename, mmap_mode="r"),
+            length=count,
+            dtype=dtype,
+        )
+        if dtype == "int8":
+            content.scales = np.load(self.scales_filename, mmap_mode="r")
+        return content
+
+    @staticmethod
+    def _rows(filename: Path, row_size: int) -> int:
+        return max(filename.stat().st_size - NPY_HEADER_SIZE, 0) // row_size
+
+    def _append(self, texts: List[str]) -> None:
+        """Append the last rows of self.data to the files, and commit them"""
+        count = self.data.length
+        dtype = self.data.dtype
+        added = slice(count - len(texts), count)
+        with self.texts_filename.open("ab") as f:
+            f.writelines(orjson.dumps(text) + b"\n" for text in texts)
+        with self.vectors_filename.open("r+b") as f:
+            f.seek(0, os.SEEK_END)
+            f.write(self.data.buffer[added].tobytes())
+            f.seek(0)
+            f.write(npy_header(count, dtype))
+        if dtype == "int8":
+            with self.scales_filename.open("r+b") as f:
+                f.seek(0, os.SEEK_END)
+                f.write(self.data.scales[added].tobytes())
+                f.seek(0)
+                f.write(npy_header(count, "float32", dim=None))
+        self._write_header(count, dtype)
+
+    def _wipe(self) -> CacheContent:
+        """Empty the files, storing new embeddings with the configured dtype"""
+        self.texts_filename.write_bytes(b"")
+        self.vectors_filename.write_bytes(npy_header(0, self.dtype))
+        if self.dtype == "int8":
+            self.scales_filename.write_bytes(npy_header(0, "float32", dim=None))
+        else:
+            self.scales_filename.unlink(missing_ok=True)
+        self._write_header(0, self.dtype)
+        return CacheContent(dtype=self.dtype)
+
+    def _write_header(self, count: int, dtype: str) -> None:
+        header = {
+            "version": FORMAT_VERSION,
+            "dtype": dtype,
+            "dim": EMBED_DIM,
+            "count": count,
+        }
+        temp_filename = self.filename.with_suffix(".json.tmp")
+        temp_filename.write_bytes(orjson.dumps(header))
+        os.replace(temp_filename, self.filename)
+
     def get(self, data: str) -> list[Any] | None:
         """
         Gets the data from the memory that is most relevant to the given data.
@@ -100,7 +614,9 @@ class LocalCache(MemoryProviderSingleton):
         """
         return self.get_relevant(data, 1)
 
-    def get_relevant(self, text: str, k: int) -> list[Any]:
+    def get_relevant(
+        self, text: str, k: int, min_score: Optional[float] = None
+    ) -> list[Any]:
         """ "
         matrix-vector mult to find score-for-each-row-of-matrix
          get indices for top-k winning scores
@@ -108,19 +624,65 @@ class LocalCache(MemoryProviderSingleton):
         Args:
             text: str
             k: int
+            min_score: Leave out texts that score lower than this
 
         Returns: List[str]
         """
         embedding = get_ada_embedding(text)
 
-        scores = np.dot(self.data.embeddings, embedding)
+        return self._search(np.asarray(embedding, dtype=np.float32), k, min_score)
 
-        top_k_indices = np.argsort(scores)[-k:][::-1]
+    def get_relevant_many(
+        self, texts: List[str], k: int, min_score: Optional[float] = None
+    ) -> List[List[str]]:
+        """
+        Get the relevant texts for many queries, embedding them in as few requests
+        as possible and, without an index, scoring them with a single
+        matrix-matrix product
 
-        return [self.data.texts[i] for i in top_k_indices]
+        Args:
+            texts: List[str]
+            k: int
+            min_score: Leave out texts that score lower than this
+
+        Returns: The relevant texts of each query
+        """
+        if not texts:
+            return []
+        embeddings = np.array(get_ada_embeddings(texts), dtype=np.float32)
+        if self.index and self.index.trained:
+            return [self._search(embedding, k, min_score) for embedding in embeddings]
+
+        scores = self.data.scores(embeddings)
+
+        return [self._top_k_texts(row, k, min_score) for row in scores]
+
+    def _search(
+        self, embedding: np.ndarray, k: int, min_score: Optional[float]
+    ) -> List[str]:
+        """Score the rows in the clusters nearest to a query, or all rows"""
+        if not (self.index and self.index.trained):
+            return self._top_k_texts(self.data.scores(embedding), k, min_score)
+        rows = self.index.candidates(embedding)
+        scores = self.data.scores(embedding, rows)
+        return self._top_k_texts(scores, k, min_score, rows)
+
+    def _top_k_texts(
+        self,
+        scores: np.ndarray,
+        k: int,
+        min_score: Optional[float],
+        rows: Optional[np.ndarray] = None,
+    ) -> List[str]:
+        indices = top_k_indices(scores, k)
+        if min_score is not None:
+            indices = indices[scores[indices] >= min_score]
+        if rows is not None:
+            indices = rows[indices]
+        return [self.data.texts[i] for i in indices]
 
     def get_stats(self) -> tuple[int, tuple[int, ...]]:
         """
         Returns: The stats of the local cache.
         """
-        return len(self.data.texts), self.data.embeddings.shape
+        return len(self.data.texts), (self.data.length, self.data.buffer.shape[1])
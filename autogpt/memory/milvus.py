@@ -1,11 +1,15 @@
 """ Milvus memory storage provider."""
+import json
 import re
 
 from pymilvus import Collection, CollectionSchema, DataType, FieldSchema, connections
 
 from autogpt.config import Config
-from autogpt.llm import get_ada_embedding
-from autogpt.memory.base import MemoryProviderSingleton
+from autogpt.llm import get_ada_embedding, get_ada_embeddings
+from autogpt.memory.base import ALREADY_STORED, MemoryProviderSingleton, content_hash
+
+# Number of content hashes looked up per query
+LOOKUP_BATCH_SIZE = 1000
 
 
 class MilvusMemory(MemoryProviderSingleton):
@@ -75,6 +79,7 @@ class MilvusMemory(MemoryProviderSingleton):
             FieldSchema(name="pk", dtype=DataType.INT64, is_primary=True, auto_id=True),
             FieldSchema(name="embeddings", dtype=DataType.FLOAT_VECTOR, dim=1536),
             FieldSchema(name="raw_text", dtype=DataType.VARCHAR, max_length=65535),
+            FieldSchema(name="content_hash", dtype=DataType.VARCHAR, max_length=64),
         ]
 
         # create collection if not exist and load it.
@@ -99,14 +104,63 @@ class MilvusMemory(MemoryProviderSingleton):
         Returns:
             str: log.
         """
+        if self.skip_stored([data])[0]:
+            return ALREADY_STORED
         embedding = get_ada_embedding(data)
-        result = self.collection.insert([[embedding], [data]])
+        result = self.collection.insert([[embedding], [data], [content_hash(data)]])
         _text = (
             "Inserting data into memory at primary key: "
             f"{result.primary_keys[0]}:\n data: {data}"
         )
         return _text
 
+    def add_many(self, data: list[str]) -> list[str]:
+        """Add the embeddings of many data into memory with one insert.
+
+        Args:
+            data (list[str]): The raw texts to construct embedding indexes.
+
+        Returns:
+            list[str]: log for each text, empty for texts that were stored already.
+        """
+        skipped = self.skip_stored(data)
+        data_to_add = [item for item, skip in zip(data, skipped) if not skip]
+        if not data_to_add:
+            return ["" for _ in data]
+        embeddings = get_ada_embeddings(data_to_add)
+        hashes = [content_hash(item) for item in data_to_add]
+        result = self.collection.insert([embeddings, data_to_add, hashes])
+        primary_keys = iter(result.primary_keys)
+        return [
+            ""
+            if skip
+            else f"Inserting data into memory at primary key: {next(primary_keys)}:\n"
+            f" data: {item}"
+            for item, skip in zip(data, skipped)
+        ]
+
+    def is_stored(self, data: list[str]) -> list[bool]:
+        """Look the content hashes of texts up in the collection.
+
+        Args:
+            data (list[str]): The texts to look up.
+
+        Returns:
+            list[bool]: Whether each text is stored.
+        """
+        hashes = [content_hash(item) for item in data]
+        stored = set()
+        for start in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+            batch = hashes[start : start + LOOKUP_BATCH_SIZE]
+            results = self.collection.query(
+                expr=f"content_hash in {json.dumps(batch)}",
+                output_fields=["content_hash"],
+                # See the texts inserted right before
+                consistency_level="Strong",
+            )
+            stored.update(result["content_hash"] for result in results)
+        return [item_hash in stored for item_hash in hashes]
+
     def get(self, data):
         """Return the most relevant data in memory.
         Args:
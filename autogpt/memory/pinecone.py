@@ -1,9 +1,9 @@
 import pinecone
 from colorama import Fore, Style
 
-from autogpt.llm import get_ada_embedding
+from autogpt.llm import get_ada_embeddings
 from autogpt.logs import logger
-from autogpt.memory.base import MemoryProviderSingleton
+from autogpt.memory.base import ALREADY_STORED, MemoryProviderSingleton, content_hash
 
 
 class PineconeMemory(MemoryProviderSingleton):
@@ -15,11 +15,7 @@ class PineconeMemory(MemoryProviderSingleton):
         metric = "cosine"
         pod_type = "p1"
         table_name = "auto-gpt"
-        # this assumes we don't start with memory.
-        # for now this works.
-        # we'll need a more complicated and robust system if we want to start with
-        #  memory.
-        self.vec_num = 0
+        self.batch_size = cfg.pinecone_batch_size
 
         try:
             pinecone.whoami()
@@ -44,21 +40,59 @@ class PineconeMemory(MemoryProviderSingleton):
             pinecone.create_index(
                 table_name, dimension=dimension, metric=metric, pod_type=pod_type
             )
-        self.index = pinecone.Index(table_name)
+        self.index = pinecone.Index(table_name, pool_threads=cfg.pinecone_pool_threads)
 
     def add(self, data):
-        vector = get_ada_embedding(data)
-        # no metadata here. We may wish to change that long term.
-        self.index.upsert([(str(self.vec_num), vector, {"raw_text": data})])
-        _text = f"Inserting data into memory at index: {self.vec_num}:\n data: {data}"
-        self.vec_num += 1
-        return _text
+        # add_many only returns an empty message for texts that are skipped
+        return self.add_many([data])[0] or ALREADY_STORED
+
+    def add_many(self, data):
+        """
+        Add many texts with one embedding request. Vectors are upserted
+        cfg.pinecone_batch_size at a time, with the batches sent in parallel.
+        The id of a vector is the content hash of its text, so a text that is
+        added again overwrites itself instead of being stored twice.
+        """
+        skipped = self.skip_stored(data)
+        data_to_add = [item for item, skip in zip(data, skipped) if not skip]
+        if not data_to_add:
+            return ["" for _ in data]
+        vectors = get_ada_embeddings(data_to_add)
+        items = [
+            (content_hash(item), vector, {"raw_text": item})
+            for item, vector in zip(data_to_add, vectors)
+        ]
+        requests = [
+            self.index.upsert(items[start : start + self.batch_size], async_req=True)
+            for start in range(0, len(items), self.batch_size)
+        ]
+        for request in requests:
+            request.get()
+        ids = iter(item[0] for item in items)
+        return [
+            ""
+            if skip
+            else f"Inserting data into memory at index: {next(ids)}:\n data: {item}"
+            for item, skip in zip(data, skipped)
+        ]
+
+    def is_stored(self, data):
+        """Look the content hashes of texts up as vector ids, in parallel batches"""
+        ids = [content_hash(item) for item in data]
+        requests = [
+            self.index.fetch(ids[start : start + self.batch_size], async_req=True)
+            for start in range(0, len(ids), self.batch_size)
+        ]
+        stored_ids = set()
+        for request in requests:
+            stored_ids.update(request.get().vectors)
+        return [vector_id in stored_ids for vector_id in ids]
 
     def get(self, data):
         return self.get_relevant(data, 1)
 
     def clear(self):
-        self.index.delete(deleteAll=True)
+        self.index.delete(delete_all=True)
         return "Obliviated"
 
     def get_relevant(self, data, num_relevant=5):
@@ -67,12 +101,27 @@ class PineconeMemory(MemoryProviderSingleton):
         :param data: The data to compare to.
         :param num_relevant: The number of relevant data to return. Defaults to 5
         """
-        query_embedding = get_ada_embedding(data)
-        results = self.index.query(
-            query_embedding, top_k=num_relevant, include_metadata=True
-        )
-        sorted_results = sorted(results.matches, key=lambda x: x.score)
-        return [str(item["metadata"]["raw_text"]) for item in sorted_results]
+        return self.get_relevant_many([data], num_relevant)[0]
+
+    def get_relevant_many(self, data, num_relevant=5):
+        """
+        Returns the relevant data for many queries, which are embedded with one
+        request and sent in parallel through the thread pool of the index.
+        :param data: The data to compare to.
+        :param num_relevant: The number of relevant data to return per query.
+        """
+        if not data:
+            return []
+        query_embeddings = get_ada_embeddings(data)
+
+        def query(query_embedding):
+            results = self.index.query(
+                query_embedding, top_k=num_relevant, include_metadata=True
+            )
+            sorted_results = sorted(results.matches, key=lambda x: x.score)
+            return [str(item["metadata"]["raw_text"]) for item in sorted_results]
+
+        return self.index.pool.map(query, query_embeddings)
 
     def get_stats(self):
         return self.index.describe_index_stats()
@@ -1,18 +1,21 @@
 """Redis memory provider."""
 from __future__ import annotations
 
+import asyncio
+from itertools import count
 from typing import Any
 
 import numpy as np
 import redis
+import redis.asyncio
 from colorama import Fore, Style
 from redis.commands.search.field import TextField, VectorField
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 from redis.commands.search.query import Query
 
-from autogpt.llm import get_ada_embedding
+from autogpt.llm import get_ada_embedding, get_ada_embeddings
 from autogpt.logs import logger
-from autogpt.memory.base import MemoryProviderSingleton
+from autogpt.memory.base import ALREADY_STORED, MemoryProviderSingleton, content_hash
 
 SCHEMA = [
     TextField("data"),
@@ -23,6 +26,14 @@ SCHEMA = [
     ),
 ]
 
+# Gives back the id reserved by an INCRBY, unless a later one was reserved since
+RELEASE_ID_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DECR", KEYS[1])
+end
+return 0
+"""
+
 
 class RedisMemory(MemoryProviderSingleton):
     def __init__(self, cfg):
@@ -34,15 +45,16 @@ class RedisMemory(MemoryProviderSingleton):
 
         Returns: None
         """
-        redis_host = cfg.redis_host
-        redis_port = cfg.redis_port
-        redis_password = cfg.redis_password
         self.dimension = 1536
+        self.connection_kwargs = {
+            "host": cfg.redis_host,
+            "port": cfg.redis_port,
+            "password": cfg.redis_password,
+            "db": 0,  # Cannot be changed
+            "max_connections": cfg.redis_max_connections,
+        }
         self.redis = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            db=0,  # Cannot be changed
+            connection_pool=redis.ConnectionPool(**self.connection_kwargs)
         )
         self.cfg = cfg
 
@@ -74,12 +86,15 @@ class RedisMemory(MemoryProviderSingleton):
             )
         except Exception as e:
             logger.warn("Error creating Redis search index: ", e)
-        existing_vec_num = self.redis.get(f"{cfg.memory_index}-vec_num")
+        self.hashes_key = f"{cfg.memory_index}-hashes"
+        self.vec_num_key = f"{cfg.memory_index}-vec_num"
+        existing_vec_num = self.redis.get(self.vec_num_key)
         self.vec_num = int(existing_vec_num.decode("utf-8")) if existing_vec_num else 0
 
     def add(self, data: str) -> str:
         """
-        Adds a data point to the memory.
+        Adds a data point to the memory. It is looked up and its id is reserved
+        in one round trip, and it is written in another.
 
         Args:
             data: The data to add.
@@ -88,18 +103,143 @@ class RedisMemory(MemoryProviderSingleton):
         """
         if "Command Error:" in data:
             return ""
-        vector = get_ada_embedding(data)
-        vector = np.array(vector).astype(np.float32).tobytes()
-        data_dict = {b"data": data, "embedding": vector}
-        pipe = self.redis.pipeline()
-        pipe.hset(f"{self.cfg.memory_index}:{self.vec_num}", mapping=data_dict)
-        _text = (
-            f"Inserting data into memory at index: {self.vec_num}:\n" f"data: {data}"
-        )
-        self.vec_num += 1
-        pipe.set(f"{self.cfg.memory_index}-vec_num", self.vec_num)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.smismember(self.hashes_key, [content_hash(data)])
+        pipe.incrby(self.vec_num_key, 1)
+        found, last_id = pipe.execute()
+        if self.skip_stored([data], [bool(found[0])])[0]:
+            self.redis.eval(RELEASE_ID_SCRIPT, 1, self.vec_num_key, last_id)
+            return ALREADY_STORED
+        vec_id = self._reserve_ids(last_id, 1)
+        pipe = self.redis.pipeline(transaction=False)
+        self._queue_batch(pipe, vec_id, [data], get_ada_embeddings([data]))
         pipe.execute()
-        return _text
+        return self._messages([data], [False], vec_id)[0]
+
+    def add_many(self, data: list[str]) -> list[str]:
+        """
+        Adds many data points to the memory. Their ids are reserved with a single
+        INCRBY, and they are embedded and written cfg.redis_pipeline_size at a
+        time, with one embedding request and one pipeline per batch.
+
+        Args:
+            data: The data to add.
+
+        Returns: A message for each data point indicating that it has been added.
+        """
+        candidates = [item for item in data if "Command Error:" not in item]
+        skipped = self.skip_stored(candidates)
+        data_to_add = [item for item, skip in zip(candidates, skipped) if not skip]
+        if not data_to_add:
+            return ["" for _ in data]
+        last_id = self.redis.incrby(self.vec_num_key, len(data_to_add))
+        first_id = self._reserve_ids(last_id, len(data_to_add))
+        batch_size = self.cfg.redis_pipeline_size
+        for start in range(0, len(data_to_add), batch_size):
+            batch = data_to_add[start : start + batch_size]
+            pipe = self.redis.pipeline(transaction=False)
+            self._queue_batch(pipe, first_id + start, batch, get_ada_embeddings(batch))
+            pipe.execute()
+        return self._messages(data, skipped, first_id)
+
+    async def aadd_many(self, data: list[str]) -> list[str]:
+        """
+        Adds many data points to the memory like add_many, but through
+        redis.asyncio, writing each batch while the next one is being embedded.
+        At most cfg.redis_max_connections batches are written at a time.
+
+        Args:
+            data: The data to add.
+
+        Returns: A message for each data point indicating that it has been added.
+        """
+        # The connections of a redis.asyncio client belong to the event loop they
+        # were opened in, so every call gets a client of its own
+        client = self._async_client()
+        try:
+            return await self._aadd_many(client, data)
+        finally:
+            await client.close(close_connection_pool=True)
+
+    async def _aadd_many(self, client, data: list[str]) -> list[str]:
+        """Adds many data points to the memory through the given client"""
+        candidates = [item for item in data if "Command Error:" not in item]
+        hashes = [content_hash(item) for item in candidates]
+        found = await client.smismember(self.hashes_key, hashes) if hashes else []
+        skipped = self.skip_stored(candidates, [bool(item) for item in found])
+        data_to_add = [item for item, skip in zip(candidates, skipped) if not skip]
+        if not data_to_add:
+            return ["" for _ in data]
+        last_id = await client.incrby(self.vec_num_key, len(data_to_add))
+        first_id = self._reserve_ids(last_id, len(data_to_add))
+        loop = asyncio.get_running_loop()
+        batch_size = self.cfg.redis_pipeline_size
+        # The pool raises instead of waiting once all its connections are in use
+        connections = asyncio.Semaphore(self.cfg.redis_max_connections)
+
+        async def write(pipe) -> None:
+            async with connections:
+                await pipe.execute()
+
+        writes = []
+        for start in range(0, len(data_to_add), batch_size):
+            batch = data_to_add[start : start + batch_size]
+            vectors = await loop.run_in_executor(None, get_ada_embeddings, batch)
+            pipe = client.pipeline(transaction=False)
+            self._queue_batch(pipe, first_id + start, batch, vectors)
+            writes.append(asyncio.ensure_future(write(pipe)))
+        await asyncio.gather(*writes)
+        return self._messages(data, skipped, first_id)
+
+    def _async_client(self) -> redis.asyncio.Redis:
+        """A redis.asyncio client of the server, with a connection pool of its own"""
+        return redis.asyncio.Redis(
+            connection_pool=redis.asyncio.ConnectionPool(**self.connection_kwargs)
+        )
+
+    def _reserve_ids(self, last_id: int, reserved: int) -> int:
+        """Take note of the ids reserved by an INCRBY, and return the first one"""
+        self.vec_num = max(self.vec_num, last_id)
+        return last_id - reserved
+
+    def _queue_batch(
+        self, pipe, first_id: int, batch: list[str], vectors: list[list[float]]
+    ) -> None:
+        """Queue the writes of a batch of data points on a pipeline"""
+        for vec_id, item, vector in zip(count(first_id), batch, vectors):
+            data_dict = {
+                b"data": item,
+                "embedding": np.array(vector).astype(np.float32).tobytes(),
+            }
+            pipe.hset(f"{self.cfg.memory_index}:{vec_id}", mapping=data_dict)
+        pipe.sadd(self.hashes_key, *(content_hash(item) for item in batch))
+
+    @staticmethod
+    def _messages(data: list[str], skipped: list[bool], first_id: int) -> list[str]:
+        """The message of each data point, empty for those that were not added"""
+        added = iter(not skip for skip in skipped)
+        ids = count(first_id)
+        return [
+            f"Inserting data into memory at index: {next(ids)}:\ndata: {item}"
+            if "Command Error:" not in item and next(added)
+            else ""
+            for item in data
+        ]
+
+    def is_stored(self, data: list[str]) -> list[bool]:
+        """
+        Check whether texts are stored already, in the set of the content hashes
+        of the stored texts that is kept next to the index.
+
+        Args:
+            data: The texts to look up.
+
+        Returns: Whether each text is stored.
+        """
+        if not data:
+            return []
+        hashes = [content_hash(item) for item in data]
+        return [bool(found) for found in self.redis.smismember(self.hashes_key, hashes)]
 
     def get(self, data: str) -> list[Any] | None:
         """
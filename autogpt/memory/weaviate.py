@@ -1,11 +1,13 @@
+import threading
+
 import weaviate
 from weaviate import Client
 from weaviate.embedded import EmbeddedOptions
 from weaviate.util import generate_uuid5
 
-from autogpt.llm import get_ada_embedding
+from autogpt.llm import get_ada_embedding, get_ada_embeddings
 from autogpt.logs import logger
-from autogpt.memory.base import MemoryProviderSingleton
+from autogpt.memory.base import ALREADY_STORED, MemoryProviderSingleton
 
 
 def default_schema(weaviate_index):
@@ -27,20 +29,35 @@ class WeaviateMemory(MemoryProviderSingleton):
 
         url = f"{cfg.weaviate_protocol}://{cfg.weaviate_host}:{cfg.weaviate_port}"
 
+        # (connect, read) timeouts, the latter also bounding every batch request
+        timeout_config = (10, cfg.weaviate_timeout)
         if cfg.use_weaviate_embedded:
             self.client = Client(
                 embedded_options=EmbeddedOptions(
                     hostname=cfg.weaviate_host,
                     port=int(cfg.weaviate_port),
                     persistence_data_path=cfg.weaviate_embedded_path,
-                )
+                ),
+                timeout_config=timeout_config,
             )
 
             logger.info(
                 f"Weaviate Embedded running on: {url} with persistence path: {cfg.weaviate_embedded_path}"
             )
         else:
-            self.client = Client(url, auth_client_secret=auth_credentials)
+            self.client = Client(
+                url, auth_client_secret=auth_credentials, timeout_config=timeout_config
+            )
+
+        self.batch_size = cfg.weaviate_batch_size
+        self.batch_errors = {}
+        self._batch_errors_lock = threading.Lock()
+        self.client.batch.configure(
+            batch_size=cfg.weaviate_batch_size,
+            dynamic=True,
+            num_workers=cfg.weaviate_batch_workers,
+            callback=self._collect_batch_errors,
+        )
 
         self.index = WeaviateMemory.format_classname(cfg.memory_index)
         self._create_schema()
@@ -70,21 +87,96 @@ class WeaviateMemory(MemoryProviderSingleton):
         else:
             return None
 
-    def add(self, data):
-        vector = get_ada_embedding(data)
+    def is_stored(self, data):
+        """
+        Look the texts up by the uuid derived from them, with one query per
+        cfg.weaviate_batch_size of them. Texts are taken as not stored if a lookup
+        fails, which is harmless since adding an object again overwrites it.
+        """
+        uuids = [generate_uuid5(item, self.index) for item in data]
+        stored = set()
+        for start in range(0, len(uuids), self.batch_size):
+            chunk = uuids[start : start + self.batch_size]
+            result = (
+                self.client.query.get(self.index)
+                .with_additional(["id"])
+                .with_where(
+                    {
+                        "path": ["id"],
+                        "operator": "ContainsAny",
+                        "valueTextArray": chunk,
+                    }
+                )
+                .with_limit(len(chunk))
+                .do()
+            )
+            if "errors" in result:
+                logger.warn(f"Failed to look up stored texts: {result['errors']}")
+                continue
+            stored.update(
+                obj["_additional"]["id"] for obj in result["data"]["Get"][self.index]
+            )
+        return [doc_uuid in stored for doc_uuid in uuids]
 
-        doc_uuid = generate_uuid5(data, self.index)
-        data_object = {"raw_text": data}
+    def add(self, data):
+        message = self.add_many([data])[0]
+        # add_many returns an empty message for skipped texts and failed objects
+        if message or self.batch_errors:
+            return message
+        return ALREADY_STORED
+
+    def add_many(self, data):
+        """
+        Add many texts with one embedding request, streaming the objects and their
+        vectors through the batching configured in __init__. Objects that Weaviate
+        fails to store are logged and get an empty message, and their errors are
+        kept in self.batch_errors by uuid until the next add.
+        """
+        skipped = self.skip_stored(data)
+        data_to_add = [item for item, skip in zip(data, skipped) if not skip]
+        vectors = iter(get_ada_embeddings(data_to_add) if data_to_add else [])
+        uuids = []
+        self.batch_errors = {}
 
         with self.client.batch as batch:
-            batch.add_data_object(
-                uuid=doc_uuid,
-                data_object=data_object,
-                class_name=self.index,
-                vector=vector,
-            )
-
-        return f"Inserting data into memory at uuid: {doc_uuid}:\n data: {data}"
+            for item, skip in zip(data, skipped):
+                if skip:
+                    uuids.append(None)
+                    continue
+                doc_uuid = generate_uuid5(item, self.index)
+                batch.add_data_object(
+                    uuid=doc_uuid,
+                    data_object={"raw_text": item},
+                    class_name=self.index,
+                    vector=next(vectors),
+                )
+                uuids.append(doc_uuid)
+
+        texts = []
+        for item, doc_uuid in zip(data, uuids):
+            if doc_uuid is None:
+                texts.append("")
+            elif doc_uuid in self.batch_errors:
+                logger.warn(
+                    f"Failed to insert data into memory at uuid: {doc_uuid}:"
+                    f" {self.batch_errors[doc_uuid]}"
+                )
+                texts.append("")
+            else:
+                texts.append(
+                    f"Inserting data into memory at uuid: {doc_uuid}:\n data: {item}"
+                )
+        return texts
+
+    def _collect_batch_errors(self, results):
+        """Batch callback that keeps the errors of the objects that failed"""
+        for result in results or []:
+            errors = result.get("result", {}).get("errors", {}).get("error")
+            if errors:
+                with self._batch_errors_lock:
+                    self.batch_errors[result["id"]] = "; ".join(
+                        error["message"] for error in errors
+                    )
 
     def get(self, data):
         return self.get_relevant(data, 1)
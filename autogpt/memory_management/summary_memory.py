@@ -1,50 +1,22 @@
+from __future__ import annotations
+
 import copy
 import json
-from typing import Dict, List, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-from autogpt.agent import Agent
 from autogpt.config import Config
+from autogpt.llm.api_manager import ApiManager
 from autogpt.llm.llm_utils import create_chat_completion
+from autogpt.llm.router import ModelRouter
+from autogpt.llm.token_counter import count_message_tokens, count_string_tokens
 from autogpt.log_cycle.log_cycle import PROMPT_SUMMARY_FILE_NAME, SUMMARY_FILE_NAME
+from autogpt.logs import logger
 
-cfg = Config()
-
-
-def get_newly_trimmed_messages(
-    full_message_history: List[Dict[str, str]],
-    current_context: List[Dict[str, str]],
-    last_memory_index: int,
-) -> Tuple[List[Dict[str, str]], int]:
-    """
-    This function returns a list of dictionaries contained in full_message_history
-    with an index higher than prev_index that are absent from current_context.
-
-    Args:
-        full_message_history (list): A list of dictionaries representing the full message history.
-        current_context (list): A list of dictionaries representing the current context.
-        last_memory_index (int): An integer representing the previous index.
-
-    Returns:
-        list: A list of dictionaries that are in full_message_history with an index higher than last_memory_index and absent from current_context.
-        int: The new index value for use in the next loop.
-    """
-    # Select messages in full_message_history with an index higher than last_memory_index
-    new_messages = [
-        msg for i, msg in enumerate(full_message_history) if i > last_memory_index
-    ]
-
-    # Remove messages that are already present in current_context
-    new_messages_not_in_context = [
-        msg for msg in new_messages if msg not in current_context
-    ]
-
-    # Find the index of the last message processed
-    new_index = last_memory_index
-    if new_messages_not_in_context:
-        last_message = new_messages_not_in_context[-1]
-        new_index = full_message_history.index(last_message)
+if TYPE_CHECKING:
+    from autogpt.agent import Agent
 
-    return new_messages_not_in_context, new_index
+cfg = Config()
 
 
 def update_running_summary(
@@ -91,6 +63,31 @@ def update_running_summary(
     if len(new_events) == 0:
         new_events = "Nothing new happened."
 
+    messages = _summary_prompt(current_memory, new_events)
+    agent.log_cycle_handler.log_cycle(
+        agent.config.ai_name,
+        agent.created_at,
+        agent.cycle_count,
+        messages,
+        PROMPT_SUMMARY_FILE_NAME,
+    )
+
+    current_memory = create_chat_completion(
+        messages, ModelRouter().route("summarize", messages)
+    )
+
+    agent.log_cycle_handler.log_cycle(
+        agent.config.ai_name,
+        agent.created_at,
+        agent.cycle_count,
+        current_memory,
+        SUMMARY_FILE_NAME,
+    )
+
+    return summary_message(current_memory)
+
+
+def _summary_prompt(current_memory: str, new_events) -> List[Dict[str, str]]:
     prompt = f'''Your task is to create a concise running summary of actions and information results in the provided text, focusing on key and potentially important information to remember.
 
 You will receive the current summary and the your latest actions. Combine them, adding relevant key information from the latest development in 1st person past tense and keeping the summary concise.
@@ -106,33 +103,128 @@ Latest Development:
 """
 '''
 
-    messages = [
+    return [
         {
             "role": "user",
             "content": prompt,
         }
     ]
-    agent.log_cycle_handler.log_cycle(
-        agent.config.ai_name,
-        agent.created_at,
-        agent.cycle_count,
-        messages,
-        PROMPT_SUMMARY_FILE_NAME,
-    )
 
-    current_memory = create_chat_completion(messages, cfg.fast_llm_model)
 
-    agent.log_cycle_handler.log_cycle(
-        agent.config.ai_name,
-        agent.created_at,
-        agent.cycle_count,
-        current_memory,
-        SUMMARY_FILE_NAME,
-    )
-
-    message_to_return = {
+def summary_message(summary: str) -> Dict[str, str]:
+    """Wrap a running summary in the system message that is put in the context"""
+    return {
         "role": "system",
-        "content": f"This reminds you of these events from your past: \n{current_memory}",
+        "content": f"This reminds you of these events from your past: \n{summary}",
     }
 
-    return message_to_return
+
+class RunningSummaryUpdater:
+    """
+    Updates the running summary of an agent in a background thread, so that the
+    summary of the messages trimmed from the context is made while the previous
+    command runs instead of right before the next chat completion.
+
+    Trimmed messages are collected until they reach cfg.summary_batch_tokens tokens
+    or the oldest of them is cfg.summary_batch_max_cycles cycles old, and are then
+    summarized in a single call. Cycles without a call are recorded as skipped
+    summary updates in the ApiManager.
+
+    Updates run one at a time and in the order they were submitted, each one
+    building on the summary left by the one before.
+    """
+
+    def __init__(self, agent: Agent) -> None:
+        self.agent = agent
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="running_summary"
+        )
+        self._pending: Optional[Future] = None
+        self._batch: List[Dict[str, str]] = []
+        self._batch_tokens = 0
+        self._batch_started_at = 0
+
+    def add(self, new_events: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Collect new events for the next summary update. User messages are left
+        out, since update_running_summary drops them anyway.
+
+        Args:
+            new_events (List[Dict]): The messages to add to the summary.
+
+        Returns:
+            List[Dict]: The events that were collected.
+        """
+        new_events = [event for event in new_events if event["role"] != "user"]
+        if not new_events:
+            return new_events
+        if not self._batch:
+            self._batch_started_at = self.agent.cycle_count
+        self._batch.extend(new_events)
+        self._batch_tokens += count_message_tokens(new_events, cfg.fast_llm_model)
+        return new_events
+
+    def _batch_is_due(self) -> bool:
+        if not self._batch:
+            return False
+        return (
+            self._batch_tokens >= cfg.summary_batch_tokens
+            or self.agent.cycle_count - self._batch_started_at
+            >= cfg.summary_batch_max_cycles
+        )
+
+    def submit(self, new_events: List[Dict[str, str]]) -> None:
+        """
+        Collect new events, and start adding the collected events to the running
+        summary in the background once the batch is due. Otherwise the update of
+        this cycle, if it had any events, is skipped.
+
+        Args:
+            new_events (List[Dict]): The messages to add to the summary.
+        """
+        new_events = self.add(new_events)
+        if not self._batch_is_due():
+            if new_events:
+                self._skip_update(new_events)
+            return
+        events, self._batch, self._batch_tokens = self._batch, [], 0
+        self._pending = self._executor.submit(self._update, events)
+
+    def _update(self, new_events: List[Dict[str, str]]) -> None:
+        self.agent.summary_memory = update_running_summary(
+            self.agent, self.agent.summary_memory, new_events
+        )
+
+    def _skip_update(self, new_events: List[Dict[str, str]]) -> None:
+        """Record the update of new_events that would have been made without
+        batching"""
+        summary = self.agent.summary_memory
+        if isinstance(summary, dict):
+            summary = summary["content"]
+        prompt_tokens = count_message_tokens(
+            _summary_prompt(summary, new_events), cfg.fast_llm_model
+        )
+        completion_tokens = count_string_tokens(summary, cfg.fast_llm_model)
+        ApiManager().update_skipped_summary_updates(
+            prompt_tokens, completion_tokens, cfg.fast_llm_model
+        )
+
+    def wait(self, new_events: List[Dict[str, str]]) -> Dict[str, str]:
+        """
+        Collect new events and return the running summary, waiting for the
+        background update only if it isn't done yet.
+
+        Args:
+            new_events (List[Dict]): Messages to add that weren't submitted yet.
+
+        Returns:
+            dict: The summary message to put in the context.
+        """
+        self.add(new_events)
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            if not pending.done():
+                logger.debug("Waiting for the running summary to be updated")
+            pending.result()
+        summary = self.agent.summary_memory
+        return summary if isinstance(summary, dict) else summary_message(summary)
@@ -15,6 +15,7 @@ from auto_gpt_plugin_template import AutoGPTPluginTemplate
 from openapi_python_client.cli import Config as OpenAPIConfig
 
 from autogpt.config import Config
+from autogpt.http_client import HttpClient
 from autogpt.logs import logger
 from autogpt.models.base_open_ai_plugin import BaseOpenAIPlugin
 
@@ -67,7 +68,7 @@ def fetch_openai_plugins_manifest_and_spec(cfg: Config) -> dict:
         create_directory_if_not_exists(openai_plugin_client_dir)
         if not os.path.exists(f"{openai_plugin_client_dir}/ai-plugin.json"):
             try:
-                response = requests.get(f"{url}/.well-known/ai-plugin.json")
+                response = HttpClient().get(f"{url}/.well-known/ai-plugin.json")
                 if response.status_code == 200:
                     manifest = response.json()
                     if manifest["schema_version"] != "v1":
@@ -1,16 +1,85 @@
 """Text processing functions"""
-from typing import Dict, Generator, Optional
+import asyncio
+import functools
+from typing import Dict, Generator, Iterable, List, Optional, Tuple
 
 import spacy
 from selenium.webdriver.remote.webdriver import WebDriver
+from spacy.language import Language
 
 from autogpt.config import Config
-from autogpt.llm import count_message_tokens, create_chat_completion
+from autogpt.llm import (
+    acreate_chat_completion,
+    count_message_tokens,
+    create_chat_completion,
+)
+from autogpt.llm.token_counter import get_encoding_for_model
 from autogpt.logs import logger
 from autogpt.memory import get_memory
 
 CFG = Config()
 
+# Pipeline components that don't affect sentence boundaries, which are left out
+# when a language model is loaded for sentence segmentation
+NON_SENTENCE_COMPONENTS = [
+    "tagger",
+    "morphologizer",
+    "attribute_ruler",
+    "lemmatizer",
+    "trainable_lemmatizer",
+    "ner",
+    "entity_ruler",
+    "entity_linker",
+    "span_finder",
+    "spancat",
+    "textcat",
+    "textcat_multilabel",
+]
+SENTENCE_BATCH_SIZE = 16
+
+
+@functools.lru_cache(maxsize=None)
+def get_sentence_pipeline(model: str, sentencizer_only: bool = False) -> Language:
+    """
+    Returns the spaCy pipeline that splits text into sentences, loading it only
+    once per process.
+
+    Args:
+        model (str): The name of the spaCy language model.
+        sentencizer_only (bool): Split sentences at punctuation with spaCy's rule
+            based sentencizer, without loading the model. Only the language of
+            the model (e.g. "en" for en_core_web_sm) is used.
+
+    Returns:
+        Language: The pipeline, with a sentencizer for the sentence boundaries the
+            model doesn't set.
+    """
+    if sentencizer_only:
+        nlp = spacy.blank(model.split("_")[0])
+    else:
+        nlp = spacy.load(model, exclude=NON_SENTENCE_COMPONENTS)
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+
+def split_sentences(
+    texts: Iterable[str], batch_size: int = SENTENCE_BATCH_SIZE
+) -> Generator[List[str], None, None]:
+    """Split texts into sentences, processing them in batches
+
+    Args:
+        texts (Iterable[str]): The texts to split
+        batch_size (int, optional): The number of texts processed together.
+
+    Yields:
+        List[str]: The sentences of the next text
+    """
+    nlp = get_sentence_pipeline(
+        CFG.browse_spacy_language_model, CFG.browse_spacy_sentencizer_only
+    )
+    for doc in nlp.pipe(texts, batch_size=batch_size):
+        yield [sent.text.strip() for sent in doc.sents]
+
 
 def split_text(
     text: str,
@@ -20,6 +89,9 @@ def split_text(
 ) -> Generator[str, None, None]:
     """Split text into chunks of a maximum length
 
+    Each sentence is tokenized once, and the token count of the message a chunk is
+    sent in is kept as a running sum.
+
     Args:
         text (str): The text to split
         max_length (int, optional): The maximum length of each chunk. Defaults to 8192.
@@ -31,38 +103,49 @@ def split_text(
         ValueError: If the text is longer than the maximum length
     """
     flatened_paragraphs = " ".join(text.split("\n"))
-    nlp = spacy.load(CFG.browse_spacy_language_model)
-    nlp.add_pipe("sentencizer")
-    doc = nlp(flatened_paragraphs)
-    sentences = [sent.text.strip() for sent in doc.sents]
+    sentences = next(split_sentences([flatened_paragraphs]))
+
+    # The tokens of the message apart from its content, plus one to spare
+    message_tokens = count_message_tokens([{"role": "user", "content": ""}], model) + 1
+    encoding = get_encoding_for_model(model)
+    prefix, suffix = _chunk_message_parts(question)
+
+    def count_tokens(content: str) -> int:
+        return len(encoding.encode(content))
 
     current_chunk = []
+    # The tokens of the content up to the end of the current chunk. The sentences
+    # of a chunk are joined with spaces, and no token spans such a space, so only
+    # the first and the last sentence are counted together with the text around
+    # the chunk; the counts add up to that of the whole message.
+    chunk_tokens = 0
 
     for sentence in sentences:
-        message_with_additional_sentence = [
-            create_message(" ".join(current_chunk) + " " + sentence, question)
-        ]
-
-        expected_token_usage = (
-            count_message_tokens(messages=message_with_additional_sentence, model=model)
-            + 1
-        )
+        if current_chunk:
+            expected_token_usage = (
+                message_tokens + chunk_tokens + count_tokens(f" {sentence}{suffix}")
+            )
+        else:
+            expected_token_usage = message_tokens + count_tokens(
+                f"{prefix} {sentence}{suffix}"
+            )
         if expected_token_usage <= max_length:
+            if current_chunk:
+                chunk_tokens += count_tokens(f" {sentence}")
+            else:
+                chunk_tokens = count_tokens(f"{prefix}{sentence}")
             current_chunk.append(sentence)
         else:
             yield " ".join(current_chunk)
             current_chunk = [sentence]
-            message_this_sentence_only = [
-                create_message(" ".join(current_chunk), question)
-            ]
-            expected_token_usage = (
-                count_message_tokens(messages=message_this_sentence_only, model=model)
-                + 1
+            expected_token_usage = message_tokens + count_tokens(
+                f"{prefix}{sentence}{suffix}"
             )
             if expected_token_usage > max_length:
                 raise ValueError(
                     f"Sentence is too long in webpage: {expected_token_usage} tokens."
                 )
+            chunk_tokens = count_tokens(f"{prefix}{sentence}")
 
     if current_chunk:
         yield " ".join(current_chunk)
@@ -73,6 +156,11 @@ def summarize_text(
 ) -> str:
     """Summarize text using the OpenAI API
 
+    The chunks of the text are summarized concurrently if
+    CFG.browse_summary_concurrency is above 1, unless this is called from inside
+    an event loop. Either way, summaries that don't fit in one chunk together are
+    reduced hierarchically before they are combined.
+
     Args:
         url (str): The url of the text
         text (str): The text to summarize
@@ -95,17 +183,28 @@ def summarize_text(
             text, max_length=CFG.browse_chunk_max_length, model=model, question=question
         ),
     )
+    if CFG.browse_summary_concurrency > 1:
+        if not _in_event_loop():
+            return asyncio.run(
+                summarize_chunks_concurrently(url, chunks, question, model, driver)
+            )
+        # asyncio.run can't be nested in the event loop of the caller
+        logger.debug("Summarizing the chunks one at a time inside an event loop")
+
     scroll_ratio = 1 / len(chunks)
 
+    logger.info(f"Adding {len(chunks)} chunks to memory")
+    memory = get_memory(CFG)
+    memory.add_many(
+        [
+            f"Source: {url}\n" f"Raw content part#{i + 1}: {chunk}"
+            for i, chunk in enumerate(chunks)
+        ]
+    )
+
     for i, chunk in enumerate(chunks):
         if driver:
             scroll_to_percentage(driver, scroll_ratio * i)
-        logger.info(f"Adding chunk {i + 1} / {len(chunks)} to memory")
-
-        memory_to_add = f"Source: {url}\n" f"Raw content part#{i + 1}: {chunk}"
-
-        memory = get_memory(CFG)
-        memory.add(memory_to_add)
 
         messages = [create_message(chunk, question)]
         tokens_for_chunk = count_message_tokens(messages, model)
@@ -119,24 +218,189 @@ def summarize_text(
         )
         summaries.append(summary)
         logger.info(
-            f"Added chunk {i + 1} summary to memory, of length {len(summary)} characters"
+            f"Summarized chunk {i + 1}, to a summary of length {len(summary)} characters"
+        )
+
+    logger.info(f"Summarized {len(chunks)} chunks.")
+    memory.add_many(
+        [
+            f"Source: {url}\n" f"Content summary part#{i + 1}: {summary}"
+            for i, summary in enumerate(summaries)
+        ]
+    )
+
+    groups = reduction_groups(summaries, question, model)
+    while groups:
+        summaries = [
+            create_chat_completion(
+                model=model, messages=[create_message("\n".join(group), question)]
+            )
+            for group in groups
+        ]
+        groups = reduction_groups(summaries, question, model)
+
+    return create_chat_completion(
+        model=model,
+        messages=[create_message("\n".join(summaries), question)],
+    )
+
+
+async def summarize_chunks_concurrently(
+    url: str,
+    chunks: List[str],
+    question: str,
+    model: str,
+    driver: Optional[WebDriver] = None,
+) -> str:
+    """Summarize the chunks of a text concurrently, then combine their summaries
+
+    At most CFG.browse_summary_concurrency completions are in flight at once. If the
+    combined summaries do not fit in one chunk, they are reduced hierarchically.
+
+    Args:
+        url (str): The url of the text
+        chunks (List[str]): The chunks of the text, in order
+        question (str): The question to ask the model
+        model (str): The model to summarize with
+        driver (WebDriver): The webdriver to use to scroll the page
+
+    Returns:
+        str: The summary of the text
+    """
+    memory = get_memory(CFG)
+    semaphore = asyncio.Semaphore(CFG.browse_summary_concurrency)
+    scroll_ratio = 1 / len(chunks)
+
+    logger.info(f"Adding {len(chunks)} chunks to memory")
+    # The memory backends are not thread-safe, so only one add runs at a time
+    add_raw_chunks = asyncio.create_task(
+        asyncio.to_thread(
+            memory.add_many,
+            [
+                f"Source: {url}\n" f"Raw content part#{i + 1}: {chunk}"
+                for i, chunk in enumerate(chunks)
+            ],
         )
+    )
 
-        memory_to_add = f"Source: {url}\n" f"Content summary part#{i + 1}: {summary}"
+    async def summarize_chunk(i: int, chunk: str) -> str:
+        async with semaphore:
+            if driver:
+                scroll_to_percentage(driver, scroll_ratio * i)
 
-        memory.add(memory_to_add)
+            messages = [create_message(chunk, question)]
+            tokens_for_chunk = count_message_tokens(messages, model)
+            logger.info(
+                f"Summarizing chunk {i + 1} / {len(chunks)} of length {len(chunk)} characters, or {tokens_for_chunk} tokens"
+            )
+            summary = await acreate_chat_completion(model=model, messages=messages)
+            logger.info(
+                f"Summarized chunk {i + 1}, to a summary of length {len(summary)} characters"
+            )
+            return summary
 
+    summaries = await asyncio.gather(
+        *(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks))
+    )
     logger.info(f"Summarized {len(chunks)} chunks.")
+    await add_raw_chunks
+    await asyncio.to_thread(
+        memory.add_many,
+        [
+            f"Source: {url}\n" f"Content summary part#{i + 1}: {summary}"
+            for i, summary in enumerate(summaries)
+        ],
+    )
+
+    async def summarize_group(group: List[str]) -> str:
+        async with semaphore:
+            return await acreate_chat_completion(
+                model=model, messages=[create_message("\n".join(group), question)]
+            )
 
-    combined_summary = "\n".join(summaries)
-    messages = [create_message(combined_summary, question)]
+    groups = reduction_groups(summaries, question, model)
+    while groups:
+        summaries = await asyncio.gather(*(summarize_group(g) for g in groups))
+        groups = reduction_groups(summaries, question, model)
 
-    return create_chat_completion(
+    return await acreate_chat_completion(
         model=model,
-        messages=messages,
+        messages=[create_message("\n".join(summaries), question)],
     )
 
 
+def reduction_groups(
+    summaries: List[str], question: str, model: str
+) -> Optional[List[List[str]]]:
+    """The groups to summarize the summaries in before they are combined
+
+    Args:
+        summaries (List[str]): The summaries to combine, in order
+        question (str): The question the summaries will be combined to answer
+        model (str): The model to count tokens for
+
+    Returns:
+        Optional[List[List[str]]]: The groups of summaries, or None if the
+            summaries fit in one message or can't be reduced any further
+    """
+    message = create_message("\n".join(summaries), question)
+    if count_message_tokens([message], model) <= CFG.browse_chunk_max_length:
+        return None
+    groups = group_summaries(summaries, question, model)
+    if len(groups) >= len(summaries):
+        # Every summary is too long to be combined with another one
+        return None
+    logger.info(f"Reducing {len(summaries)} summaries to {len(groups)}")
+    return groups
+
+
+def group_summaries(summaries: List[str], question: str, model: str) -> List[List[str]]:
+    """Split summaries into consecutive groups that can each be combined in one call
+
+    Each group holds at most CFG.browse_summary_fan_out summaries, and its combined
+    message fits in CFG.browse_chunk_max_length tokens unless a single summary is
+    already too long on its own.
+
+    Args:
+        summaries (List[str]): The summaries to group, in order
+        question (str): The question the summaries will be combined to answer
+        model (str): The model to count tokens for
+
+    Returns:
+        List[List[str]]: The groups of summaries, in order
+    """
+    fan_out = max(2, CFG.browse_summary_fan_out)
+    groups = []
+    current_group = []
+    for summary in summaries:
+        candidate = current_group + [summary]
+        expected_token_usage = (
+            count_message_tokens(
+                [create_message("\n".join(candidate), question)], model
+            )
+            + 1
+        )
+        if current_group and (
+            len(candidate) > fan_out
+            or expected_token_usage > CFG.browse_chunk_max_length
+        ):
+            groups.append(current_group)
+            current_group = [summary]
+        else:
+            current_group = candidate
+    if current_group:
+        groups.append(current_group)
+    return groups
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
 def scroll_to_percentage(driver: WebDriver, ratio: float) -> None:
     """Scroll to a percentage of the page
 
@@ -162,9 +426,15 @@ def create_message(chunk: str, question: str) -> Dict[str, str]:
     Returns:
         Dict[str, str]: The message to send to the chat completion
     """
-    return {
-        "role": "user",
-        "content": f'"""{chunk}""" Using the above text, answer the following'
+    prefix, suffix = _chunk_message_parts(question)
+    return {"role": "user", "content": f"{prefix}{chunk}{suffix}"}
+
+
+def _chunk_message_parts(question: str) -> Tuple[str, str]:
+    """The text before and after the chunk in the message made by create_message"""
+    return (
+        '"""',
+        '""" Using the above text, answer the following'
         f' question: "{question}" -- if the question cannot be answered using the text,'
         " summarize the text.",
-    }
+    )
@@ -1,9 +1,9 @@
 import logging
 import os
 
-import requests
 from playsound import playsound
 
+from autogpt.http_client import HttpClient
 from autogpt.speech.base import VoiceBase
 
 
@@ -26,7 +26,7 @@ class BrianSpeech(VoiceBase):
         tts_url = (
             f"https://api.streamelements.com/kappa/v2/speech?voice=Brian&text={text}"
         )
-        response = requests.get(tts_url)
+        response = HttpClient().get(tts_url)
 
         if response.status_code == 200:
             with open("speech.mp3", "wb") as f:
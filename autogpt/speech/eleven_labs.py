@@ -1,10 +1,10 @@
 """ElevenLabs speech module"""
 import os
 
-import requests
 from playsound import playsound
 
 from autogpt.config import Config
+from autogpt.http_client import HttpClient
 from autogpt.speech.base import VoiceBase
 
 PLACEHOLDERS = {"your-voice-id"}
@@ -74,7 +74,9 @@ class ElevenLabsSpeech(VoiceBase):
         tts_url = (
             f"https://api.elevenlabs.io/v1/text-to-speech/{self._voices[voice_index]}"
         )
-        response = requests.post(tts_url, headers=self._headers, json={"text": text})
+        response = HttpClient().post(
+            tts_url, headers=self._headers, json={"text": text}
+        )
 
         if response.status_code == 200:
             with open("speech.mpeg", "wb") as f:
@@ -15,6 +15,7 @@ except ImportError:
     pass
 
 from autogpt.config import Config
+from autogpt.http_client import HttpClient
 
 
 def clean_input(prompt: str = "", talk=False):
@@ -88,7 +89,7 @@ def readable_file_size(size, decimal_places=2):
 
 def get_bulletin_from_web():
     try:
-        response = requests.get(
+        response = HttpClient().get(
             "https://raw.githubusercontent.com/Significant-Gravitas/Auto-GPT/master/BULLETIN.md"
         )
         if response.status_code == 200:
@@ -0,0 +1,52 @@
+"""Benchmarks adding embeddings to the LocalCache one at a time, against
+concatenating them to the embeddings matrix like it used to.
+
+Run with: pytest benchmark/benchmark_local_cache.py
+"""
+import numpy as np
+import pytest
+
+from autogpt.memory.local import EMBED_DIM, CacheContent, create_default_embeddings
+
+VECTORS = 100_000
+# Concatenating copies O(N²) floats, so fewer vectors are used to compare with it
+COMPARED_VECTORS = 2_000
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return np.random.default_rng(0).random((VECTORS, EMBED_DIM), dtype=np.float32)
+
+
+def add_one_at_a_time(vectors):
+    content = CacheContent()
+    for i, vector in enumerate(vectors):
+        content.add(f"text {i}", vector)
+    return content
+
+
+def concatenate_one_at_a_time(vectors):
+    embeddings = create_default_embeddings()
+    for vector in vectors:
+        embeddings = np.concatenate([embeddings, vector[np.newaxis, :]], axis=0)
+    return embeddings
+
+
+def test_add_100k(benchmark, vectors):
+    content = benchmark.pedantic(add_one_at_a_time, args=(vectors,), rounds=1)
+    assert content.embeddings.shape == (VECTORS, EMBED_DIM)
+
+
+def test_add_many_100k(benchmark, vectors):
+    texts = [f"text {i}" for i in range(VECTORS)]
+    benchmark.pedantic(lambda: CacheContent().add_many(texts, vectors), rounds=3)
+
+
+def test_add(benchmark, vectors):
+    benchmark.pedantic(add_one_at_a_time, args=(vectors[:COMPARED_VECTORS],), rounds=3)
+
+
+def test_concatenate(benchmark, vectors):
+    benchmark.pedantic(
+        concatenate_one_at_a_time, args=(vectors[:COMPARED_VECTORS],), rounds=3
+    )
@@ -0,0 +1,62 @@
+"""Benchmarks the storage dtypes of the LocalCache: memory per embedding, time
+to score all embeddings, and recall@k of the top k against float32.
+
+The synthetic embeddings are unit vectors drawn around a few hundred topics,
+so that neighbours are close like those of real ada embeddings.
+
+Run with: pytest benchmark/benchmark_local_cache_dtype.py
+"""
+import numpy as np
+import pytest
+
+from autogpt.memory.local import EMBED_DIM, STORAGE_DTYPES, CacheContent, top_k_indices
+
+ROWS = 50_000
+TOPICS = 500
+QUERIES = 100
+K = 10
+
+
+def unit(vectors):
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    rng = np.random.default_rng(0)
+    topics = unit(rng.normal(size=(TOPICS, EMBED_DIM)))
+    noise = rng.normal(scale=0.5 / np.sqrt(EMBED_DIM), size=(ROWS, EMBED_DIM))
+    return unit(topics[rng.integers(TOPICS, size=ROWS)] + noise).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def queries(vectors):
+    rng = np.random.default_rng(1)
+    noise = rng.normal(scale=0.5 / np.sqrt(EMBED_DIM), size=(QUERIES, EMBED_DIM))
+    return unit(vectors[rng.integers(ROWS, size=QUERIES)] + noise).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def exact_top_k(vectors, queries):
+    return [set(top_k_indices(row, K)) for row in queries @ vectors.T]
+
+
+@pytest.mark.parametrize("dtype", list(STORAGE_DTYPES))
+def test_score(benchmark, vectors, queries, exact_top_k, dtype):
+    content = CacheContent(dtype=dtype)
+    content.add_many([""] * ROWS, vectors)
+
+    scores = benchmark.pedantic(content.scores, args=(queries,), rounds=3)
+
+    recall = np.mean(
+        [
+            len(exact & set(top_k_indices(row, K))) / K
+            for exact, row in zip(exact_top_k, scores)
+        ]
+    )
+    benchmark.extra_info["recall@k"] = recall
+    benchmark.extra_info[
+        "bytes per embedding"
+    ] = content.buffer.itemsize * EMBED_DIM + (4 if dtype == "int8" else 0)
+    print(f"\n{dtype}: recall@{K} = {recall:.3f}")
+    assert recall > 0.8
@@ -0,0 +1,89 @@
+"""Benchmarks the IVF index of the LocalCache against the exact search: queries
+per second, and recall@5 of the IVF results.
+
+The synthetic embeddings are unit vectors drawn around a few thousand topics,
+so that neighbours are close like those of real ada embeddings.
+
+Run with: pytest benchmark/benchmark_local_cache_ivf.py
+"""
+import numpy as np
+import pytest
+
+from autogpt.memory.local import EMBED_DIM, CacheContent, IVFIndex, top_k_indices
+
+ROWS = 200_000
+TOPICS = 2_000
+QUERIES = 100
+K = 5
+# Length of the noise added to topics, against their unit length
+NOISE = 1.5
+
+
+def unit(vectors):
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def content():
+    rng = np.random.default_rng(0)
+    topics = unit(rng.normal(size=(TOPICS, EMBED_DIM)).astype(np.float32))
+    content = CacheContent()
+    content.reserve(ROWS)
+    for start in range(0, ROWS, 10_000):
+        noise = rng.normal(scale=NOISE / np.sqrt(EMBED_DIM), size=(10_000, EMBED_DIM))
+        vectors = unit(topics[rng.integers(TOPICS, size=10_000)] + noise)
+        content.add_many([""] * 10_000, vectors)
+    return content
+
+
+@pytest.fixture(scope="module")
+def queries(content):
+    rng = np.random.default_rng(1)
+    rows = content.vectors(rng.integers(ROWS, size=QUERIES))
+    noise = rng.normal(scale=NOISE / np.sqrt(EMBED_DIM), size=(QUERIES, EMBED_DIM))
+    return unit(rows + noise).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def exact_top_k(content, queries):
+    return [set(top_k_indices(row, K)) for row in content.scores(queries)]
+
+
+@pytest.fixture(scope="module")
+def index(content, tmp_path_factory):
+    path = tmp_path_factory.mktemp("ivf")
+    index = IVFIndex(path / "ivf.npy", path / "ivf_lists.npy", min_rows=0)
+    index.update(content)
+    return index
+
+
+def exact_search(content, queries):
+    return [top_k_indices(content.scores(query), K) for query in queries]
+
+
+def ivf_search(content, index, queries):
+    results = []
+    for query in queries:
+        rows = index.candidates(query)
+        results.append(rows[top_k_indices(content.scores(query, rows), K)])
+    return results
+
+
+def test_exact(benchmark, content, queries):
+    benchmark.pedantic(exact_search, args=(content, queries), rounds=3)
+    benchmark.extra_info["qps"] = QUERIES / benchmark.stats.stats.mean
+
+
+@pytest.mark.parametrize("n_probe", [4, 8, 16, 32])
+def test_ivf(benchmark, content, index, queries, exact_top_k, n_probe):
+    index.n_probe = n_probe
+
+    results = benchmark.pedantic(ivf_search, args=(content, index, queries), rounds=3)
+
+    recall = np.mean(
+        [len(exact & set(result)) / K for exact, result in zip(exact_top_k, results)]
+    )
+    qps = QUERIES / benchmark.stats.stats.mean
+    benchmark.extra_info["recall@5"] = recall
+    benchmark.extra_info["qps"] = qps
+    print(f"\nn_probe={n_probe}: recall@{K} = {recall:.3f}, {qps:.0f} queries/s")
@@ -0,0 +1,110 @@
+"""Benchmarks adding 10k texts to RedisMemory with add_many and aadd_many, against
+adding them one pipeline at a time like it used to.
+
+Embeddings are made up, so that only the Redis round trips are measured. A
+redis-stack-server is launched on a free port, and the benchmarks are skipped if
+it is not installed.
+
+Run with: pytest benchmark/benchmark_redis_memory.py
+"""
+import asyncio
+import shutil
+import socket
+import subprocess
+import time
+
+import numpy as np
+import pytest
+import redis
+
+from autogpt.config import Config
+from autogpt.memory import redismem
+from autogpt.memory.redismem import RedisMemory
+
+TEXTS = 10_000
+EMBED_DIM = 1536
+
+
+@pytest.fixture(scope="module")
+def redis_port():
+    server = shutil.which("redis-stack-server")
+    if not server:
+        pytest.skip("redis-stack-server is not installed")
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [server, "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+    )
+    client = redis.Redis(port=port)
+    for _ in range(50):
+        try:
+            client.ping()
+            break
+        except redis.ConnectionError:
+            time.sleep(0.1)
+    yield port
+    process.terminate()
+    process.wait()
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return [f"text {i}" for i in range(TEXTS)]
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return np.random.default_rng(0).random((TEXTS, EMBED_DIM)).tolist()
+
+
+@pytest.fixture
+def memory(redis_port, vectors, monkeypatch):
+    config = Config()
+    monkeypatch.setattr(config, "redis_host", "localhost")
+    monkeypatch.setattr(config, "redis_port", redis_port)
+    monkeypatch.setattr(config, "redis_password", "")
+    monkeypatch.setattr(config, "wipe_redis_on_start", True)
+    monkeypatch.setattr(
+        redismem, "get_ada_embeddings", lambda texts: vectors[: len(texts)]
+    )
+    monkeypatch.setattr(redismem, "get_ada_embedding", lambda text: vectors[0])
+    RedisMemory._instances.pop(RedisMemory, None)
+    yield RedisMemory(config)
+    RedisMemory._instances.pop(RedisMemory, None)
+
+
+def add_one_pipeline_at_a_time(memory, texts, vectors):
+    """How add stored a text before, with a pipeline of its own"""
+    index = memory.cfg.memory_index
+    for i, (text, vector) in enumerate(zip(texts, vectors)):
+        data_dict = {
+            b"data": text,
+            "embedding": np.array(vector).astype(np.float32).tobytes(),
+        }
+        pipe = memory.redis.pipeline()
+        pipe.hset(f"{index}:{i}", mapping=data_dict)
+        pipe.set(f"{index}-vec_num", i + 1)
+        pipe.execute()
+
+
+def test_add_one_pipeline_at_a_time(benchmark, memory, texts, vectors):
+    benchmark.pedantic(
+        add_one_pipeline_at_a_time,
+        args=(memory, texts, vectors),
+        setup=memory.clear,
+        rounds=3,
+    )
+
+
+def test_add_many(benchmark, memory, texts):
+    benchmark.pedantic(memory.add_many, args=(texts,), setup=memory.clear, rounds=3)
+
+
+def test_aadd_many(benchmark, memory, texts):
+    benchmark.pedantic(
+        lambda: asyncio.run(memory.aadd_many(texts)),
+        setup=memory.clear,
+        rounds=3,
+    )
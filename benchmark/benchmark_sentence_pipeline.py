@@ -0,0 +1,86 @@
+"""Benchmarks loading the sentence segmentation pipeline of split_text, and
+segmenting 1 MB of text with it.
+
+The language model modes need BROWSE_SPACY_LANGUAGE_MODEL to be installed, e.g.
+python -m spacy download en_core_web_sm.
+
+Run with: pytest benchmark/benchmark_sentence_pipeline.py
+"""
+import random
+
+import pytest
+import spacy
+
+from autogpt.config import Config
+from autogpt.processing import text
+from autogpt.processing.text import get_sentence_pipeline, split_sentences
+
+MODEL = Config().browse_spacy_language_model
+DOCUMENT_SIZE = 10_000
+DOCUMENTS = 100  # 1 MB in total
+
+modes = pytest.mark.parametrize(
+    "sentencizer_only",
+    [
+        True,
+        pytest.param(
+            False,
+            marks=pytest.mark.skipif(
+                not spacy.util.is_package(MODEL), reason=f"{MODEL} is not installed"
+            ),
+        ),
+    ],
+    ids=["sentencizer", "model"],
+)
+
+
+@pytest.fixture(scope="module")
+def documents():
+    rng = random.Random(0)
+    words = "the of agent task memory web page result command file a to".split()
+    documents = []
+    for _ in range(DOCUMENTS):
+        sentences = []
+        size = 0
+        while size < DOCUMENT_SIZE:
+            sentence = " ".join(rng.choices(words, k=rng.randint(5, 30)))
+            sentences.append(f"{sentence.capitalize()}.")
+            size += len(sentence) + 2
+        documents.append(" ".join(sentences))
+    return documents
+
+
+@pytest.fixture
+def config(monkeypatch):
+    config = Config()
+    monkeypatch.setattr(config, "browse_spacy_language_model", MODEL)
+    yield config
+    get_sentence_pipeline.cache_clear()
+
+
+@modes
+def test_load_pipeline(benchmark, sentencizer_only):
+    benchmark.pedantic(
+        get_sentence_pipeline,
+        args=(MODEL, sentencizer_only),
+        setup=get_sentence_pipeline.cache_clear,
+        rounds=5,
+    )
+
+
+def test_load_full_model(benchmark):
+    """How split_text loaded the model before, for comparison"""
+    if not spacy.util.is_package(MODEL):
+        pytest.skip(f"{MODEL} is not installed")
+    benchmark.pedantic(lambda: spacy.load(MODEL).add_pipe("sentencizer"), rounds=5)
+
+
+@modes
+@pytest.mark.parametrize("batch_size", [1, text.SENTENCE_BATCH_SIZE])
+def test_segment_1mb(benchmark, config, documents, sentencizer_only, batch_size):
+    config.browse_spacy_sentencizer_only = sentencizer_only
+    get_sentence_pipeline(MODEL, sentencizer_only)
+
+    benchmark.pedantic(
+        lambda: list(split_sentences(documents, batch_size=batch_size)), rounds=3
+    )
@@ -0,0 +1,75 @@
+"""Benchmarks split_text on a 1 MB page, against counting every candidate chunk
+from scratch like it used to.
+
+Sentences are split on punctuation instead of by spaCy, so that only the token
+accounting is measured.
+
+Run with: pytest benchmark/benchmark_split_text.py
+"""
+import random
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from autogpt.llm import count_message_tokens
+from autogpt.llm.token_counter import token_count_cache
+from autogpt.processing import text
+from autogpt.processing.text import create_message, split_text
+
+MODEL = "gpt-3.5-turbo"
+PAGE_SIZE = 1_000_000
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@pytest.fixture(scope="module")
+def page():
+    rng = random.Random(0)
+    words = "the of agent task memory web page result command file a to".split()
+    sentences = []
+    size = 0
+    while size < PAGE_SIZE:
+        sentence = " ".join(rng.choices(words, k=rng.randint(5, 30))).capitalize()
+        sentences.append(f"{sentence}.")
+        size += len(sentence) + 2
+    return " ".join(sentences)
+
+
+@pytest.fixture(autouse=True)
+def sentencizer(monkeypatch):
+    class Sentencizer:
+        def pipe(self, texts, batch_size):
+            for text_ in texts:
+                sents = [SimpleNamespace(text=s) for s in SENTENCE_END.split(text_)]
+                yield SimpleNamespace(sents=sents)
+
+    monkeypatch.setattr(text, "get_sentence_pipeline", lambda *args: Sentencizer())
+
+
+def split_text_by_recounting(text_, max_length=8192, model=MODEL, question=""):
+    current_chunk = []
+    for sentence in SENTENCE_END.split(text_):
+        message = [create_message(" ".join(current_chunk) + " " + sentence, question)]
+        if count_message_tokens(message, model) + 1 <= max_length:
+            current_chunk.append(sentence)
+        else:
+            yield " ".join(current_chunk)
+            current_chunk = [sentence]
+    if current_chunk:
+        yield " ".join(current_chunk)
+
+
+def test_split_text(benchmark, page):
+    benchmark.pedantic(
+        lambda: list(split_text(page, model=MODEL)),
+        setup=token_count_cache.clear,
+        rounds=5,
+    )
+
+
+def test_split_text_by_recounting(benchmark, page):
+    benchmark.pedantic(
+        lambda: list(split_text_by_recounting(page)),
+        setup=token_count_cache.clear,
+        rounds=1,
+    )
@@ -0,0 +1,54 @@
+"""Benchmarks the token counting done by chat_with_ai on a long message history.
+
+Run with: pytest benchmark/benchmark_token_counter.py
+"""
+import pytest
+
+from autogpt.llm import count_message_tokens, create_chat_message, generate_context
+from autogpt.llm.token_counter import token_count_cache
+
+MODEL = "gpt-3.5-turbo"
+HISTORY_LENGTH = 500
+
+
+@pytest.fixture(scope="module")
+def full_message_history():
+    history = []
+    for i in range(HISTORY_LENGTH // 2):
+        history.append(
+            create_chat_message(
+                "assistant",
+                '{"thoughts": {"text": "Step %d of the plan", "reasoning": "Because '
+                'the previous command returned useful output"}, "command": {"name":'
+                ' "read_file", "args": {"filename": "notes_%d.txt"}}}' % (i, i),
+            )
+        )
+        history.append(
+            create_chat_message(
+                "system", f"Command read_file returned: {'lorem ipsum ' * 40}{i}"
+            )
+        )
+    return history
+
+
+def count_cycle_tokens(full_message_history):
+    """Counts tokens the way one chat_with_ai cycle does."""
+    current_tokens_used, _, _ = generate_context("You are Entrepreneur-GPT.", "", MODEL)
+    for message in reversed(full_message_history):
+        current_tokens_used += count_message_tokens([message], MODEL)
+    return current_tokens_used
+
+
+def test_cycle_token_count_cold(benchmark, full_message_history):
+    benchmark.pedantic(
+        count_cycle_tokens,
+        args=(full_message_history,),
+        setup=token_count_cache.clear,
+        rounds=20,
+    )
+
+
+def test_cycle_token_count_warm(benchmark, full_message_history):
+    token_count_cache.clear()
+    count_cycle_tokens(full_message_history)
+    benchmark(count_cycle_tokens, full_message_history)
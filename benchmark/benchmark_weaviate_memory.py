@@ -0,0 +1,77 @@
+"""Benchmarks adding 10k texts to WeaviateMemory with add_many, against adding
+them in a batch context of their own like add used to.
+
+Embeddings are made up, so that only the writes are measured. Embedded Weaviate
+is started in a temporary directory, which downloads its binary on first use.
+
+Run with: pytest benchmark/benchmark_weaviate_memory.py
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("weaviate")
+
+from weaviate.util import generate_uuid5
+
+from autogpt.config import Config
+from autogpt.memory import weaviate as weaviate_memory
+from autogpt.memory.weaviate import WeaviateMemory
+
+TEXTS = 10_000
+EMBED_DIM = 1536
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return [f"text {i}" for i in range(TEXTS)]
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return np.random.default_rng(0).random((TEXTS, EMBED_DIM)).tolist()
+
+
+@pytest.fixture
+def memory(tmp_path_factory, vectors, monkeypatch):
+    config = Config()
+    monkeypatch.setattr(config, "use_weaviate_embedded", True)
+    monkeypatch.setattr(config, "weaviate_host", "127.0.0.1")
+    monkeypatch.setattr(config, "weaviate_port", "8079")
+    monkeypatch.setattr(
+        config, "weaviate_embedded_path", str(tmp_path_factory.mktemp("weaviate"))
+    )
+    monkeypatch.setattr(
+        weaviate_memory, "get_ada_embeddings", lambda texts: vectors[: len(texts)]
+    )
+    WeaviateMemory._instances.pop(WeaviateMemory, None)
+    yield WeaviateMemory(config)
+    WeaviateMemory._instances.pop(WeaviateMemory, None)
+
+
+def add_one_batch_at_a_time(memory, texts, vectors):
+    """How add stored a text before, flushing a batch per object"""
+    for text, vector in zip(texts, vectors):
+        with memory.client.batch as batch:
+            batch.add_data_object(
+                uuid=generate_uuid5(text, memory.index),
+                data_object={"raw_text": text},
+                class_name=memory.index,
+                vector=vector,
+            )
+
+
+def test_add_one_batch_at_a_time(benchmark, memory, texts, vectors):
+    benchmark.pedantic(
+        add_one_batch_at_a_time,
+        args=(memory, texts, vectors),
+        setup=memory.clear,
+        rounds=1,
+    )
+
+
+def test_add_many(benchmark, memory, texts):
+    result = benchmark.pedantic(
+        memory.add_many, args=(texts,), setup=memory.clear, rounds=3
+    )
+    assert memory.batch_errors == {}
+    assert all(result)
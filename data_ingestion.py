@@ -3,6 +3,7 @@ import logging
 
 from autogpt.commands.file_operations import ingest_file, list_files
 from autogpt.config import Config
+from autogpt.http_client import install_openai_transport
 from autogpt.memory import get_memory
 
 cfg = Config()
@@ -26,7 +27,7 @@ def ingest_directory(directory, memory, args):
     Ingest all files in a directory by calling the ingest_file function for each file.
 
     :param directory: The directory containing the files to ingest
-    :param memory: An object with an add() method to store the chunks in memory
+    :param memory: An object with an add_many() method to store the chunks in memory
     """
     global logger
     try:
@@ -39,6 +40,7 @@ def ingest_directory(directory, memory, args):
 
 def main() -> None:
     logger = configure_logging()
+    install_openai_transport()
 
     parser = argparse.ArgumentParser(
         description="Ingest a file or a directory with multiple files into memory. "
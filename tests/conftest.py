@@ -5,6 +5,8 @@ from pytest_mock import MockerFixture
 
 from autogpt.config import Config
 from autogpt.llm import ApiManager
+from autogpt.llm.rate_limiter import RateLimiter
+from autogpt.llm.retry import RetryEngine
 from autogpt.workspace import Workspace
 
 pytest_plugins = ["tests.integration.agent_factory"]
@@ -39,3 +41,18 @@ def api_manager() -> ApiManager:
     if ApiManager in ApiManager._instances:
         del ApiManager._instances[ApiManager]
     return ApiManager()
+
+
+@pytest.fixture()
+def rate_limiter() -> RateLimiter:
+    RateLimiter._instances.pop(RateLimiter, None)
+    yield RateLimiter()
+    RateLimiter._instances.pop(RateLimiter, None)
+
+
+@pytest.fixture(autouse=True)
+def retry_engine() -> RetryEngine:
+    # Circuit breakers opened by one test must not reject the calls of the next
+    RetryEngine._instances.pop(RetryEngine, None)
+    yield RetryEngine()
+    RetryEngine._instances.pop(RetryEngine, None)
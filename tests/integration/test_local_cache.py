@@ -2,11 +2,15 @@
 """Tests for LocalCache class"""
 import unittest
 
+import numpy as np
 import orjson
 import pytest
 
-from autogpt.memory.local import EMBED_DIM, SAVE_OPTIONS
+from autogpt.llm.api_manager import ApiManager
+from autogpt.memory.base import ALREADY_STORED
+from autogpt.memory.local import EMBED_DIM, CacheContent, IVFIndex
 from autogpt.memory.local import LocalCache as LocalCache_
+from autogpt.memory.local import top_k_indices
 from tests.utils import requires_api_key
 
 
@@ -26,38 +30,95 @@ def mock_embed_with_ada(mocker):
     )
 
 
+def read_header(config, workspace):
+    return orjson.loads((workspace.root / f"{config.memory_index}.json").read_bytes())
+
+
 def test_init_without_backing_file(LocalCache, config, workspace):
     cache_file = workspace.root / f"{config.memory_index}.json"
 
     assert not cache_file.exists()
-    LocalCache(config)
-    assert cache_file.exists()
-    assert cache_file.read_text() == "{}"
+    cache = LocalCache(config)
+    assert read_header(config, workspace)["count"] == 0
+    assert (workspace.root / f"{config.memory_index}.jsonl").read_bytes() == b""
+    assert np.load(workspace.root / f"{config.memory_index}.npy").shape == (
+        0,
+        EMBED_DIM,
+    )
+    assert cache.data.texts == []
 
 
 def test_init_with_backing_empty_file(LocalCache, config, workspace):
     cache_file = workspace.root / f"{config.memory_index}.json"
     cache_file.touch()
 
-    assert cache_file.exists()
-    LocalCache(config)
-    assert cache_file.exists()
-    assert cache_file.read_text() == "{}"
+    cache = LocalCache(config)
+    assert read_header(config, workspace)["count"] == 0
+    assert cache.data.texts == []
 
 
-def test_init_with_backing_file(LocalCache, config, workspace):
+def test_init_with_legacy_backing_file(LocalCache, config, workspace):
     cache_file = workspace.root / f"{config.memory_index}.json"
-    cache_file.touch()
+    cache_file.write_bytes(orjson.dumps({"texts": ["test"]}))
+
+    cache = LocalCache(config)
+    assert read_header(config, workspace)["count"] == 0
+    assert cache.data.texts == []
+
+
+def test_memory_persists_across_runs(LocalCache, config, workspace, mocker):
+    mocker.patch(
+        "autogpt.memory.local.get_ada_embeddings",
+        side_effect=lambda texts: [[float(len(text))] * EMBED_DIM for text in texts],
+    )
+    LocalCache(config).add_many(["test", "more tests", 'with "quotes"\nand lines'])
+
+    LocalCache._instances.pop(LocalCache, None)
+    cache = LocalCache(config)
+
+    assert cache.data.texts == ["test", "more tests", 'with "quotes"\nand lines']
+    assert isinstance(cache.data.buffer, np.memmap)
+    assert cache.data.embeddings[:, 0].tolist() == [4.0, 10.0, 23.0]
+
+    # The memory-mapped rows are copied before new ones are added
+    cache.add_many(["again"])
+    assert cache.data.embeddings[:, 0].tolist() == [4.0, 10.0, 23.0, 5.0]
+    LocalCache._instances.pop(LocalCache, None)
+    assert LocalCache(config).data.texts[-1] == "again"
+
+
+def test_load_drops_uncommitted_rows(LocalCache, config, workspace, mocker):
+    mocker.patch(
+        "autogpt.memory.local.get_ada_embeddings",
+        side_effect=lambda texts: [[1.0] * EMBED_DIM for _ in texts],
+    )
+    LocalCache(config).add_many(["test 1", "test 2"])
+    # A write interrupted after the text and part of the vector were appended
+    with (workspace.root / f"{config.memory_index}.jsonl").open("ab") as f:
+        f.write(b'"test 3"\n')
+    with (workspace.root / f"{config.memory_index}.npy").open("ab") as f:
+        f.write(b"\0" * 100)
+
+    LocalCache._instances.pop(LocalCache, None)
+    cache = LocalCache(config)
+
+    assert cache.data.texts == ["test 1", "test 2"]
+    cache.add_many(["test 4"])
+    LocalCache._instances.pop(LocalCache, None)
+    cache = LocalCache(config)
+    assert cache.data.texts == ["test 1", "test 2", "test 4"]
+    assert cache.data.embeddings.shape == (3, EMBED_DIM)
+
 
-    raw_data = {"texts": ["test"]}
-    data = orjson.dumps(raw_data, option=SAVE_OPTIONS)
-    with cache_file.open("wb") as f:
-        f.write(data)
+def test_clear_wipes_the_files(LocalCache, config, workspace, mock_embed_with_ada):
+    cache = LocalCache(config)
+    cache.add("test")
 
-    assert cache_file.exists()
-    LocalCache(config)
-    assert cache_file.exists()
-    assert cache_file.read_text() == "{}"
+    assert cache.clear() == "Obliviated"
+
+    LocalCache._instances.pop(LocalCache, None)
+    assert LocalCache(config).data.texts == []
+    assert read_header(config, workspace)["count"] == 0
 
 
 def test_add(LocalCache, config, mock_embed_with_ada):
@@ -107,4 +168,292 @@ def test_get_stats(LocalCache, config, mock_embed_with_ada) -> None:
     text = "Sample text"
     cache.add(text)
     stats = cache.get_stats()
-    assert stats == (1, cache.data.embeddings.shape)
+    assert stats == (1, (1, EMBED_DIM))
+
+
+def test_add_many(LocalCache, config, mocker):
+    get_ada_embeddings = mocker.patch(
+        "autogpt.memory.local.get_ada_embeddings",
+        side_effect=lambda texts: [[0.1] * EMBED_DIM for _ in texts],
+    )
+    cache = LocalCache(config)
+
+    result = cache.add_many(["test 1", "Command Error: nope", "test 2"])
+
+    assert result == ["test 1", "", "test 2"]
+    get_ada_embeddings.assert_called_once_with(["test 1", "test 2"])
+    assert cache.data.texts == ["test 1", "test 2"]
+    assert cache.data.embeddings.shape == (2, EMBED_DIM)
+
+
+def test_add_skips_stored_texts(LocalCache, config, mocker):
+    get_ada_embeddings = mocker.patch(
+        "autogpt.memory.local.get_ada_embeddings",
+        side_effect=lambda texts: [[0.1] * EMBED_DIM for _ in texts],
+    )
+    get_ada_embedding = mocker.patch(
+        "autogpt.memory.local.get_ada_embedding", return_value=[0.1] * EMBED_DIM
+    )
+    api_manager = ApiManager()
+    api_manager.reset()
+    cache = LocalCache(config)
+    cache.add("test 1")
+
+    result = cache.add_many(["test 1", "test 2", "test 2", "Command Error: nope"])
+
+    assert result == ["", "test 2", "", ""]
+    get_ada_embeddings.assert_called_once_with(["test 2"])
+    assert cache.add("test 2") == ALREADY_STORED
+    get_ada_embedding.assert_called_once_with("test 1")
+    assert cache.data.texts == ["test 1", "test 2"]
+    assert api_manager.get_skipped_memory_adds() == 3
+
+    # The stored texts are known again after a restart, and forgotten on clear
+    LocalCache._instances.pop(LocalCache, None)
+    cache = LocalCache(config)
+    assert cache.add_many(["test 1", "test 3"]) == ["", "test 3"]
+    cache.clear()
+    assert cache.add_many(["test 1"]) == ["test 1"]
+
+
+def test_cache_content_grows_by_doubling():
+    content = CacheContent()
+
+    for i in range(5):
+        content.add(f"test {i}", [float(i)] * EMBED_DIM)
+
+    assert content.capacity == 8
+    assert content.texts == [f"test {i}" for i in range(5)]
+    assert content.embeddings.shape == (5, EMBED_DIM)
+    assert content.embeddings[:, 0].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    content.add_many(["test 5", "test 6", "test 7", "test 8"], np.ones((4, EMBED_DIM)))
+    assert content.capacity == 16
+    assert content.embeddings.shape == (9, EMBED_DIM)
+
+
+def test_cache_content_embeddings_are_a_read_only_view():
+    content = CacheContent()
+    content.add_many(["test 1", "test 2"], np.ones((2, EMBED_DIM)))
+
+    embeddings = content.embeddings
+
+    assert embeddings.dtype == np.float32
+    assert np.shares_memory(embeddings, content.buffer)
+    with pytest.raises(ValueError):
+        embeddings[0, 0] = 2.0
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 10, 20])
+def test_top_k_indices(k):
+    scores = np.random.default_rng(k).random(10)
+
+    assert top_k_indices(scores, k).tolist() == np.argsort(scores)[::-1][:k].tolist()
+
+
+def one_hot(texts):
+    """Embed "test i" as the i-th unit vector"""
+    embeddings = np.zeros((len(texts), EMBED_DIM))
+    for row, text in enumerate(texts):
+        embeddings[row, int(text.split()[-1])] = 1.0
+    return embeddings.tolist()
+
+
+@pytest.fixture
+def one_hot_cache(LocalCache, config, mocker):
+    mocker.patch("autogpt.memory.local.get_ada_embeddings", side_effect=one_hot)
+    mocker.patch(
+        "autogpt.memory.local.get_ada_embedding",
+        side_effect=lambda text: one_hot([text])[0],
+    )
+    cache = LocalCache(config)
+    cache.add_many([f"test {i}" for i in range(5)])
+    return cache
+
+
+def test_get_relevant_with_min_score(one_hot_cache):
+    assert one_hot_cache.get_relevant("test 3", 2)[0] == "test 3"
+    assert one_hot_cache.get_relevant("test 3", 2, min_score=0.5) == ["test 3"]
+
+
+def test_get_relevant_many_embeds_queries_once(one_hot_cache, mocker):
+    get_ada_embeddings = mocker.patch(
+        "autogpt.memory.local.get_ada_embeddings", side_effect=one_hot
+    )
+
+    results = one_hot_cache.get_relevant_many(["test 1", "test 4"], 3, min_score=0.5)
+
+    assert results == [["test 1"], ["test 4"]]
+    get_ada_embeddings.assert_called_once_with(["test 1", "test 4"])
+    assert one_hot_cache.get_relevant_many([], 3) == []
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_quantized_cache_content_scores_close_to_float32(dtype):
+    vectors = np.random.default_rng(0).normal(size=(100, EMBED_DIM))
+    exact = CacheContent()
+    exact.add_many([str(i) for i in range(100)], vectors)
+    quantized = CacheContent(dtype=dtype)
+    quantized.add_many([str(i) for i in range(100)], vectors)
+
+    assert quantized.buffer.dtype == np.dtype(dtype)
+    np.testing.assert_allclose(quantized.embeddings, exact.embeddings, atol=0.05)
+    queries = vectors[:3]
+    np.testing.assert_allclose(
+        quantized.scores(queries), exact.scores(queries), rtol=0.02, atol=1.0
+    )
+    assert top_k_indices(quantized.scores(vectors[7]), 1).tolist() == [7]
+
+
+def test_cache_content_with_unknown_dtype():
+    with pytest.raises(ValueError):
+        CacheContent(dtype="float64")
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_quantized_memory_persists_across_runs(
+    LocalCache, config, workspace, mocker, dtype
+):
+    mocker.patch.object(config, "local_cache_dtype", dtype)
+    mocker.patch("autogpt.memory.local.get_ada_embeddings", side_effect=one_hot)
+    LocalCache(config).add_many(["test 1", "test 2"])
+
+    LocalCache._instances.pop(LocalCache, None)
+    cache = LocalCache(config)
+    cache.add_many(["test 3"])
+
+    assert read_header(config, workspace)["dtype"] == dtype
+    assert cache.data.buffer.dtype == np.dtype(dtype)
+    assert cache.data.embeddings.argmax(axis=1).tolist() == [1, 2, 3]
+    assert cache.data.embeddings.max(axis=1).tolist() == [1.0, 1.0, 1.0]
+
+
+def test_unknown_dtype_leaves_the_memory_files_alone(
+    LocalCache, config, workspace, mocker
+):
+    mocker.patch("autogpt.memory.local.get_ada_embeddings", side_effect=one_hot)
+    LocalCache(config).add_many(["test 1"])
+    texts_file = workspace.root / f"{config.memory_index}.jsonl"
+    texts = texts_file.read_bytes()
+
+    mocker.patch.object(config, "local_cache_dtype", "float64")
+    LocalCache._instances.pop(LocalCache, None)
+    with pytest.raises(ValueError):
+        LocalCache(config)
+
+    assert texts_file.read_bytes() == texts
+    assert read_header(config, workspace)["count"] == 1
+
+
+def test_memory_keeps_the_dtype_of_its_files(LocalCache, config, mocker):
+    mocker.patch("autogpt.memory.local.get_ada_embeddings", side_effect=one_hot)
+    LocalCache(config).add_many(["test 1"])
+
+    mocker.patch.object(config, "local_cache_dtype", "int8")
+    LocalCache._instances.pop(LocalCache, None)
+    cache = LocalCache(config)
+    assert cache.data.dtype == "float32"
+
+    cache.clear()
+    assert cache.data.dtype == "int8"
+
+
+def clustered(texts):
+    """Embed "test i" as a unit vector near one of 10 directions, chosen by i"""
+    rng = np.random.default_rng(0)
+    topics = rng.normal(size=(10, EMBED_DIM))
+    embeddings = []
+    for text in texts:
+        i = int(text.split()[-1])
+        noise = np.random.default_rng(i).normal(scale=0.1, size=EMBED_DIM)
+        embedding = topics[i % 10] + noise
+        embeddings.append((embedding / np.linalg.norm(embedding)).tolist())
+    return embeddings
+
+
+@pytest.fixture
+def ivf_config(config, mocker):
+    mocker.patch.multiple(
+        config,
+        local_cache_index="ivf",
+        local_cache_ivf_lists=0,
+        local_cache_ivf_probes=2,
+        local_cache_ivf_min_rows=100,
+    )
+    mocker.patch("autogpt.memory.local.get_ada_embeddings", side_effect=clustered)
+    mocker.patch(
+        "autogpt.memory.local.get_ada_embedding",
+        side_effect=lambda text: clustered([text])[0],
+    )
+    return config
+
+
+def test_ivf_index_is_trained_once_there_are_enough_rows(LocalCache, ivf_config):
+    cache = LocalCache(ivf_config)
+    cache.add_many([f"test {i}" for i in range(99)])
+    assert not cache.index.trained
+    # Below min_rows the search is exact
+    assert cache.get_relevant("test 13", 1) == ["test 13"]
+
+    cache.add("test 99")
+
+    assert cache.index.trained
+    assert len(cache.index.centroids) == 10
+    assert cache.get_relevant("test 13", 1) == ["test 13"]
+    assert cache.get_relevant_many(["test 13", "test 27"], 1) == [
+        ["test 13"],
+        ["test 27"],
+    ]
+    # Only the rows of the probed clusters are scored
+    candidates = cache.index.candidates(np.array(clustered(["test 13"])[0]))
+    assert 10 <= len(candidates) < 100
+
+
+def test_ivf_index_adds_rows_to_the_nearest_cluster(LocalCache, ivf_config):
+    cache = LocalCache(ivf_config)
+    cache.add_many([f"test {i}" for i in range(100)])
+
+    cache.add("test 103")
+
+    assert cache.index.length == 101
+    assert cache.index.lists[100] == cache.index.lists[3]
+    assert cache.get_relevant("test 103", 1) == ["test 103"]
+
+
+def test_ivf_index_is_retrained_when_rows_quadruple(LocalCache, ivf_config):
+    cache = LocalCache(ivf_config)
+    cache.add_many([f"test {i}" for i in range(100)])
+
+    cache.add_many([f"test {i}" for i in range(100, 400)])
+
+    assert len(cache.index.centroids) == 20
+    assert cache.index.length == 400
+
+
+def test_ivf_index_persists_across_runs(LocalCache, ivf_config, workspace, mocker):
+    cache = LocalCache(ivf_config)
+    cache.add_many([f"test {i}" for i in range(100)])
+    centroids = cache.index.centroids
+    # A row whose cluster wasn't written yet
+    cache.data.add("test 100", clustered(["test 100"])[0])
+    cache._append(["test 100"])
+
+    LocalCache._instances.pop(LocalCache, None)
+    train = mocker.spy(IVFIndex, "_train")
+    cache = LocalCache(ivf_config)
+
+    train.assert_not_called()
+    np.testing.assert_array_equal(cache.index.centroids, centroids)
+    assert cache.index.length == 101
+    assert cache.get_relevant("test 100", 1) == ["test 100"]
+
+    cache.clear()
+    assert not cache.index.trained
+    assert not (workspace.root / f"{ivf_config.memory_index}.ivf.npy").exists()
+
+
+def test_unknown_local_cache_index(LocalCache, config, mocker):
+    mocker.patch.object(config, "local_cache_index", "hnsw")
+
+    with pytest.raises(ValueError):
+        LocalCache(config)
@@ -38,6 +38,18 @@ try:
             result = self.memory.get(text)
             self.assertEqual([text], result)
 
+        def test_add_skips_stored_text(self) -> None:
+            """Test that a text is looked up in the collection before it is added"""
+            text = "Sample text"
+            self.memory.clear()
+            self.memory.add(text)
+            MilvusMemory._instances.pop(MilvusMemory, None)
+            memory = MilvusMemory(self.cfg)
+            self.assertEqual(memory.is_stored([text, "Other text"]), [True, False])
+            memory.add_many([text])
+            memory.collection.flush()
+            self.assertEqual(memory.collection.num_entities, 1)
+
         def test_clear(self) -> None:
             """Test clearing the cache"""
             self.memory.clear()
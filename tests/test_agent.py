@@ -1,8 +1,10 @@
+import json
 from unittest.mock import MagicMock
 
 import pytest
 
 from autogpt.agent import Agent
+from autogpt.agent.agent import StreamedReply
 from autogpt.config import Config
 
 
@@ -45,3 +47,43 @@ def test_agent_initialization(agent):
 
 # More test methods can be added for specific agent interactions
 # For example, mocking chat_with_ai and testing the agent's interaction loop
+
+
+def test_streamed_reply_prints_thoughts_and_resolves_command_early(agent, mocker):
+    print_thought = mocker.patch("autogpt.agent.agent.print_assistant_thought")
+    on_first_output = MagicMock()
+    streamed_reply = StreamedReply(agent, False, on_first_output)
+    reply = json.dumps(
+        {
+            "thoughts": {"text": "thought", "reasoning": "reasoning"},
+            "command": {"name": "read_file", "args": {"filename": "notes.txt"}},
+        }
+    )
+
+    for start in range(0, len(reply) - 1, 4):
+        streamed_reply.feed(reply[start : min(start + 4, len(reply) - 1)])
+
+    # Everything is handled before the final "}" arrives
+    on_first_output.assert_called_once()
+    assert [c.args[1:3] for c in print_thought.call_args_list] == [
+        ("text", "thought"),
+        ("reasoning", "reasoning"),
+    ]
+    assert streamed_reply.thoughts == {"text": "thought", "reasoning": "reasoning"}
+    command_name, arguments = streamed_reply.resolved_command
+    assert command_name == "read_file"
+    assert arguments["filename"] == str(agent.workspace.get_path("notes.txt"))
+    # The streamed command object itself is left as it was received
+    assert streamed_reply.command["args"] == {"filename": "notes.txt"}
+
+
+def test_streamed_reply_reset_discards_the_partial_reply(agent, mocker):
+    mocker.patch("autogpt.agent.agent.print_assistant_thought")
+    streamed_reply = StreamedReply(agent, False)
+    streamed_reply.feed('{"thoughts": {"text": "first"}, "command": {"name": "a')
+
+    streamed_reply.reset()
+    streamed_reply.feed('{"thoughts": {"text": "second"}}')
+
+    assert streamed_reply.thoughts == {"text": "second"}
+    assert streamed_reply.command is None
@@ -115,3 +115,22 @@ class TestApiManager:
         assert api_manager.get_total_prompt_tokens() == 50
         assert api_manager.get_total_completion_tokens() == 100
         assert api_manager.get_total_cost() == (50 * 0.002 + 100 * 0.002) / 1000
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_acreate_chat_completion_valid_inputs():
+        """Test if the async path accounts tokens and cost like the sync one."""
+        messages = [{"role": "user", "content": "Who won the world series in 2020?"}]
+        model = "gpt-3.5-turbo"
+
+        with patch("openai.ChatCompletion.acreate") as mock_acreate:
+            mock_response = MagicMock()
+            mock_response.usage.prompt_tokens = 10
+            mock_response.usage.completion_tokens = 20
+            mock_acreate.return_value = mock_response
+
+            await api_manager.acreate_chat_completion(messages, model=model)
+
+            assert api_manager.get_total_prompt_tokens() == 10
+            assert api_manager.get_total_completion_tokens() == 20
+            assert api_manager.get_total_cost() == (10 * 0.002 + 20 * 0.002) / 1000
@@ -117,3 +117,18 @@ def test_set_debug_mode(config):
 
     # Reset debug mode
     config.set_debug_mode(debug_mode)
+
+
+def test_invalid_embedding_cache_dtype(monkeypatch):
+    """
+    Test that an unknown EMBEDDING_CACHE_DTYPE is rejected when the config loads.
+    """
+    monkeypatch.setenv("EMBEDDING_CACHE_DTYPE", "float64")
+    instance = Config._instances.pop(Config, None)
+    try:
+        with pytest.raises(ValueError):
+            Config()
+    finally:
+        Config._instances.pop(Config, None)
+        if instance is not None:
+            Config._instances[Config] = instance
@@ -1,6 +1,6 @@
 import pytest
 
-from autogpt.llm import count_message_tokens, count_string_tokens
+from autogpt.llm import count_message_tokens, count_string_tokens, token_counter
 
 
 def test_count_message_tokens():
@@ -70,3 +70,64 @@ def test_count_string_tokens_gpt_4():
 
     string = "Hello, world!"
     assert count_string_tokens(string, model_name="gpt-4-0314") == 4
+
+
+class _SplitEncoding:
+    """Whitespace tokenizer that counts how often it is asked to encode."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return text.split()
+
+
+@pytest.fixture
+def split_encoding(mocker):
+    encoding = _SplitEncoding()
+    mocker.patch(
+        "autogpt.llm.token_counter.get_encoding_for_model", return_value=encoding
+    )
+    token_counter.token_count_cache.clear()
+    yield encoding
+    token_counter.token_count_cache.clear()
+
+
+def test_count_message_tokens_is_memoized(split_encoding):
+    messages = [
+        {"role": "user", "content": "Hello there"},
+        {"role": "assistant", "content": "General Kenobi"},
+    ]
+    first = count_message_tokens(messages, model="gpt-3.5-turbo")
+    calls_after_first = split_encoding.calls
+
+    assert count_message_tokens(messages, model="gpt-3.5-turbo") == first
+    assert split_encoding.calls == calls_after_first
+    assert token_counter.token_count_cache.hits == 2
+
+
+def test_count_message_tokens_cache_keyed_by_role(split_encoding):
+    count_message_tokens([{"role": "user", "content": "Hello"}])
+    count_message_tokens([{"role": "system", "content": "Hello"}])
+
+    assert token_counter.token_count_cache.hits == 0
+    assert len(token_counter.token_count_cache) == 2
+
+
+def test_count_string_tokens_is_memoized(split_encoding):
+    assert count_string_tokens("one two three", model_name="gpt-4") == 3
+    assert count_string_tokens("one two three", model_name="gpt-4") == 3
+    assert split_encoding.calls == 1
+
+
+def test_token_count_cache_evicts_least_recently_used():
+    cache = token_counter.TokenCountCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
@@ -54,7 +54,7 @@ def test_readable_file_size():
     assert readable_size == "3.50 MB"
 
 
-@patch("requests.get")
+@patch("autogpt.http_client.HttpClient.get")
 def test_get_bulletin_from_web_success(mock_get):
     expected_content = "Test bulletin from web"
 
@@ -68,7 +68,7 @@ def test_get_bulletin_from_web_success(mock_get):
     )
 
 
-@patch("requests.get")
+@patch("autogpt.http_client.HttpClient.get")
 def test_get_bulletin_from_web_failure(mock_get):
     mock_get.return_value.status_code = 404
     bulletin = get_bulletin_from_web()
@@ -76,7 +76,7 @@ def test_get_bulletin_from_web_failure(mock_get):
     assert bulletin == ""
 
 
-@patch("requests.get")
+@patch("autogpt.http_client.HttpClient.get")
 def test_get_bulletin_from_web_exception(mock_get):
     mock_get.side_effect = requests.exceptions.RequestException()
     bulletin = get_bulletin_from_web()
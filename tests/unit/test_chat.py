@@ -24,15 +24,13 @@ def test_generate_context_empty_inputs(mocker):
     # Arrange
     prompt = ""
     relevant_memory = ""
-    full_message_history = []
     model = "gpt-3.5-turbo-0301"
 
     # Act
-    result = generate_context(prompt, relevant_memory, full_message_history, model)
+    result = generate_context(prompt, relevant_memory, model)
 
     # Assert
     expected_result = (
-        -1,
         32,
         2,
         [
@@ -51,28 +49,16 @@ def test_generate_context_valid_inputs():
     # Given
     prompt = "What is your favorite color?"
     relevant_memory = "You once painted your room blue."
-    full_message_history = [
-        create_chat_message("user", "Hi there!"),
-        create_chat_message("assistant", "Hello! How can I assist you today?"),
-        create_chat_message("user", "Can you tell me a joke?"),
-        create_chat_message(
-            "assistant",
-            "Why did the tomato turn red? Because it saw the salad dressing!",
-        ),
-        create_chat_message("user", "Haha, that's funny."),
-    ]
     model = "gpt-3.5-turbo-0301"
 
     # When
-    result = generate_context(prompt, relevant_memory, full_message_history, model)
+    result = generate_context(prompt, relevant_memory, model)
 
     # Then
     assert isinstance(result[0], int)
     assert isinstance(result[1], int)
-    assert isinstance(result[2], int)
-    assert isinstance(result[3], list)
-    assert result[0] >= 0
-    assert result[2] >= 0
+    assert isinstance(result[2], list)
     assert result[1] >= 0
-    assert len(result[3]) >= 2  # current_context should have at least 2 messages
-    assert result[1] <= 2048  # token limit for GPT-3.5-turbo-0301 is 2048 tokens
+    assert result[0] >= 0
+    assert len(result[2]) >= 2  # current_context should have at least 2 messages
+    assert result[0] <= 2048  # token limit for GPT-3.5-turbo-0301 is 2048 tokens
@@ -0,0 +1,88 @@
+import pytest
+
+from autogpt.llm import ContextWindow, create_chat_message
+
+
+@pytest.fixture
+def count_calls(mocker):
+    """Count each message as one token per word, recording every counted message."""
+    counted = []
+
+    def count_message_tokens(messages, model):
+        counted.extend(messages)
+        return sum(len(message["content"].split()) for message in messages)
+
+    mocker.patch(
+        "autogpt.llm.context_window.count_message_tokens",
+        side_effect=count_message_tokens,
+    )
+    return counted
+
+
+def test_sync_only_counts_new_messages(count_calls):
+    window = ContextWindow("gpt-3.5-turbo")
+    history = [create_chat_message("user", "one two")]
+    window.sync(history)
+
+    history.append(create_chat_message("assistant", "three four five"))
+    window.sync(history)
+
+    assert count_calls == history
+    assert window.total_tokens == 5
+    assert window.messages == history
+
+
+def test_trim_drops_oldest_messages(count_calls):
+    window = ContextWindow("gpt-3.5-turbo")
+    history = [
+        create_chat_message("user", "one two three"),
+        create_chat_message("assistant", "four five"),
+        create_chat_message("system", "six"),
+    ]
+    window.sync(history)
+
+    trimmed = window.trim(3)
+
+    assert trimmed == history[:1]
+    assert window.messages == history[1:]
+    assert window.total_tokens == 3
+    assert window.trim(3) == []
+
+
+def test_trim_everything_when_budget_too_small(count_calls):
+    window = ContextWindow("gpt-3.5-turbo")
+    history = [create_chat_message("user", "one two three")]
+    window.sync(history)
+
+    assert window.trim(0) == history
+    assert len(window) == 0
+    assert window.total_tokens == 0
+
+
+def test_trim_brings_messages_back_when_the_budget_grows(count_calls):
+    window = ContextWindow("gpt-3.5-turbo")
+    history = [
+        create_chat_message("user", "one two three"),
+        create_chat_message("assistant", "four five"),
+        create_chat_message("system", "six"),
+    ]
+    window.sync(history)
+    assert window.trim(1) == history[:2]
+
+    # Messages come back while they fit, and are not returned a second time
+    assert window.trim(4) == []
+    assert window.messages == history[1:]
+    assert window.total_tokens == 3
+    assert window.trim(1) == []
+    assert window.messages == history[2:]
+
+
+def test_sync_restarts_when_history_is_replaced(count_calls):
+    window = ContextWindow("gpt-3.5-turbo")
+    window.sync([create_chat_message("user", "a"), create_chat_message("user", "b")])
+
+    history = [create_chat_message("user", "c")]
+    window.sync(history)
+
+    assert window.messages == history
+    assert window.total_tokens == 1
@@ -0,0 +1,117 @@
+import pytest
+
+from autogpt.llm import ApiManager, llm_utils
+from autogpt.llm.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache_config(config, tmp_path, mocker):
+    mocker.patch.multiple(
+        config,
+        use_embedding_cache=True,
+        embedding_cache_path=str(tmp_path / "embedding_cache"),
+        embedding_cache_dtype="float32",
+        embedding_cache_max_entries=100,
+        embedding_cache_memory_entries=2,
+    )
+    yield config
+    EmbeddingCache._instances.pop(EmbeddingCache, None)
+
+
+def new_cache() -> EmbeddingCache:
+    EmbeddingCache._instances.pop(EmbeddingCache, None)
+    return EmbeddingCache()
+
+
+def test_put_and_get(cache_config):
+    cache = new_cache()
+    assert cache.get("ada", "hello") is None
+
+    cache.put("ada", "hello", [0.5, 0.25])
+
+    assert cache.get("ada", "hello") == [0.5, 0.25]
+    assert cache.get("other-model", "hello") is None
+
+
+def test_persists_across_instances(cache_config):
+    cache = new_cache()
+    for i in range(5):
+        cache.put("ada", f"text {i}", [float(i), 1.0])
+
+    cache = new_cache()
+
+    assert len(cache) == 5
+    # Read back from disk, as the in-memory tier starts out empty
+    assert cache.get("ada", "text 3") == [3.0, 1.0]
+
+
+def test_load_drops_partially_written_entries(cache_config):
+    cache = new_cache()
+    cache.put("ada", "text 0", [0.0, 1.0])
+    cache.put("ada", "text 1", [1.0, 1.0])
+    # A crash after writing the vector of a third entry, but not its key
+    with open(cache.path / "vectors.bin", "ab") as f:
+        f.write(b"\xff" * 8)
+
+    cache = new_cache()
+    assert len(cache) == 2
+    cache.put("ada", "text 2", [2.0, 1.0])
+
+    cache = new_cache()
+    assert cache.get("ada", "text 2") == [2.0, 1.0]
+    assert cache.get("ada", "text 1") == [1.0, 1.0]
+    assert (cache.path / "vectors.bin").stat().st_size == 3 * 2 * 4
+
+
+def test_texts_differing_in_whitespace_share_an_entry(cache_config):
+    cache = new_cache()
+    cache.put("ada", "hello  world\n", [0.5, 0.25])
+
+    assert cache.get("ada", " hello world") == [0.5, 0.25]
+    assert len(cache) == 1
+
+
+def test_float16_storage(cache_config, mocker):
+    mocker.patch.object(cache_config, "embedding_cache_dtype", "float16")
+    cache = new_cache()
+    cache.put("ada", "hello", [0.1, 0.2])
+
+    cache = new_cache()
+
+    assert cache.get("ada", "hello") == pytest.approx([0.1, 0.2], abs=1e-3)
+    assert (cache.path / "vectors.bin").stat().st_size == 2 * 2
+
+
+def test_evicts_least_recently_used(cache_config, mocker):
+    mocker.patch.object(cache_config, "embedding_cache_max_entries", 4)
+    cache = new_cache()
+    for i in range(4):
+        cache.put("ada", f"text {i}", [float(i)])
+    cache.get("ada", "text 0")
+
+    cache.put("ada", "text 4", [4.0])
+
+    cache = new_cache()
+    assert len(cache) == 3
+    assert cache.get("ada", "text 0") == [0.0]
+    assert cache.get("ada", "text 1") is None
+    assert cache.get("ada", "text 4") == [4.0]
+
+
+def test_get_ada_embeddings_only_embeds_misses(cache_config, mocker, api_manager):
+    create_embeddings = mocker.patch.object(
+        llm_utils,
+        "create_embeddings",
+        side_effect=lambda texts, **kwargs: [[float(len(t))] for t in texts],
+    )
+
+    assert llm_utils.get_ada_embeddings(["a", "bb"]) == [[1.0], [2.0]]
+    assert llm_utils.get_ada_embeddings(["bb", "ccc", "ccc"]) == [
+        [2.0],
+        [3.0],
+        [3.0],
+    ]
+
+    assert create_embeddings.call_args_list[1].args == (["ccc"],)
+    assert ApiManager().get_embedding_cache_hits() == 1
+    assert ApiManager().get_embedding_cache_misses() == 3
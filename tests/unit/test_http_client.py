@@ -0,0 +1,75 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import api_requestor
+
+from autogpt.http_client import HttpClient, install_openai_transport
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def http_client(config):
+    HttpClient._instances.pop(HttpClient, None)
+    yield HttpClient()
+    HttpClient._instances.pop(HttpClient, None)
+
+
+def test_requests_reuse_connections(server, http_client):
+    for _ in range(3):
+        assert http_client.get(f"http://{server}/").text == "ok"
+
+    stats = http_client.get_host_stats()[server]
+    assert stats.requests == 3
+    assert stats.new_connections == 1
+    assert stats.reuse_ratio == pytest.approx(2 / 3)
+
+
+def test_sessions_share_connections(server, http_client):
+    http_client.get(f"http://{server}/")
+    http_client.new_session().get(f"http://{server}/")
+
+    assert http_client.get_host_stats()[server].new_connections == 1
+
+
+def test_keep_alive_disabled(server, config, mocker):
+    mocker.patch.object(config, "http_keep_alive", False)
+    HttpClient._instances.pop(HttpClient, None)
+    http_client = HttpClient()
+
+    for _ in range(2):
+        http_client.get(f"http://{server}/")
+
+    assert http_client.get_host_stats()[server].new_connections == 2
+    HttpClient._instances.pop(HttpClient, None)
+
+
+def test_install_openai_transport(http_client, mocker):
+    mocker.patch.object(api_requestor, "_make_session", api_requestor._make_session)
+
+    install_openai_transport()
+    session = api_requestor._make_session()
+
+    assert session.get_adapter("https://api.openai.com") is http_client.adapter
@@ -0,0 +1,71 @@
+import json
+
+from autogpt.json_utils.incremental import IncrementalJsonParser
+
+REPLY = {
+    "thoughts": {
+        "text": 'I need to "read" {the} file',
+        "reasoning": "reasoning",
+        "plan": "- read\n- summarize",
+        "criticism": "criticism",
+        "speak": "speak",
+    },
+    "command": {"name": "read_file", "args": {"filename": "notes.txt"}},
+}
+
+
+def feed_in_pieces(parser, text, size):
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start : start + size]))
+    return completed
+
+
+def test_reports_values_as_they_complete():
+    text = "Here you go:\n" + json.dumps(REPLY, indent=2) + "\nThat's it."
+
+    completed = feed_in_pieces(IncrementalJsonParser(), text, 3)
+
+    assert [path for path, _ in completed] == [
+        ("thoughts", "text"),
+        ("thoughts", "reasoning"),
+        ("thoughts", "plan"),
+        ("thoughts", "criticism"),
+        ("thoughts", "speak"),
+        ("thoughts",),
+        ("command", "name"),
+        ("command", "args"),
+        ("command",),
+        (),
+    ]
+    assert dict(completed)[("thoughts", "text")] == REPLY["thoughts"]["text"]
+    assert dict(completed)[("command",)] == REPLY["command"]
+    assert dict(completed)[()] == REPLY
+
+
+def test_command_is_reported_before_the_reply_ends():
+    parser = IncrementalJsonParser()
+    text = json.dumps(REPLY)
+
+    completed = parser.feed(text[:-1])
+
+    assert completed[-1] == (("command",), REPLY["command"])
+    assert parser.feed(text[-1:]) == [((), REPLY)]
+    assert parser.done
+
+
+def test_array_elements():
+    completed = IncrementalJsonParser().feed('{"plan": ["a", "b"]}')
+
+    assert completed == [
+        (("plan", "[]"), "a"),
+        (("plan", "[]"), "b"),
+        (("plan",), ["a", "b"]),
+        ((), {"plan": ["a", "b"]}),
+    ]
+
+
+def test_invalid_values_are_skipped():
+    completed = IncrementalJsonParser().feed('{"command": {"name": x}, "a": "b"}')
+
+    assert completed == [(("a",), "b")]
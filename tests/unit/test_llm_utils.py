@@ -1,6 +1,9 @@
 import pytest
-from openai.error import APIError, RateLimitError
+import requests
+from openai.error import APIError, RateLimitError, ServiceUnavailableError, Timeout
+from openai.util import convert_to_openai_object
 
+from autogpt.llm import api_manager as api_manager_module
 from autogpt.llm import llm_utils
 
 
@@ -131,3 +134,238 @@ def test_chunked_tokens():
     ]
     output = list(llm_utils.chunked_tokens(text, "cl100k_base", 8191))
     assert output == expected_output
+
+
+@pytest.mark.asyncio
+async def test_retry_open_api_async(error):
+    calls = []
+
+    @llm_utils.retry_openai_api(num_retries=2, backoff_base=0.001)
+    async def f():
+        calls.append(1)
+        if len(calls) <= 2:
+            raise error
+        return len(calls)
+
+    assert await f() == 3
+
+
+@pytest.mark.asyncio
+async def test_acreate_chat_completion(mocker, config):
+    response = mocker.MagicMock()
+    response.choices[0].message = {"content": "Hello!"}
+    acreate = mocker.patch.object(
+        llm_utils.ApiManager,
+        "acreate_chat_completion",
+        new=mocker.AsyncMock(return_value=response),
+    )
+    mocker.patch.object(config, "plugins", [])
+    mocker.patch.object(config, "use_azure", False)
+
+    messages = [{"role": "user", "content": "Hi"}]
+    reply = await llm_utils.acreate_chat_completion(messages, model="gpt-3.5-turbo")
+
+    assert reply == "Hello!"
+    acreate.assert_awaited_once_with(
+        model="gpt-3.5-turbo", messages=messages, temperature=0, max_tokens=None
+    )
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        RateLimitError("Error"),
+        Timeout("Error"),
+        ServiceUnavailableError("Error"),
+        APIError("Error", http_status=502),
+    ],
+)
+def test_create_chat_completion_fails_once_retries_are_exhausted(
+    mocker, config, retry_engine, error
+):
+    create = mocker.patch.object(
+        llm_utils.ApiManager, "create_chat_completion", side_effect=error
+    )
+    mocker.patch.multiple(
+        config,
+        plugins=[],
+        use_azure=False,
+        use_response_cache=False,
+        llm_retry_max_backoff=0,
+        debug_mode=True,
+    )
+    retry_engine.failure_threshold = 100
+
+    with pytest.raises(RuntimeError, match="after 10 attempts"):
+        llm_utils.create_chat_completion(
+            [{"role": "user", "content": "Hi"}], model="gpt-3.5-turbo"
+        )
+    assert create.call_count == 10
+
+
+@pytest.mark.asyncio
+async def test_acreate_chat_completion_fails_once_retries_are_exhausted(
+    mocker, config, retry_engine
+):
+    acreate = mocker.patch.object(
+        llm_utils.ApiManager,
+        "acreate_chat_completion",
+        new=mocker.AsyncMock(side_effect=Timeout("Error")),
+    )
+    mocker.patch.multiple(
+        config,
+        plugins=[],
+        use_azure=False,
+        use_response_cache=False,
+        llm_retry_max_backoff=0,
+        debug_mode=True,
+    )
+    retry_engine.failure_threshold = 100
+
+    with pytest.raises(RuntimeError, match="after 10 attempts"):
+        await llm_utils.acreate_chat_completion(
+            [{"role": "user", "content": "Hi"}], model="gpt-3.5-turbo"
+        )
+    assert acreate.await_count == 10
+
+
+def test_create_chat_completion_raises_errors_that_are_not_retried(mocker, config):
+    error = APIError("Error", http_status=400)
+    create = mocker.patch.object(
+        llm_utils.ApiManager, "create_chat_completion", side_effect=error
+    )
+    mocker.patch.multiple(config, plugins=[], use_azure=False, use_response_cache=False)
+
+    with pytest.raises(APIError):
+        llm_utils.create_chat_completion(
+            [{"role": "user", "content": "Hi"}], model="gpt-3.5-turbo"
+        )
+    create.assert_called_once()
+
+
+@pytest.fixture
+def word_chunks(mocker):
+    """Tokenize on whitespace so that chunking does not need a tiktoken download."""
+
+    def chunked_tokens(text, tokenizer_name, chunk_length):
+        yield from llm_utils.batched(text.split(), chunk_length)
+
+    mocker.patch.object(llm_utils, "chunked_tokens", side_effect=chunked_tokens)
+
+
+def test_create_embeddings_batches_and_keeps_order(mocker, config, word_chunks):
+    mocker.patch.multiple(
+        config,
+        embedding_token_limit=2,
+        embedding_batch_size=3,
+        embedding_batch_token_limit=100,
+    )
+
+    def create(input, **kwargs):
+        # Answer in reverse order, as the API does not promise to keep it
+        response = mocker.MagicMock()
+        response.usage.prompt_tokens = sum(len(chunk) for chunk in input)
+        response.__getitem__.return_value = [
+            {"index": i, "embedding": [float(len(chunk)), 1.0]}
+            for i, chunk in reversed(list(enumerate(input)))
+        ]
+        return response
+
+    embedding_create = mocker.patch("openai.Embedding.create", side_effect=create)
+
+    embeddings = llm_utils.create_embeddings(["a", "b c", "d e f", "g"])
+
+    # 5 chunks of at most 2 tokens, at most 3 chunks per request
+    assert embedding_create.call_count == 2
+    assert [len(call.kwargs["input"]) for call in embedding_create.call_args_list] == [
+        3,
+        2,
+    ]
+    assert len(embeddings) == 4
+    # "d e f" is chunked to "d e" and "f": its embedding is the weighted average
+    expected = [(2 * 2 + 1 * 1) / 3, 1.0]
+    norm = (expected[0] ** 2 + expected[1] ** 2) ** 0.5
+    assert embeddings[2] == pytest.approx([x / norm for x in expected])
+    assert embeddings[0] == pytest.approx([2**-0.5, 2**-0.5])
+
+
+def test_create_embeddings_respects_batch_token_limit(mocker, config, word_chunks):
+    mocker.patch.multiple(
+        config,
+        embedding_token_limit=8191,
+        embedding_batch_size=2048,
+        embedding_batch_token_limit=4,
+    )
+    response = mocker.MagicMock()
+    response.usage.prompt_tokens = 0
+    response.__getitem__.return_value = [{"index": 0, "embedding": [1.0]}]
+    embedding_create = mocker.patch("openai.Embedding.create", return_value=response)
+
+    llm_utils.create_embeddings(["a b c", "d e"])
+
+    assert embedding_create.call_count == 2
+
+
+def test_create_chat_completion_streams_deltas(mocker, config, api_manager):
+    chunks = [
+        convert_to_openai_object({"choices": [{"delta": delta}]})
+        for delta in [{"role": "assistant"}, {"content": "Hel"}, {"content": "lo!"}, {}]
+    ]
+    create = mocker.patch("openai.ChatCompletion.create", return_value=iter(chunks))
+    mocker.patch.object(api_manager_module, "count_message_tokens", return_value=10)
+    mocker.patch.object(api_manager_module, "count_string_tokens", return_value=2)
+    mocker.patch.multiple(config, plugins=[], use_azure=False, use_response_cache=False)
+
+    deltas = []
+    reply = llm_utils.create_chat_completion(
+        [{"role": "user", "content": "Hi"}],
+        model="gpt-3.5-turbo",
+        on_delta=deltas.append,
+    )
+
+    assert reply == "Hello!"
+    assert deltas == ["Hel", "lo!"]
+    assert create.call_args.kwargs["stream"] is True
+    assert api_manager.get_total_prompt_tokens() == 10
+    assert api_manager.get_total_completion_tokens() == 2
+
+
+def test_create_chat_completion_retries_a_stream_that_fails_halfway(
+    mocker, config, api_manager
+):
+    def stream(deltas, fail=False):
+        for delta in deltas:
+            yield convert_to_openai_object({"choices": [{"delta": delta}]})
+        if fail:
+            raise requests.exceptions.ChunkedEncodingError("Connection broken")
+
+    create = mocker.patch(
+        "openai.ChatCompletion.create",
+        side_effect=[
+            stream([{"role": "assistant"}, {"content": "Hel"}], fail=True),
+            stream([{"role": "assistant"}, {"content": "Hel"}, {"content": "lo!"}]),
+        ],
+    )
+    mocker.patch.object(api_manager_module, "count_message_tokens", return_value=10)
+    mocker.patch.object(api_manager_module, "count_string_tokens", return_value=2)
+    mocker.patch.multiple(
+        config,
+        plugins=[],
+        use_azure=False,
+        use_response_cache=False,
+        llm_retry_max_backoff=0,
+    )
+
+    deltas = []
+    reply = llm_utils.create_chat_completion(
+        [{"role": "user", "content": "Hi"}],
+        model="gpt-3.5-turbo",
+        on_delta=deltas.append,
+        on_retry=deltas.clear,
+    )
+
+    assert reply == "Hello!"
+    assert create.call_count == 2
+    # The pieces of the failed attempt were discarded
+    assert deltas == ["Hel", "lo!"]
+    assert api_manager.get_total_completion_tokens() == 2
@@ -0,0 +1,174 @@
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytest
+from pinecone.index import Index
+
+from autogpt.memory import pinecone as pinecone_memory
+from autogpt.memory.base import ALREADY_STORED, content_hash
+from autogpt.memory.pinecone import PineconeMemory
+
+EMBED_DIM = 4
+
+
+class IndexStandIn(BaseHTTPRequestHandler):
+    """Serves the vector operations of a Pinecone index from a dict"""
+
+    vectors = {}
+    requests = Counter()
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.requests[url.path] += 1
+        if url.path == "/vectors/fetch":
+            ids = parse_qs(url.query).get("ids", [])
+            found = {id_: self.vectors[id_] for id_ in ids if id_ in self.vectors}
+            self.reply({"vectors": found, "namespace": ""})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        self.requests[self.path] += 1
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/vectors/upsert":
+            self.vectors.update({vector["id"]: vector for vector in body["vectors"]})
+            self.reply({"upsertedCount": len(body["vectors"])})
+        elif self.path == "/query":
+            query = np.array(body["vector"])
+            matches = [
+                {
+                    "id": vector["id"],
+                    "score": float(np.dot(query, vector["values"])),
+                    "metadata": vector["metadata"],
+                }
+                for vector in self.vectors.values()
+            ]
+            matches.sort(key=lambda match: match["score"], reverse=True)
+            self.reply({"matches": matches[: body["topK"]], "namespace": ""})
+        elif self.path == "/vectors/delete":
+            if body.get("deleteAll"):
+                self.vectors.clear()
+            self.reply({})
+        else:
+            self.send_error(404)
+
+
+@pytest.fixture
+def index_stand_in():
+    IndexStandIn.vectors = {}
+    IndexStandIn.requests = Counter()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), IndexStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield IndexStandIn, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def memory(mocker, config, index_stand_in):
+    _, url = index_stand_in
+
+    def index(name, pool_threads):
+        index = Index(name, pool_threads=pool_threads)
+        index.configuration.host = url
+        index.configuration.api_key["ApiKeyAuth"] = "test-key"
+        return index
+
+    # Without pinecone.init, which asks the controller for the project name
+    mocker.patch.object(pinecone_memory.pinecone.Config, "validate")
+    mocker.patch.multiple(
+        pinecone_memory.pinecone,
+        init=mocker.DEFAULT,
+        whoami=mocker.DEFAULT,
+        list_indexes=mocker.Mock(return_value=["auto-gpt"]),
+        Index=index,
+    )
+    mocker.patch.object(config, "pinecone_batch_size", 2)
+    PineconeMemory._instances.pop(PineconeMemory, None)
+    memory = PineconeMemory(config)
+    yield memory
+    memory.index.close()
+    PineconeMemory._instances.pop(PineconeMemory, None)
+
+
+def one_hot(text):
+    """Embeds a text as the axis of its last digit"""
+    return np.eye(EMBED_DIM)[int(text[-1]) % EMBED_DIM].tolist()
+
+
+@pytest.fixture(autouse=True)
+def get_ada_embeddings(mocker):
+    return mocker.patch.object(
+        pinecone_memory,
+        "get_ada_embeddings",
+        side_effect=lambda texts: [one_hot(text) for text in texts],
+    )
+
+
+def test_add_many_upserts_in_batches(memory, index_stand_in, get_ada_embeddings):
+    stand_in, _ = index_stand_in
+    texts = ["text 0", "text 1", "text 2", "text 1", "text 3"]
+
+    messages = memory.add_many(texts)
+
+    get_ada_embeddings.assert_called_once_with(["text 0", "text 1", "text 2", "text 3"])
+    assert stand_in.requests["/vectors/upsert"] == 2
+    assert set(stand_in.vectors) == {content_hash(text) for text in set(texts)}
+    assert messages[1] == (
+        f"Inserting data into memory at index: {content_hash('text 1')}:\n"
+        " data: text 1"
+    )
+    assert messages[3] == ""
+
+
+def test_add_skips_texts_in_the_index(
+    memory, config, index_stand_in, get_ada_embeddings
+):
+    stand_in, _ = index_stand_in
+    memory.add("text 0")
+
+    # A new process looks the texts that were added before up in the index
+    PineconeMemory._instances.pop(PineconeMemory, None)
+    memory = PineconeMemory(config)
+
+    assert memory.add_many(["text 0", "text 1"])[0] == ""
+    assert memory.add("text 1") == ALREADY_STORED
+    assert get_ada_embeddings.call_args.args[0] == ["text 1"]
+    assert len(stand_in.vectors) == 2
+    memory.index.close()
+
+
+def test_get_relevant_many(memory):
+    memory.add_many(["text 0", "text 1", "text 2"])
+
+    assert memory.get_relevant_many(["query 1", "query 2"], 1) == [
+        ["text 1"],
+        ["text 2"],
+    ]
+    assert memory.get_relevant("query 0", 1) == ["text 0"]
+    assert memory.get_relevant_many([]) == []
+
+
+def test_clear(memory, index_stand_in):
+    stand_in, _ = index_stand_in
+    memory.add("text 0")
+
+    assert memory.clear() == "Obliviated"
+    assert stand_in.vectors == {}
+    assert memory.add("text 0").startswith("Inserting data into memory")
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from autogpt.llm import llm_utils
+from autogpt.llm.rate_limiter import TokenBucket, estimate_chat_tokens, parse_duration
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("1", 1.0), ("0.5", 0.5), ("20ms", 0.02), ("1s", 1.0), ("6m0s", 360.0)],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+def test_parse_duration_invalid():
+    assert parse_duration("soon") is None
+
+
+def test_estimate_chat_tokens():
+    messages = [{"role": "user", "content": "x" * 400}]
+
+    assert estimate_chat_tokens(messages, None) == 104
+    assert estimate_chat_tokens(messages, 1000) == 1104
+
+
+def test_token_bucket_spaces_out_reservations():
+    bucket = TokenBucket(60, now=0.0)
+
+    # The full bucket serves a burst of its capacity without waiting
+    assert [bucket.reserve(1, now=0.0) for _ in range(60)] == [0.0] * 60
+    # After that, callers queue up one second (1/60 of a minute) apart
+    assert bucket.reserve(1, now=0.0) == pytest.approx(1.0)
+    assert bucket.reserve(1, now=0.0) == pytest.approx(2.0)
+    assert bucket.reserve(1, now=2.0) == pytest.approx(1.0)
+
+
+def test_token_bucket_allows_oversized_reservation():
+    bucket = TokenBucket(100, now=0.0)
+
+    assert bucket.reserve(1000, now=0.0) == 0.0
+    assert bucket.reserve(1, now=0.0) == pytest.approx(0.6)
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(60, now=0.0)
+
+    bucket.pause(5, now=0.0)
+
+    assert bucket.reserve(1, now=1.0) == pytest.approx(5.0)
+
+
+def test_update_from_headers(rate_limiter):
+    retry_after = rate_limiter.update_from_headers(
+        "gpt-4",
+        {
+            "X-RateLimit-Limit-Requests": "60",
+            "X-RateLimit-Remaining-Requests": "0",
+            "X-RateLimit-Reset-Requests": "1s",
+            "X-RateLimit-Limit-Tokens": "1000",
+        },
+    )
+
+    assert retry_after == pytest.approx(1.0)
+    requests_bucket, tokens_bucket = rate_limiter._buckets["gpt-4"]
+    assert requests_bucket.capacity == 60
+    assert tokens_bucket.capacity == 1000
+    assert rate_limiter.reserve("gpt-4", 10) >= 1.0
+
+
+def test_models_are_limited_separately(rate_limiter):
+    rate_limiter.update_from_headers("gpt-4", {"retry-after": "30"})
+
+    assert rate_limiter.reserve("gpt-4", 1) >= 29
+    assert rate_limiter.reserve("gpt-3.5-turbo", 1) == 0.0
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers the first request with a 429 and the following ones with a reply"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(time.monotonic())
+        if len(self.server.requests) == 1:
+            body = {"error": {"message": "Rate limit reached", "type": "requests"}}
+            self.send_response(429)
+            self.send_header("retry-after", "0.5")
+            self.send_header("x-ratelimit-limit-requests", "600")
+            self.send_header("x-ratelimit-remaining-requests", "0")
+        else:
+            body = {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": "Hi!"}}
+                ],
+                "usage": {"prompt_tokens": 5, "completion_tokens": 2},
+            }
+            self.send_response(200)
+        data = json.dumps(body).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai(mocker, config):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    mocker.patch.object(openai, "api_base", f"http://127.0.0.1:{server.server_port}")
+    mocker.patch.multiple(
+        config,
+        openai_api_key="sk-dummy",
+        plugins=[],
+        use_azure=False,
+        use_response_cache=False,
+    )
+    yield server
+    server.shutdown()
+
+
+def test_create_chat_completion_waits_out_429(fake_openai, rate_limiter, api_manager):
+    start = time.monotonic()
+    reply = llm_utils.create_chat_completion(
+        [{"role": "user", "content": "Hello"}], model="gpt-3.5-turbo"
+    )
+
+    assert reply == "Hi!"
+    assert len(fake_openai.requests) == 2
+    # The retry waited for the retry-after header rather than a fixed backoff
+    retry_delay = fake_openai.requests[1] - fake_openai.requests[0]
+    assert 0.5 <= retry_delay < 3
+    assert time.monotonic() - start < 4
+    assert rate_limiter.rate_limit_errors == 1
+    assert rate_limiter._buckets["gpt-3.5-turbo"][0].capacity == 600
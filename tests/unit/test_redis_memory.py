@@ -0,0 +1,254 @@
+import asyncio
+
+import pytest
+
+redismem = pytest.importorskip("autogpt.memory.redismem")
+RedisMemory = redismem.RedisMemory
+
+EMBED_DIM = 4
+
+
+class FakeRedis:
+    """Keeps hashes, sets and counters in dicts, and counts the round trips"""
+
+    def __init__(self, connection_pool=None):
+        self.connection_pool = connection_pool
+        self.hashes = {}
+        self.sets = {}
+        self.counters = {}
+        self.round_trips = 0
+
+    def ping(self):
+        return True
+
+    def flushall(self):
+        self.hashes, self.sets, self.counters = {}, {}, {}
+
+    def ft(self, index):
+        return self
+
+    def create_index(self, **kwargs):
+        pass
+
+    def get(self, key):
+        self.round_trips += 1
+        value = self.counters.get(key)
+        return None if value is None else str(value).encode("utf-8")
+
+    def incrby(self, key, amount):
+        self.round_trips += 1
+        self.counters[key] = self.counters.get(key, 0) + amount
+        return self.counters[key]
+
+    def smismember(self, key, members):
+        self.round_trips += 1
+        return [int(member in self.sets.get(key, set())) for member in members]
+
+    def eval(self, script, numkeys, key, value):
+        self.round_trips += 1
+        if self.counters.get(key) == int(value):
+            self.counters[key] -= 1
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def hset(self, key, mapping):
+        self.commands.append(lambda: self.client.hashes.__setitem__(key, mapping))
+
+    def sadd(self, key, *members):
+        self.commands.append(
+            lambda: self.client.sets.setdefault(key, set()).update(members)
+        )
+
+    def smismember(self, key, members):
+        self.commands.append(
+            lambda: [int(m in self.client.sets.get(key, ())) for m in members]
+        )
+
+    def incrby(self, key, amount):
+        def incrby():
+            self.client.counters[key] = self.client.counters.get(key, 0) + amount
+            return self.client.counters[key]
+
+        self.commands.append(incrby)
+
+    def execute(self):
+        self.client.round_trips += 1
+        return [command() for command in self.commands]
+
+
+class FakeAsyncRedis:
+    """Runs the commands on a FakeRedis, and keeps track of the writes in flight"""
+
+    def __init__(self, client):
+        self.client = client
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+
+    async def smismember(self, key, members):
+        return self.client.smismember(key, members)
+
+    async def incrby(self, key, amount):
+        return self.client.incrby(key, amount)
+
+    def pipeline(self, transaction=True):
+        pipe = self.client.pipeline(transaction)
+
+        async def execute():
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            return FakePipeline.execute(pipe)
+
+        pipe.execute = execute
+        return pipe
+
+    async def close(self, close_connection_pool=None):
+        self.closed = True
+
+
+@pytest.fixture
+def redis_memory(mocker, config):
+    mocker.patch.multiple(config, redis_pipeline_size=3, memory_index="test")
+    pool = mocker.patch.object(redismem.redis, "ConnectionPool")
+    mocker.patch.object(redismem.redis, "Redis", FakeRedis)
+    RedisMemory._instances.pop(RedisMemory, None)
+    memory = RedisMemory(config)
+    memory.redis.round_trips = 0
+    yield memory, pool
+    RedisMemory._instances.pop(RedisMemory, None)
+
+
+@pytest.fixture
+def async_clients(redis_memory, mocker):
+    memory, _ = redis_memory
+    clients = []
+
+    def async_client():
+        clients.append(FakeAsyncRedis(memory.redis))
+        return clients[-1]
+
+    mocker.patch.object(memory, "_async_client", side_effect=async_client)
+    return clients
+
+
+@pytest.fixture
+def get_ada_embeddings(mocker):
+    return mocker.patch.object(
+        redismem,
+        "get_ada_embeddings",
+        side_effect=lambda texts: [[0.1] * EMBED_DIM for _ in texts],
+    )
+
+
+def test_connection_pool(redis_memory, config):
+    memory, pool = redis_memory
+    assert pool.call_args.kwargs["max_connections"] == config.redis_max_connections
+    assert memory.redis.connection_pool is pool.return_value
+
+
+def test_add_many_writes_batches_in_pipelines(redis_memory, get_ada_embeddings):
+    memory, _ = redis_memory
+    texts = [f"text {i}" for i in range(7)]
+
+    messages = memory.add_many(texts + ["Command Error: nope"])
+
+    assert [len(call.args[0]) for call in get_ada_embeddings.call_args_list] == [
+        3,
+        3,
+        1,
+    ]
+    # One lookup of the stored texts, one INCRBY and one pipeline per batch
+    assert memory.redis.round_trips == 5
+    assert memory.redis.counters["test-vec_num"] == 7
+    assert sorted(memory.redis.hashes) == [f"test:{i}" for i in range(7)]
+    assert memory.redis.hashes["test:6"][b"data"] == "text 6"
+    assert messages[0] == "Inserting data into memory at index: 0:\ndata: text 0"
+    assert messages[-1] == ""
+
+
+def test_add_many_continues_the_ids_and_skips_stored_texts(
+    redis_memory, get_ada_embeddings
+):
+    memory, _ = redis_memory
+    memory.add("text 0")
+
+    messages = memory.add_many(["text 0", "text 1", "text 1"])
+
+    assert messages == ["", "Inserting data into memory at index: 1:\ndata: text 1", ""]
+    assert memory.add("text 1") == redismem.ALREADY_STORED
+    assert memory.add("Command Error: nope") == ""
+    assert memory.vec_num == 2
+    assert sorted(memory.redis.hashes) == ["test:0", "test:1"]
+
+
+@pytest.mark.asyncio
+async def test_aadd_many(redis_memory, async_clients, get_ada_embeddings):
+    memory, _ = redis_memory
+    texts = [f"text {i}" for i in range(7)]
+
+    messages = await memory.aadd_many(texts)
+
+    assert messages == memory._messages(texts, [False] * 7, 0)
+    assert memory.redis.round_trips == 5
+    assert sorted(memory.redis.hashes) == [f"test:{i}" for i in range(7)]
+    assert await memory.aadd_many(texts) == [""] * 7
+
+    assert all(client.closed for client in async_clients)
+
+
+def test_aadd_many_in_successive_event_loops(
+    redis_memory, async_clients, get_ada_embeddings
+):
+    memory, _ = redis_memory
+
+    asyncio.run(memory.aadd_many(["text 0"]))
+    asyncio.run(memory.aadd_many(["text 1"]))
+
+    assert len(async_clients) == 2
+    assert all(client.closed for client in async_clients)
+    assert sorted(memory.redis.hashes) == ["test:0", "test:1"]
+
+
+@pytest.mark.asyncio
+async def test_aadd_many_bounds_the_writes_in_flight(
+    redis_memory, async_clients, get_ada_embeddings, mocker, config
+):
+    memory, _ = redis_memory
+    mocker.patch.multiple(config, redis_pipeline_size=1, redis_max_connections=2)
+
+    await memory.aadd_many([f"text {i}" for i in range(6)])
+
+    assert async_clients[0].max_in_flight == 2
+    assert len(memory.redis.hashes) == 6
+
+
+def test_add_takes_two_round_trips(redis_memory, get_ada_embeddings):
+    memory, _ = redis_memory
+
+    message = memory.add("text 0")
+
+    assert message == "Inserting data into memory at index: 0:\ndata: text 0"
+    assert memory.redis.round_trips == 2
+    assert memory.redis.hashes["test:0"][b"data"] == "text 0"
+    assert memory.add("text 1") != redismem.ALREADY_STORED
+    assert memory.vec_num == 2
+
+
+def test_add_gives_back_the_id_of_a_stored_text(redis_memory, get_ada_embeddings):
+    memory, _ = redis_memory
+    memory.add("text 0")
+
+    assert memory.add("text 0") == redismem.ALREADY_STORED
+    assert memory.redis.counters["test-vec_num"] == 1
+    assert memory.add("text 1") == (
+        "Inserting data into memory at index: 1:\ndata: text 1"
+    )
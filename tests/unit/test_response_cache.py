@@ -0,0 +1,126 @@
+import pytest
+
+from autogpt.llm import ApiManager, llm_utils
+from autogpt.llm.response_cache import ResponseCache
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+@pytest.fixture
+def cache_config(config, tmp_path, mocker):
+    mocker.patch.multiple(
+        config,
+        use_response_cache=True,
+        response_cache_path=str(tmp_path / "response_cache"),
+        response_cache_memory_entries=2,
+        plugins=[],
+        use_azure=False,
+    )
+    ResponseCache._instances.pop(ResponseCache, None)
+    yield config
+    ResponseCache._instances.pop(ResponseCache, None)
+
+
+@pytest.fixture
+def response(mocker):
+    response = mocker.MagicMock()
+    response.choices[0].message = {"content": "Hello!"}
+    response.usage.prompt_tokens = 10
+    response.usage.completion_tokens = 5
+    return response
+
+
+def new_cache() -> ResponseCache:
+    ResponseCache._instances.pop(ResponseCache, None)
+    return ResponseCache()
+
+
+def test_put_and_get(cache_config, response):
+    cache = new_cache()
+    assert cache.get("gpt-3.5-turbo", 0, None, MESSAGES) is None
+
+    cache.put("gpt-3.5-turbo", 0, None, MESSAGES, response)
+
+    assert cache.get("gpt-3.5-turbo", 0, None, MESSAGES) == {
+        "content": "Hello!",
+        "prompt_tokens": 10,
+        "completion_tokens": 5,
+    }
+    assert cache.get("gpt-4", 0, None, MESSAGES) is None
+    assert cache.get("gpt-3.5-turbo", 0, 100, MESSAGES) is None
+
+
+def test_persists_across_instances(cache_config, response):
+    new_cache().put("gpt-3.5-turbo", 0, None, MESSAGES, response)
+
+    cache = new_cache()
+
+    assert cache.get("gpt-3.5-turbo", 0, None, MESSAGES)["content"] == "Hello!"
+
+
+def test_ignores_nonzero_temperature(cache_config, response):
+    cache = new_cache()
+    cache.put("gpt-3.5-turbo", 0.7, None, MESSAGES, response)
+
+    assert cache.get("gpt-3.5-turbo", 0.7, None, MESSAGES) is None
+    assert not cache.path.exists()
+
+
+def test_clear(cache_config, response):
+    cache = new_cache()
+    cache.put("gpt-3.5-turbo", 0, None, MESSAGES, response)
+
+    cache.clear()
+
+    assert cache.get("gpt-3.5-turbo", 0, None, MESSAGES) is None
+
+
+def test_create_chat_completion_uses_cache(cache_config, mocker, response, api_manager):
+    create = mocker.patch.object(
+        llm_utils.ApiManager, "create_chat_completion", return_value=response
+    )
+
+    for _ in range(3):
+        reply = llm_utils.create_chat_completion(
+            MESSAGES, model="gpt-3.5-turbo", temperature=0
+        )
+        assert reply == "Hello!"
+
+    create.assert_called_once()
+    assert ApiManager().get_saved_prompt_tokens() == 20
+    assert ApiManager().get_saved_completion_tokens() == 10
+    assert ApiManager().get_saved_cost() == pytest.approx(30 * 0.002 / 1000)
+
+
+def test_create_chat_completion_bypasses_disabled_cache(
+    cache_config, mocker, response, api_manager
+):
+    cache_config.set_use_response_cache(False)
+    create = mocker.patch.object(
+        llm_utils.ApiManager, "create_chat_completion", return_value=response
+    )
+
+    for _ in range(2):
+        llm_utils.create_chat_completion(MESSAGES, model="gpt-3.5-turbo", temperature=0)
+
+    assert create.call_count == 2
+    assert ApiManager().get_saved_cost() == 0
+
+
+@pytest.mark.asyncio
+async def test_acreate_chat_completion_uses_cache(
+    cache_config, mocker, response, api_manager
+):
+    acreate = mocker.patch.object(
+        llm_utils.ApiManager,
+        "acreate_chat_completion",
+        new=mocker.AsyncMock(return_value=response),
+    )
+
+    for _ in range(2):
+        reply = await llm_utils.acreate_chat_completion(
+            MESSAGES, model="gpt-3.5-turbo", temperature=0
+        )
+        assert reply == "Hello!"
+
+    acreate.assert_awaited_once()
@@ -0,0 +1,170 @@
+import pytest
+from openai.error import APIConnectionError, APIError, RateLimitError, Timeout
+
+from autogpt.llm import retry
+from autogpt.llm.retry import (
+    CircuitOpenError,
+    RetryEngine,
+    RetryPolicy,
+    is_retryable,
+    retry_deadline,
+)
+
+
+@pytest.fixture
+def sleeps(mocker):
+    """Record the backoffs instead of waiting them out"""
+    sleeps = []
+    mocker.patch.object(retry.time, "sleep", side_effect=sleeps.append)
+    return sleeps
+
+
+def failing(errors):
+    """A function that raises the given errors one by one, then returns "ok" """
+    errors = list(errors)
+    calls = []
+
+    def f():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    f.calls = calls
+    return f
+
+
+def bad_gateway():
+    return APIError("Bad gateway", http_status=502)
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(backoff_base=2.0, max_backoff=10.0, jitter=0.5)
+
+    for _ in range(100):
+        assert 4.0 <= policy.backoff(1) <= 8.0
+        assert 5.0 <= policy.backoff(5) <= 10.0
+    assert RetryPolicy(jitter=0).backoff(1) == 8.0
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [
+        (RateLimitError("Error"), True),
+        (Timeout("Error"), True),
+        (APIError("Error", http_status=502), True),
+        (APIError("Error", http_status=503), True),
+        (APIError("Error", http_status=500), False),
+        (APIConnectionError("Error"), False),
+        (ValueError("Error"), False),
+    ],
+)
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) == retryable
+
+
+def test_call_retries_and_records_stats(retry_engine: RetryEngine, sleeps):
+    f = failing([bad_gateway(), Timeout("Error")])
+
+    assert retry_engine.call("chat", RetryPolicy(jitter=0), f) == "ok"
+
+    assert len(f.calls) == 3
+    assert sleeps == [8.0, 16.0]
+    stats = retry_engine.get_stats()["chat"]
+    assert (stats.calls, stats.retries, stats.failures) == (1, 2, 0)
+
+
+def test_rate_limited_calls_retry_without_backoff(retry_engine: RetryEngine, sleeps):
+    f = failing([RateLimitError("Error")] * 3)
+
+    policy = RetryPolicy(rate_limited=True, warn_user=False)
+    assert retry_engine.call("embedding", policy, f) == "ok"
+
+    assert sleeps == [0.0, 0.0, 0.0]
+
+
+def test_call_gives_up_at_deadline(retry_engine: RetryEngine, sleeps):
+    f = failing([bad_gateway()] * 5)
+
+    with pytest.raises(APIError):
+        retry_engine.call("chat", RetryPolicy(jitter=0, deadline=30.0), f)
+
+    # The waits of 8 and 16 seconds fit in the deadline, the next 32 don't
+    assert sleeps == [8.0, 16.0]
+    assert retry_engine.get_stats()["chat"].failures == 1
+
+
+def test_retry_deadline_is_shared_by_calls(retry_engine: RetryEngine, sleeps):
+    f = failing([bad_gateway()] * 5)
+
+    with retry_deadline(5.0), pytest.raises(APIError):
+        retry_engine.call("chat", RetryPolicy(jitter=0), f)
+
+    assert len(f.calls) == 1
+    assert sleeps == []
+
+
+def test_circuit_opens_and_half_opens(retry_engine: RetryEngine, mocker, sleeps):
+    retry_engine.failure_threshold = 2
+    retry_engine.reset_timeout = 30.0
+    now = mocker.patch.object(retry.time, "monotonic", return_value=1000.0)
+    policy = RetryPolicy(num_retries=0)
+    f = failing([bad_gateway()] * 3)
+
+    for _ in range(2):
+        with pytest.raises(APIError):
+            retry_engine.call("image", policy, f)
+    with pytest.raises(CircuitOpenError):
+        retry_engine.call("image", policy, f)
+    assert len(f.calls) == 2
+    # Other endpoints are not affected
+    assert retry_engine.call("chat", policy, lambda: "ok") == "ok"
+
+    # After the reset timeout a single trial is let through; it fails, so the
+    # circuit stays open
+    now.return_value = 1031.0
+    with pytest.raises(APIError):
+        retry_engine.call("image", policy, f)
+    with pytest.raises(CircuitOpenError):
+        retry_engine.call("image", policy, f)
+
+    # The next trial succeeds and closes the circuit
+    now.return_value = 1062.0
+    assert retry_engine.call("image", policy, f) == "ok"
+    assert retry_engine.call("image", policy, f) == "ok"
+    assert retry_engine.get_stats()["image"].rejected == 2
+
+
+def test_connection_errors_open_the_circuit(retry_engine: RetryEngine):
+    retry_engine.failure_threshold = 1
+    f = failing([APIConnectionError("Error")])
+
+    with pytest.raises(APIConnectionError):
+        retry_engine.call("chat", RetryPolicy(), f)
+
+    assert len(f.calls) == 1
+    assert retry_engine.breaker("chat").is_open
+
+
+def test_other_errors_do_not_open_the_circuit(retry_engine: RetryEngine):
+    retry_engine.failure_threshold = 1
+    f = failing([APIError("Error", http_status=500)])
+
+    with pytest.raises(APIError):
+        retry_engine.call("chat", RetryPolicy(), f)
+
+    assert not retry_engine.breaker("chat").is_open
+
+
+@pytest.mark.asyncio
+async def test_acall_retries(retry_engine: RetryEngine, mocker):
+    sleep = mocker.patch.object(retry.asyncio, "sleep", new=mocker.AsyncMock())
+    errors = [bad_gateway()]
+
+    async def f():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert await retry_engine.acall("chat", RetryPolicy(jitter=0), f) == "ok"
+    sleep.assert_awaited_once_with(8.0)
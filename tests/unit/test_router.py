@@ -0,0 +1,137 @@
+import pytest
+
+from autogpt.config.config import parse_llm_routes
+from autogpt.llm import ApiManager, api_manager, llm_utils, router
+from autogpt.llm.router import ModelRouter, get_model_info, token_counting_model
+
+
+@pytest.fixture
+def model_router(mocker, config) -> ModelRouter:
+    mocker.patch.multiple(
+        config, fast_llm_model="gpt-3.5-turbo", smart_llm_model="gpt-4", llm_routes={}
+    )
+    ModelRouter._instances.pop(ModelRouter, None)
+    yield ModelRouter()
+    ModelRouter._instances.pop(ModelRouter, None)
+
+
+@pytest.fixture
+def prompt_tokens(mocker):
+    """Set the token count of the prompt, without a tiktoken download"""
+    return mocker.patch.object(router, "count_message_tokens", return_value=100)
+
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+def test_parse_llm_routes():
+    assert parse_llm_routes(
+        "json-fix=fastest:gpt-3.5-turbo, gpt-4; analyze=cheapest:gpt-4;"
+    ) == {
+        "json-fix": ("fastest", ["gpt-3.5-turbo", "gpt-4"]),
+        "analyze": ("cheapest", ["gpt-4"]),
+    }
+    assert parse_llm_routes("") == {}
+
+
+@pytest.mark.parametrize("value", ["json-fix=gpt-4", "json-fix=best:gpt-4"])
+def test_parse_llm_routes_invalid(value):
+    with pytest.raises(ValueError):
+        parse_llm_routes(value)
+
+
+def test_get_model_info_of_snapshots():
+    assert get_model_info("gpt-4-32k-0314").name == "gpt-4-32k"
+    assert get_model_info("gpt-3.5-turbo").name == "gpt-3.5-turbo"
+    assert get_model_info("davinci") is None
+
+
+def test_token_counting_model():
+    assert token_counting_model("gpt-4-32k") == "gpt-4"
+    assert token_counting_model("gpt-4-0314") == "gpt-4-0314"
+    assert token_counting_model("gpt-3.5-turbo") == "gpt-3.5-turbo"
+
+
+def test_route_starting_with_an_uncounted_model(
+    model_router: ModelRouter, config, prompt_tokens
+):
+    config.llm_routes.update(parse_llm_routes("analyze=cheapest:gpt-4-32k,gpt-4"))
+
+    assert model_router.route("analyze", MESSAGES) == "gpt-4"
+    assert prompt_tokens.call_args.args[1] == "gpt-4"
+
+
+def test_only_the_request_counts_as_latency(mocker, model_router: ModelRouter):
+    # The rate limiter waits 5 seconds, the request takes 1.5
+    clock = iter([5.0, 6.5])
+    mocker.patch.object(api_manager.time, "monotonic", side_effect=lambda: next(clock))
+    mocker.patch.object(api_manager.RateLimiter, "acquire")
+    response = mocker.MagicMock()
+    response.usage.prompt_tokens = response.usage.completion_tokens = 0
+    mocker.patch("openai.ChatCompletion.create", return_value=response)
+
+    ApiManager().create_chat_completion(MESSAGES, model="gpt-4")
+
+    assert model_router.get_latencies() == {"gpt-4": 1.5}
+
+
+def test_default_routes(model_router: ModelRouter, prompt_tokens):
+    assert model_router.route("json-fix", MESSAGES) == "gpt-3.5-turbo"
+    assert model_router.route("summarize", MESSAGES) == "gpt-3.5-turbo"
+    assert model_router.route("analyze", MESSAGES) == "gpt-4"
+    with pytest.raises(ValueError):
+        model_router.route("unknown", MESSAGES)
+
+
+def test_route_skips_models_the_prompt_does_not_fit(
+    model_router: ModelRouter, prompt_tokens
+):
+    prompt_tokens.return_value = 3000
+    assert model_router.route("summarize", MESSAGES) == "gpt-3.5-turbo"
+    # Room for the completion is needed as well
+    assert model_router.route("summarize", MESSAGES, max_tokens=2000) == "gpt-4"
+
+    # If no model fits, the one with the largest context is the best bet
+    prompt_tokens.return_value = 50000
+    assert model_router.route("summarize", MESSAGES) == "gpt-4"
+
+
+def test_cheapest_route(model_router: ModelRouter, config, prompt_tokens):
+    config.set_llm_route(
+        "summarize", "cheapest", ["gpt-4", "gpt-4-32k", "gpt-3.5-turbo"]
+    )
+
+    assert model_router.route("summarize", MESSAGES) == "gpt-3.5-turbo"
+
+
+def test_fastest_route_learns_latencies(
+    model_router: ModelRouter, config, prompt_tokens
+):
+    config.set_llm_route("json-fix", "fastest", ["gpt-4", "gpt-3.5-turbo"])
+
+    # Without observations the order of the route decides
+    assert model_router.route("json-fix", MESSAGES) == "gpt-4"
+
+    model_router.record_latency("gpt-4", 10.0)
+    # Unobserved models rank behind observed ones
+    assert model_router.route("json-fix", MESSAGES) == "gpt-4"
+
+    model_router.record_latency("gpt-3.5-turbo", 2.0)
+    assert model_router.route("json-fix", MESSAGES) == "gpt-3.5-turbo"
+
+
+def test_record_latency_smooths(model_router: ModelRouter):
+    model_router.record_latency("gpt-4", 10.0)
+    model_router.record_latency("gpt-4", 20.0)
+
+    assert model_router.get_latencies() == {"gpt-4": pytest.approx(13.0)}
+
+
+def test_call_ai_function_routes_by_task(mocker, model_router: ModelRouter):
+    route = mocker.patch.object(ModelRouter, "route", return_value="gpt-3.5-turbo")
+    create = mocker.patch.object(llm_utils, "create_chat_completion")
+
+    llm_utils.call_ai_function("def f(x):", ["1"], "Fix it", task="json-fix")
+
+    assert route.call_args.args[0] == "json-fix"
+    assert create.call_args.kwargs["model"] == "gpt-3.5-turbo"
@@ -0,0 +1,42 @@
+import pytest
+import spacy
+
+from autogpt.processing import text
+from autogpt.processing.text import split_sentences
+
+
+@pytest.fixture
+def sentence_pipeline():
+    text.get_sentence_pipeline.cache_clear()
+    yield text.get_sentence_pipeline
+    text.get_sentence_pipeline.cache_clear()
+
+
+def test_sentence_pipeline_is_loaded_once_without_unused_components(
+    mocker, sentence_pipeline
+):
+    load = mocker.patch.object(
+        text.spacy, "load", side_effect=lambda *args, **kwargs: spacy.blank("en")
+    )
+
+    nlp = sentence_pipeline("en_core_web_sm")
+
+    assert sentence_pipeline("en_core_web_sm") is nlp
+    load.assert_called_once_with("en_core_web_sm", exclude=text.NON_SENTENCE_COMPONENTS)
+    assert "ner" in text.NON_SENTENCE_COMPONENTS
+    assert "parser" not in text.NON_SENTENCE_COMPONENTS
+    assert nlp.pipe_names == ["sentencizer"]
+
+
+def test_split_sentences_with_sentencizer_only(mocker, config, sentence_pipeline):
+    load = mocker.patch.object(text.spacy, "load")
+    mocker.patch.multiple(
+        config,
+        browse_spacy_language_model="en_core_web_sm",
+        browse_spacy_sentencizer_only=True,
+    )
+
+    sentences = list(split_sentences(["One. Two!", "Three? Four", ""], batch_size=2))
+
+    assert sentences == [["One.", "Two!"], ["Three?", "Four"], []]
+    load.assert_not_called()
@@ -0,0 +1,111 @@
+import random
+import re
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+import regex
+
+from autogpt.llm import token_counter
+from autogpt.processing import text
+from autogpt.processing.text import create_message, split_text
+
+# The pre-tokenizer of cl100k_base, which decides where tokens can be merged
+CL100K_PATTERN = (
+    r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}|"""
+    r""" ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+)
+
+SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    '"Quoted sentences start with punctuation," she said.',
+    "It's 2023 and there are 12345 tokens.",
+    "Numbers like 3.14159 end sentences too 42.",
+    "(Parentheses) and [brackets] appear... sometimes!",
+    'Ends with a quote."',
+    "'s is a contraction at the start.",
+    "Tabs\tand  double  spaces stay inside.",
+    "Unicode: naïve café, 東京, emoji 🙂.",
+    "Short.",
+]
+
+
+class PreTokenizedEncoding:
+    """Splits text like cl100k_base and then makes a token of every 3 bytes of each
+    piece, which is enough to check chunk boundaries without the real encoding."""
+
+    def encode(self, text_: str) -> List[int]:
+        tokens = []
+        for piece in regex.findall(CL100K_PATTERN, text_):
+            data = piece.encode("utf-8")
+            tokens.extend(data[i] for i in range(0, len(data), 3))
+        return tokens
+
+
+@pytest.fixture(autouse=True)
+def encoding(mocker):
+    encoding = PreTokenizedEncoding()
+    mocker.patch.object(token_counter, "get_encoding_for_model", return_value=encoding)
+    mocker.patch.object(text, "get_encoding_for_model", return_value=encoding)
+    token_counter.token_count_cache.clear()
+    yield encoding
+    token_counter.token_count_cache.clear()
+
+
+class PunctuationSentencizer:
+    """Splits sentences after ".", "!" and "?" instead of running spaCy"""
+
+    def pipe(self, texts, batch_size):
+        for text_ in texts:
+            sentences = re.split(r"(?<=[.!?\"])\s+", text_)
+            yield SimpleNamespace(sents=[SimpleNamespace(text=s) for s in sentences])
+
+
+@pytest.fixture(autouse=True)
+def sentencizer(mocker):
+    mocker.patch.object(
+        text, "get_sentence_pipeline", return_value=PunctuationSentencizer()
+    )
+
+
+def split_text_by_recounting(text_, max_length, model, question):
+    """The previous split_text, which counted each candidate chunk from scratch"""
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?\"])\s+", text_)]
+    current_chunk = []
+    for sentence in sentences:
+        message = [create_message(" ".join(current_chunk) + " " + sentence, question)]
+        if token_counter.count_message_tokens(message, model) + 1 <= max_length:
+            current_chunk.append(sentence)
+        else:
+            yield " ".join(current_chunk)
+            current_chunk = [sentence]
+            message = [create_message(" ".join(current_chunk), question)]
+            if token_counter.count_message_tokens(message, model) + 1 > max_length:
+                raise ValueError("Sentence is too long")
+    if current_chunk:
+        yield " ".join(current_chunk)
+
+
+@pytest.mark.parametrize("max_length", [400, 600, 1000, 3000])
+@pytest.mark.parametrize("question", ["", 'What is "it"?'])
+def test_split_text_keeps_chunk_boundaries(max_length, question):
+    rng = random.Random(max_length)
+    page = " ".join(rng.choice(SENTENCES) for _ in range(300))
+
+    chunks = list(split_text(page, max_length, "gpt-3.5-turbo", question))
+
+    assert len(chunks) > 1
+    assert chunks == list(
+        split_text_by_recounting(page, max_length, "gpt-3.5-turbo", question)
+    )
+    for chunk in chunks:
+        message = create_message(chunk, question)
+        assert (
+            token_counter.count_message_tokens([message], "gpt-3.5-turbo") + 1
+            <= max_length
+        )
+
+
+def test_split_text_raises_on_too_long_sentence():
+    with pytest.raises(ValueError):
+        list(split_text("Short. " + "word " * 500 + ".", 300, "gpt-3.5-turbo"))
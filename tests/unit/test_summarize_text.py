@@ -0,0 +1,126 @@
+import pytest
+
+from autogpt.processing import text
+from autogpt.processing.text import group_summaries, summarize_chunks_concurrently
+
+
+@pytest.fixture(autouse=True)
+def word_token_count(mocker):
+    """Count one token per word, so token limits are easy to reason about."""
+    mocker.patch.object(
+        text,
+        "count_message_tokens",
+        side_effect=lambda messages, model: sum(
+            len(message["content"].split()) for message in messages
+        ),
+    )
+
+
+@pytest.fixture
+def memory(mocker):
+    memory = mocker.MagicMock()
+    mocker.patch.object(text, "get_memory", return_value=memory)
+    return memory
+
+
+def test_group_summaries_respects_fan_out(mocker):
+    mocker.patch.object(text.CFG, "browse_summary_fan_out", 2)
+    mocker.patch.object(text.CFG, "browse_chunk_max_length", 1000)
+
+    groups = group_summaries(["a", "b", "c", "d", "e"], "", "gpt-3.5-turbo")
+
+    assert groups == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_group_summaries_respects_token_limit(mocker):
+    mocker.patch.object(text.CFG, "browse_summary_fan_out", 8)
+    overhead = len(text.create_message("", "")["content"].split())
+    mocker.patch.object(text.CFG, "browse_chunk_max_length", overhead + 4)
+
+    groups = group_summaries(["one two", "three", "four five six"], "", "model")
+
+    assert groups == [["one two", "three"], ["four five six"]]
+
+
+@pytest.mark.asyncio
+async def test_summarize_chunks_concurrently_keeps_order(mocker, memory):
+    mocker.patch.object(text.CFG, "browse_summary_concurrency", 4)
+    mocker.patch.object(text.CFG, "browse_chunk_max_length", 1000)
+
+    async def summarize(model, messages):
+        return messages[0]["content"].split('"""')[1].upper()
+
+    acreate = mocker.patch.object(
+        text, "acreate_chat_completion", side_effect=summarize
+    )
+
+    summary = await summarize_chunks_concurrently(
+        "https://example.com", ["a", "b", "c"], "", "gpt-3.5-turbo"
+    )
+
+    assert summary == "A\nB\nC"
+    assert acreate.await_count == 4
+    assert memory.add_many.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_summarize_chunks_concurrently_reduces_hierarchically(mocker, memory):
+    mocker.patch.object(text.CFG, "browse_summary_concurrency", 4)
+    mocker.patch.object(text.CFG, "browse_summary_fan_out", 2)
+    overhead = len(text.create_message("", "")["content"].split())
+    # Room for two summaries of two words, but not for four
+    mocker.patch.object(text.CFG, "browse_chunk_max_length", overhead + 5)
+    acreate = mocker.patch.object(
+        text, "acreate_chat_completion", return_value="short summary"
+    )
+
+    await summarize_chunks_concurrently(
+        "https://example.com", ["a", "b", "c", "d"], "", "gpt-3.5-turbo"
+    )
+
+    # 4 chunk summaries are reduced to 2, which are combined by the final call
+    assert acreate.await_count == 4 + 2 + 1
+
+
+@pytest.mark.asyncio
+async def test_summarize_chunks_concurrently_does_not_reduce_what_fits(mocker, memory):
+    mocker.patch.object(text.CFG, "browse_summary_concurrency", 4)
+    mocker.patch.object(text.CFG, "browse_summary_fan_out", 2)
+    mocker.patch.object(text.CFG, "browse_chunk_max_length", 1000)
+    acreate = mocker.patch.object(
+        text, "acreate_chat_completion", return_value="summary"
+    )
+
+    await summarize_chunks_concurrently(
+        "https://example.com", ["a", "b", "c", "d"], "", "gpt-3.5-turbo"
+    )
+
+    # More summaries than the fan-out, but they fit in one final call
+    assert acreate.await_count == 4 + 1
+
+
+def test_summarize_text_reduces_hierarchically_one_chunk_at_a_time(mocker, memory):
+    mocker.patch.object(text.CFG, "browse_summary_concurrency", 1)
+    mocker.patch.object(text.CFG, "browse_summary_fan_out", 2)
+    overhead = len(text.create_message("", "")["content"].split())
+    mocker.patch.object(text.CFG, "browse_chunk_max_length", overhead + 5)
+    mocker.patch.object(text, "split_text", return_value=["a", "b", "c", "d"])
+    create = mocker.patch.object(
+        text, "create_chat_completion", return_value="short summary"
+    )
+
+    text.summarize_text("https://example.com", "a b c d", "")
+
+    # The same reduction as when the chunks are summarized concurrently
+    assert create.call_count == 4 + 2 + 1
+
+
+@pytest.mark.asyncio
+async def test_summarize_text_inside_an_event_loop(mocker, memory):
+    mocker.patch.object(text.CFG, "browse_summary_concurrency", 4)
+    mocker.patch.object(text.CFG, "browse_chunk_max_length", 1000)
+    mocker.patch.object(text, "split_text", return_value=["a", "b"])
+    create = mocker.patch.object(text, "create_chat_completion", return_value="s")
+
+    assert text.summarize_text("https://example.com", "a b", "") == "s"
+    assert create.call_count == 2 + 1
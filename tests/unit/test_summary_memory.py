@@ -0,0 +1,171 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from autogpt.memory_management import summary_memory
+from autogpt.memory_management.summary_memory import (
+    RunningSummaryUpdater,
+    summary_message,
+)
+
+
+@pytest.fixture
+def agent():
+    agent = MagicMock()
+    agent.summary_memory = "I was created."
+    agent.cycle_count = 1
+    return agent
+
+
+@pytest.fixture(autouse=True)
+def token_counts(mocker, config):
+    """Count 10 tokens per message, so that no tiktoken download is needed"""
+    mocker.patch.object(
+        summary_memory,
+        "count_message_tokens",
+        side_effect=lambda messages, model: 10 * len(messages),
+    )
+    mocker.patch.object(summary_memory, "count_string_tokens", return_value=5)
+    mocker.patch.multiple(
+        config,
+        fast_llm_model="gpt-3.5-turbo",
+        summary_batch_tokens=0,
+        summary_batch_max_cycles=3,
+    )
+
+
+@pytest.fixture
+def release():
+    """Holds the summary updates back while cleared"""
+    release = threading.Event()
+    release.set()
+    return release
+
+
+@pytest.fixture
+def updates(mocker, release):
+    """Replace the LLM call with one that appends the events to the summary"""
+    updates = []
+
+    def update_running_summary(agent, current_memory, new_events):
+        release.wait(5)
+        updates.append(new_events)
+        if isinstance(current_memory, dict):
+            current_memory = current_memory["content"].split("\n", 1)[1]
+        return summary_message(
+            current_memory + "".join(event["content"] for event in new_events)
+        )
+
+    mocker.patch.object(
+        summary_memory, "update_running_summary", side_effect=update_running_summary
+    )
+    return updates
+
+
+def message(content):
+    return {"role": "system", "content": content}
+
+
+def test_submit_updates_in_the_background(agent, updates, release):
+    updater = RunningSummaryUpdater(agent)
+    release.clear()
+
+    updater.submit([message(" A")])
+    # The caller is not blocked while the summary is made
+    assert updates == []
+
+    release.set()
+    assert updater.wait([]) == summary_message("I was created. A")
+    assert updates == [[message(" A")]]
+
+
+def test_wait_without_update_returns_the_summary(agent, updates):
+    updater = RunningSummaryUpdater(agent)
+
+    assert updater.wait([]) == summary_message("I was created.")
+    assert updates == []
+
+
+def test_wait_collects_events_for_the_next_update(agent, updates):
+    updater = RunningSummaryUpdater(agent)
+
+    assert updater.wait([message(" A")]) == summary_message("I was created.")
+    updater.submit([message(" B")])
+
+    assert updater.wait([]) == summary_message("I was created. A B")
+    assert updates == [[message(" A"), message(" B")]]
+
+
+def test_empty_cycles_do_not_count_as_skipped_updates(agent, updates, api_manager):
+    updater = RunningSummaryUpdater(agent)
+
+    updater.submit([])
+    updater.wait([])
+
+    assert updates == []
+    assert api_manager.get_skipped_summary_updates() == 0
+
+
+def test_batched_cycles_count_as_skipped_updates(agent, updates, api_manager, config):
+    config.summary_batch_tokens = 25
+    updater = RunningSummaryUpdater(agent)
+
+    updater.submit([message(" A")])
+
+    assert updates == []
+    assert api_manager.get_skipped_summary_updates() == 1
+    assert api_manager.get_saved_prompt_tokens() == 10
+    assert api_manager.get_saved_completion_tokens() == 5
+
+
+def test_user_messages_are_left_out_of_the_batch(agent, updates, api_manager):
+    updater = RunningSummaryUpdater(agent)
+
+    updater.submit([{"role": "user", "content": " Determine the next command"}])
+    agent.cycle_count += 3
+    updater.submit([])
+
+    assert updater.wait([]) == summary_message("I was created.")
+    assert updates == []
+    assert api_manager.get_skipped_summary_updates() == 0
+
+
+def test_events_are_batched_until_the_token_threshold(
+    agent, updates, api_manager, config
+):
+    config.summary_batch_tokens = 25
+    updater = RunningSummaryUpdater(agent)
+
+    for content in [" A", " B", " C"]:
+        updater.submit([message(content)])
+        agent.cycle_count += 1
+
+    assert updater.wait([]) == summary_message("I was created. A B C")
+    assert updates == [[message(" A"), message(" B"), message(" C")]]
+    assert api_manager.get_skipped_summary_updates() == 2
+
+
+def test_events_are_summarized_once_the_batch_is_old(agent, updates, config):
+    config.summary_batch_tokens = 1000
+    updater = RunningSummaryUpdater(agent)
+
+    updater.submit([message(" A")])
+    agent.cycle_count += 1
+    updater.submit([])
+    assert updates == []
+
+    agent.cycle_count += 2
+    updater.submit([])
+    assert updater.wait([]) == summary_message("I was created. A")
+
+
+def test_wait_raises_errors_of_the_background_update(agent, mocker):
+    mocker.patch.object(
+        summary_memory, "update_running_summary", side_effect=RuntimeError("Error")
+    )
+    updater = RunningSummaryUpdater(agent)
+
+    updater.submit([message(" A")])
+    with pytest.raises(RuntimeError):
+        updater.wait([])
@@ -0,0 +1,156 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("weaviate")
+
+from weaviate.util import generate_uuid5
+
+from autogpt.memory import weaviate as weaviate_memory
+from autogpt.memory.base import ALREADY_STORED
+from autogpt.memory.weaviate import WeaviateMemory
+
+EMBED_DIM = 4
+
+
+def store(client, texts):
+    """Makes the lookups of the client find the objects of the given texts"""
+    uuids = {generate_uuid5(text, "Test") for text in texts}
+
+    def with_where(where):
+        found = [
+            {"_additional": {"id": doc_uuid}}
+            for doc_uuid in where["valueTextArray"]
+            if doc_uuid in uuids
+        ]
+        query = MagicMock()
+        query.with_limit.return_value.do.return_value = {
+            "data": {"Get": {"Test": found}}
+        }
+        return query
+
+    query = client.query.get.return_value.with_additional.return_value
+    query.with_where.side_effect = with_where
+    return query
+
+
+@pytest.fixture
+def client(mocker):
+    client = mocker.MagicMock()
+    store(client, [])
+    mocker.patch.object(weaviate_memory, "Client", return_value=client)
+    return client
+
+
+@pytest.fixture
+def memory(mocker, config, client):
+    mocker.patch.multiple(
+        config,
+        use_weaviate_embedded=False,
+        weaviate_batch_size=50,
+        weaviate_batch_workers=3,
+        memory_index="test",
+    )
+    WeaviateMemory._instances.pop(WeaviateMemory, None)
+    yield WeaviateMemory(config)
+    WeaviateMemory._instances.pop(WeaviateMemory, None)
+
+
+@pytest.fixture(autouse=True)
+def get_ada_embeddings(mocker):
+    return mocker.patch.object(
+        weaviate_memory,
+        "get_ada_embeddings",
+        side_effect=lambda texts: [[0.1] * EMBED_DIM for _ in texts],
+    )
+
+
+def test_batching_is_configured_once(memory, client):
+    memory.add("text 0")
+    memory.add_many(["text 1", "text 2"])
+
+    client.batch.configure.assert_called_once()
+    kwargs = client.batch.configure.call_args.kwargs
+    assert kwargs["dynamic"] is True
+    assert kwargs["batch_size"] == 50
+    assert kwargs["num_workers"] == 3
+
+
+def test_add_many_streams_objects_through_one_batch(memory, client, get_ada_embeddings):
+    store(client, ["stored"])
+    batch = client.batch.__enter__.return_value
+
+    messages = memory.add_many(["text 0", "stored", "text 1", "text 0"])
+
+    get_ada_embeddings.assert_called_once_with(["text 0", "text 1"])
+    client.batch.__enter__.assert_called_once()
+    assert batch.add_data_object.call_count == 2
+    uuid = generate_uuid5("text 1", "Test")
+    assert messages == [
+        f"Inserting data into memory at uuid: {generate_uuid5('text 0', 'Test')}:\n"
+        " data: text 0",
+        "",
+        f"Inserting data into memory at uuid: {uuid}:\n data: text 1",
+        "",
+    ]
+
+
+def test_add_many_collects_errors_per_object(memory, client):
+    failed_uuid = generate_uuid5("text 1", "Test")
+
+    def flush(*args):
+        memory._collect_batch_errors(
+            [
+                {"id": generate_uuid5("text 0", "Test"), "result": {}},
+                {
+                    "id": failed_uuid,
+                    "result": {"errors": {"error": [{"message": "no space"}]}},
+                },
+            ]
+        )
+
+    client.batch.__exit__.side_effect = flush
+
+    messages = memory.add_many(["text 0", "text 1"])
+
+    assert messages[0] != ""
+    assert messages[1] == ""
+    assert memory.batch_errors == {failed_uuid: "no space"}
+
+    # The errors are those of the last add
+    client.batch.__exit__.side_effect = None
+    memory.add("text 2")
+    assert memory.batch_errors == {}
+
+
+def test_is_stored_looks_texts_up_in_batches(memory, client, mocker):
+    mocker.patch.object(memory, "batch_size", 2)
+    query = store(client, ["text 1", "text 4"])
+
+    stored = memory.is_stored([f"text {i}" for i in range(5)])
+
+    assert stored == [False, True, False, False, True]
+    assert [
+        len(call.args[0]["valueTextArray"]) for call in query.with_where.call_args_list
+    ] == [2, 2, 1]
+
+
+def test_is_stored_takes_texts_as_not_stored_when_the_lookup_fails(memory, client):
+    query = client.query.get.return_value.with_additional.return_value
+    query.with_where.side_effect = None
+    query.with_where.return_value.with_limit.return_value.do.return_value = {
+        "errors": [{"message": "no such filter"}]
+    }
+
+    assert memory.is_stored(["text 0"]) == [False]
+
+
+def test_add_tells_a_stored_text_from_a_failed_one(memory, client):
+    store(client, ["stored"])
+    assert memory.add("stored") == ALREADY_STORED
+
+    failed_uuid = generate_uuid5("text 0", "Test")
+    client.batch.__exit__.side_effect = lambda *args: memory._collect_batch_errors(
+        [{"id": failed_uuid, "result": {"errors": {"error": [{"message": "no"}]}}}]
+    )
+    assert memory.add("text 0") == ""